@@ -4,12 +4,14 @@
 # Methodology:
 # A user CSV file is read and each row is stored in a user data dictionary under the key row[USER_KEY_FIELD]
 # A data CSV file is read and row[DATA_KEY_FIELD] is looked up in the user data dictionary
+# If the user CSV file has more than MAX_ROWS rows, both files are sorted by key on disk and matched instead, see CSVJoin.py;
+# the output rows are still in the order of the data CSV file
 # If the user data row is found, the data row and user data row are combined and written to the output CSV file
 # If the user data row is not found, an error message is generated and the data row is written to the output CSV file
 # If a user CSV file column header matches a data CSV file column header, ".user" is appended to the
 # user column header in the output CSV file
 #
-# Customize: DATA_KEY_FIELD, USER_KEY_FIELD, RETAIN_USER_KEY_FIELD, USER_APPEND_FIELDS, WRITE_UNMATCHED_DATA_ROWS
+# Customize: DATA_KEY_FIELD, USER_KEY_FIELD, RETAIN_USER_KEY_FIELD, USER_APPEND_FIELDS, WRITE_UNMATCHED_DATA_ROWS, MAX_ROWS
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -22,8 +24,11 @@
 """
 
 import csv
+import operator
 import sys
 
+from CSVJoin import CSVJoin
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -38,29 +43,35 @@ USER_APPEND_FIELDS = []
 # Should unmatched data key rows be written to output
 WRITE_UNMATCHED_DATA_ROWS = True
 
+MAX_ROWS = 1000000 # User rows held in memory; beyond this, the files are sorted on disk
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+
+def readRows(inputCSV, numFields):
+  # Pad short rows as csv.DictReader does
+  for row in filter(None, inputCSV):
+    if len(row) < numFields:
+      row.extend(['']*(numFields-len(row)))
+    yield row
+
 dataFileName = sys.argv[1]
 dataFile = open(dataFileName, 'r', encoding='utf-8')
-dataCSV = csv.DictReader(dataFile, quotechar=QUOTE_CHAR)
-dataFieldNames = dataCSV.fieldnames[:]
+dataCSV = csv.reader(dataFile, quotechar=QUOTE_CHAR)
+dataFieldNames = next(dataCSV)
 if DATA_KEY_FIELD not in dataFieldNames:
   sys.stderr.write(f'Data key field {DATA_KEY_FIELD} is not in {dataFileName} headers: {",".join(dataFieldNames)}\n')
   sys.exit(1)
 
-userData = {}
 userFileName = sys.argv[2]
 userFile = open(userFileName, 'r', encoding='utf-8')
-userCSV = csv.DictReader(userFile, quotechar=QUOTE_CHAR)
-userFieldNames = userCSV.fieldnames[:]
+userCSV = csv.reader(userFile, quotechar=QUOTE_CHAR)
+userFieldNames = next(userCSV)
 if USER_KEY_FIELD not in userFieldNames:
   sys.stderr.write(f'User key field {USER_KEY_FIELD} is not in {userFileName} headers: {",".join(userFieldNames)}\n')
   sys.exit(1)
-for row in userCSV:
-  userData[row[USER_KEY_FIELD]] = row
-userFile.close()
 
 errors = 0
 if not USER_APPEND_FIELDS:
-  userAppendFields = userFieldNames
+  userAppendFields = userFieldNames[:]
 else:
   userAppendFields = []
   for fieldName in USER_APPEND_FIELDS:
@@ -75,6 +86,12 @@ else:
 if not RETAIN_USER_KEY_FIELD and USER_KEY_FIELD in userAppendFields:
   userAppendFields.remove(USER_KEY_FIELD)
 
+# Only the appended fields of each user are kept
+userAppendIndexes = [userFieldNames.index(fieldName) for fieldName in userAppendFields]
+userData = CSVJoin(readRows(userCSV, len(userFieldNames)), operator.itemgetter(userFieldNames.index(USER_KEY_FIELD)),
+                   lambda row: [row[i] for i in userAppendIndexes], MAX_ROWS, TEMP_DIR)
+userFile.close()
+
 outputFieldNames = dataFieldNames[:]
 userFieldNameMap = {}
 for fieldName in userAppendFields:
@@ -87,21 +104,19 @@ for fieldName in userAppendFields:
 
 outputFileName = sys.argv[3]
 outputFile = open(outputFileName, 'w', encoding='utf-8', newline='')
-outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(outputFieldNames)
 
 errors = 0
-for row in dataCSV:
-  k = row[DATA_KEY_FIELD]
-  if k in userData:
-    for fieldName in userFieldNameMap:
-      row[userFieldNameMap[fieldName]] = userData[k][fieldName]
-    outputCSV.writerow(row)
+dataKeyIndex = dataFieldNames.index(DATA_KEY_FIELD)
+for row, userValues in userData.joinInOrder(readRows(dataCSV, len(dataFieldNames)), operator.itemgetter(dataKeyIndex)):
+  if userValues is not None:
+    outputCSV.writerow([*row, *userValues])
   else:
     errors = 1
-    sys.stderr.write(f'Data key field {row[DATA_KEY_FIELD]} in {dataFileName} does not occur in {userFileName}\n')
+    sys.stderr.write(f'Data key field {row[dataKeyIndex]} in {dataFileName} does not occur in {userFileName}\n')
     if WRITE_UNMATCHED_DATA_ROWS:
-      outputCSV.writerow(row)
+      outputCSV.writerow([*row, *['']*len(userAppendIndexes)])
 
 dataFile.close()
 outputFile.close()
@@ -3,7 +3,7 @@
 # Purpose: Show browser extension information
 # See: https://cloud.google.com/blog/products/chrome-enterprise/enhanced-extension-reporting-with-chrome-browsers-takeout-api
 #
-# Customize: MAX_BROWSERS_TO_PROCESS, MAX_ITEMS_PER_LIST, DESIRED_COLUMN_ORDER, SORT_COLUMN, SEPARATOR
+# Customize: MAX_BROWSERS_TO_PROCESS, MAX_ITEMS_PER_LIST, DESIRED_COLUMN_ORDER, SORT_COLUMN, SEPARATOR, PARALLEL_READ
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -14,10 +14,14 @@
 #  $ python3 ./BrowserExtensions.py BrowserInfo.csv ExtensionsInfo.csv
 """
 
+import array
 import csv
+import itertools
 import json
 import sys
 
+from ShardedCSVReader import ShardedCSVReader
+
 INPUT_QUOTE_CHAR = "'"
 OUTPUT_QUOTE_CHAR = '"'
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
@@ -33,44 +37,80 @@ DESIRED_COLUMN_ORDER = [
 SORT_COLUMN = 'name' # Sort the data on this column
 SEPARATOR = ', ' # Separates machine names
 
+# Set PARALLEL_READ = True to parse and decode the JSON of the browsers with multiple processes, see ShardedCSVReader.py;
+# the output is the same. With MAX_BROWSERS_TO_PROCESS > 0, the file is read serially, as sharding scans the whole file
+PARALLEL_READ = True
+
 extensionsList = {} # The extension list dictionary to fill.
 allColumns = set() # Set of all columns that are found in the data
 
-def ComputeExtensionsList(data):
-  """Computes list of machines that have an extension.
+# Machine names are interned to integer ids; the extensions hold arrays of ids
+machineIds = {}
+machineNames = []
 
-  This sample function processes the |data| retrieved from the Takeout API and
-  calculates the list of machines that have installed each extension listed in
-  the data.
+def GetBrowserExtensions(rawData):
+  """Decodes the extensions of a browser.
 
   Args:
-    data: the data fetched from the Takeout API.
+    rawData: the JSON of a browser fetched from the Takeout API.
+
+  Returns:
+    A tuple of the machine name and a tuple of (key, name, permissions, forced, disabled) for each extension of each profile.
   """
+  if FIX_DOUBLE_SLASH_QUOTE:
+    rawData = rawData.replace(r'\\"', r'\"')
+  data = json.loads(rawData)
+  extensions = []
   for browser in data.get('browsers', []):
     for profile in browser.get('profiles', []):
       for extension in profile.get('extensions', []):
         key = extension['extensionId']
         if 'version' in extension:
           key = key + ' @ ' + extension['version']
-        if key not in extensionsList:
-          current_extension = {
-              'name': extension.get('name', ''),
-              'permissions': extension.get('permissions', ''),
-              'installed': set(),
-              'disabled': set(),
-              'forced': set()
-          }
-        else:
-          current_extension = extensionsList[key]
-
-        machine_name = data['machineName']
-        current_extension['installed'].add(machine_name)
-        if extension.get('installType', '') == 'ADMIN':
-          current_extension['forced'].add(machine_name)
-        if extension.get('disabled', False):
-          current_extension['disabled'].add(machine_name)
-
-        extensionsList[key] = current_extension
+        # Interned so that repeated keys and names are sent once per shard by a worker process
+        extensions.append((sys.intern(key), sys.intern(extension.get('name', '')), extension.get('permissions', ''),
+                           extension.get('installType', '') == 'ADMIN', bool(extension.get('disabled', False))))
+  if not extensions:
+    return None, ()
+  return data['machineName'], tuple(extensions)
+
+def DecodeBrowsers(rows):
+  """Decodes the JSON column of rows, e.g., in a worker process; returns a list of GetBrowserExtensions() tuples."""
+  return [GetBrowserExtensions(row[jsonIndex]) for row in rows]
+
+def ComputeExtensionsList(machineName, extensions):
+  """Computes list of machines that have an extension.
+
+  This sample function processes the extensions of a browser retrieved from the Takeout API and
+  calculates the list of machines that have installed each extension listed in
+  the data.
+
+  Args:
+    machineName: the machine name of the browser.
+    extensions: the extensions of the browser, see GetBrowserExtensions().
+  """
+  if not extensions:
+    return
+  machine_id = machineIds.get(machineName)
+  if machine_id is None:
+    machine_id = machineIds[machineName] = len(machineNames)
+    machineNames.append(machineName)
+  for key, name, permissions, forced, disabled in extensions:
+    current_extension = extensionsList.get(key)
+    if current_extension is None:
+      current_extension = extensionsList[key] = {
+          'name': name,
+          'permissions': permissions,
+          'installed': array.array('I'),
+          'disabled': array.array('I'),
+          'forced': array.array('I')
+      }
+
+    # Repeats of the same browser, e.g., an extension in more than one profile, are skipped; Flatten() removes any others
+    for prop, present in (('installed', True), ('forced', forced), ('disabled', disabled)):
+      machines = current_extension[prop]
+      if present and (not machines or machines[-1] != machine_id):
+        machines.append(machine_id)
 
 def DictToList(data, key_name='id'):
   """Converts a dict into a list.
@@ -113,6 +153,10 @@ def Flatten(data):
   for item in data:
     added_item = {}
     for prop, value in item.items():
+      # Arrays of machine ids become sets of machine names
+      if isinstance(value, array.array):
+        value = {machineNames[machine_id] for machine_id in value}
+
       # Non-container properties can be added directly.
       if not isinstance(value, (list, set)):
         added_item[prop] = value
@@ -170,17 +214,24 @@ def Flatten(data):
 
 # Process browser extension data
 with open(sys.argv[1], 'r', encoding='utf-8') as inputFile:
-  inputCSV = csv.DictReader(inputFile, quotechar=INPUT_QUOTE_CHAR)
+  parallelRead = PARALLEL_READ and MAX_BROWSERS_TO_PROCESS == 0
+  if parallelRead:
+    inputCSV = ShardedCSVReader(inputFile, quotechar=INPUT_QUOTE_CHAR)
+    jsonIndex = inputCSV.fieldnames.index('JSON')
+    decodedShards = inputCSV.mapShards(DecodeBrowsers, ordered=True)
+    browsers = itertools.chain.from_iterable(decodedShards)
+  else:
+    inputCSV = csv.reader(inputFile, quotechar=INPUT_QUOTE_CHAR)
+    jsonIndex = next(inputCSV).index('JSON')
+    browsers = (GetBrowserExtensions(row[jsonIndex]) for row in filter(None, inputCSV))
   browsersProcessed = 0
-  for r in inputCSV:
-    if not FIX_DOUBLE_SLASH_QUOTE:
-      rawData = r['JSON']
-    else:
-      rawData = r['JSON'].replace(r'\\"', r'\"')
-    ComputeExtensionsList(json.loads(rawData))
+  for machineName, extensions in browsers:
+    ComputeExtensionsList(machineName, extensions)
     browsersProcessed += 1
     if MAX_BROWSERS_TO_PROCESS > 0 and browsersProcessed == MAX_BROWSERS_TO_PROCESS:
       break
+  if parallelRead:
+    decodedShards.close() # Stop the worker processes
 
 # Write extensions CSV file
 flattenedList = list(Flatten(DictToList(extensionsList)))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared join of two CSV files on a key used by scripts that combine user data, e.g., MergeUserData.py, AppendUserData.py
+#          The build side, e.g., a file of users, is read into a dictionary that holds only the retained columns
+#          of each row as a tuple. If the build side has more than MAX_ROWS keys, it is instead sorted with a
+#          bounded-memory external sort, see ExternalSort.py, and the rows of the other (probe) side are sorted
+#          the same way and matched in a single merge pass.
+#          When a key occurs in more than one build row, the last row is used.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it and ExternalSort.py in the same directory as the scripts that import it.
+#
+#  join = CSVJoin(userCSV, operator.itemgetter(keyIndex), lambda row: (row[1], row[3]))
+#  for row, values in join.joinInOrder(dataCSV, operator.itemgetter(dataKeyIndex)):
+#    ...  # values is the tuple of retained columns of the matching build row or None; the probe rows are in input order
+#  for key, values, rows in join.sortedGroups(dataCSV, operator.itemgetter(dataKeyIndex)):
+#    ...  # Each key of either side in sorted order; values as above; rows is the list of probe rows with the key, in input order
+#
+#  The rows are lists/tuples of strings, e.g., from a csv.reader; the keys are strings. The build rows are read by CSVJoin(),
+#  so the build file can be closed after it returns. Temporary files are written to tempDir, by default the system temporary directory.
+"""
+
+import itertools
+import operator
+
+from ExternalSort import externalSort
+
+MAX_ROWS = 1000000 # Build side keys held in memory; beyond this, both sides are sorted on disk
+
+_KEY = operator.itemgetter(0)
+
+class CSVJoin():
+  """Join probe rows to the retained columns of build rows with the same key.
+
+  Args:
+    buildRows: an iterable of the build side rows
+    getKey: a function of a build row that returns its key
+    getValues: a function of a build row that returns the tuple of columns to retain
+    maxRows: the maximum number of build keys held in memory
+    tempDir: the directory for temporary files; None = the system temporary directory
+  """
+
+  def __init__(self, buildRows, getKey, getValues, maxRows=MAX_ROWS, tempDir=None):
+    self.maxRows = maxRows
+    self.tempDir = tempDir
+    self.table = {}
+    self.sortedBuild = None
+    self.numValues = None
+    rows = iter(buildRows)
+    for row in rows:
+      values = tuple(getValues(row))
+      self.table[getKey(row)] = values
+      if self.numValues is None:
+        self.numValues = len(values)
+      if len(self.table) > maxRows:
+        self._spill(rows, getKey, getValues)
+        break
+
+  def _spill(self, rows, getKey, getValues):
+    # Sort the rows read so far and the rest of the build rows now, while the build file is open;
+    # the rows read so far are first so that the last row with a key is still the one used
+    buildRows = itertools.chain(([key, *values] for key, values in self.table.items()),
+                                ([getKey(row), *getValues(row)] for row in rows))
+    self.table = None
+    sortedRows = externalSort(buildRows, key=_KEY, maxRows=self.maxRows, tempDir=self.tempDir)
+    first = next(sortedRows, None)
+    self.sortedBuild = itertools.chain([first], sortedRows) if first is not None else iter(())
+
+  @property
+  def inMemory(self):
+    return self.table is not None
+
+  def _buildPairs(self):
+    # Yield (key, values) for each build key in sorted order
+    if self.table is not None:
+      yield from sorted(self.table.items(), key=_KEY)
+      return
+    for key, group in itertools.groupby(self.sortedBuild, key=_KEY):
+      for row in group:
+        pass
+      yield key, tuple(row[1:])
+
+  def sortedGroups(self, probeRows, getKey):
+    """Yield (key, values or None, list of probe rows) for each key of either side, in sorted key order."""
+    sortedProbes = externalSort(([getKey(row), *row] for row in probeRows), key=_KEY, maxRows=self.maxRows, tempDir=self.tempDir)
+    probeGroups = itertools.groupby(sortedProbes, key=_KEY)
+    buildPairs = self._buildPairs()
+    build = next(buildPairs, None)
+    probe = next(probeGroups, None)
+    while build is not None or probe is not None:
+      if probe is None or (build is not None and build[0] < probe[0]):
+        yield build[0], build[1], []
+        build = next(buildPairs, None)
+      elif build is None or probe[0] < build[0]:
+        yield probe[0], None, [row[1:] for row in probe[1]]
+        probe = next(probeGroups, None)
+      else:
+        yield build[0], build[1], [row[1:] for row in probe[1]]
+        build = next(buildPairs, None)
+        probe = next(probeGroups, None)
+
+  def joinInOrder(self, probeRows, getKey):
+    """Yield (probe row, values or None) for each probe row, in input order."""
+    if self.table is not None:
+      table = self.table
+      for row in probeRows:
+        yield row, table.get(getKey(row))
+      return
+    # Number the probe rows, join them in key order, then sort the joined rows back into input order;
+    # a joined row is [number, matched, *values, *probe row]
+    numValues = self.numValues
+    numberedRows = ([str(number), *row] for number, row in enumerate(probeRows))
+    def joinedRows():
+      for _, values, rows in self.sortedGroups(numberedRows, lambda row: getKey(row[1:])):
+        if values is not None:
+          for row in rows:
+            yield [row[0], '1', *values, *row[1:]]
+        else:
+          for row in rows:
+            yield [row[0], '', *['']*numValues, *row[1:]]
+    for row in externalSort(joinedRows(), key=lambda row: int(row[0]), maxRows=self.maxRows, tempDir=self.tempDir):
+      yield row[2+numValues:], tuple(row[2:2+numValues]) if row[1] else None
@@ -2,7 +2,7 @@
 """
 Purpose: Process a CSV file to combine data fields for unique key fields
 Customize: Change QUOTE_CHAR, DATA_DELIMITER, LINE_TERMINATOR as required/desired
-Define: KEYFIELD, DATAFIELD, SAVEFIELDS, MATCHFIELDS, SKIPFIELDS
+Define: KEYFIELD, DATAFIELD, SAVEFIELDS, MATCHFIELDS, SKIPFIELDS, INPUT_ORDER, EXTERNAL_SORT, MAX_ITEMS_PER_ROW
 Python: Use python or python3 below as appropriate to your system; verify that you have version 3
  $ python -V   or   python3 -V
  Python 3.x.y
@@ -32,9 +32,9 @@ SKIPFIELDS = {}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-47491913641,math,testuser9@domain.com testuser7@domain.com testuser8@domain.com
-56941282690,english,testuser5@domain.com testuser6@domain.com testuser4@domain.com
-57121690282,science,testuser2@domain.com testuser1@domain.com testuser3@domain.com
+47491913641,math,testuser7@domain.com testuser8@domain.com testuser9@domain.com
+56941282690,english,testuser4@domain.com testuser5@domain.com testuser6@domain.com
+57121690282,science,testuser1@domain.com testuser2@domain.com testuser3@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
 
 Process only english course
@@ -47,7 +47,7 @@ SKIPFIELDS = {}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-56941282690,english,testuser5@domain.com testuser6@domain.com testuser4@domain.com
+56941282690,english,testuser4@domain.com testuser5@domain.com testuser6@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
 
 Process all courses except english
@@ -60,14 +60,28 @@ SKIPFIELDS = {'name': re.compile(r'english')}
 $ python3 CSVKMD.py CourseStudent.csv CourseStudentCombined.csv
 $ more CourseStudentCombined.csv
 id,name,student
-47491913641,math,testuser8@domain.com testuser7@domain.com testuser9@domain.com
+47491913641,math,testuser7@domain.com testuser8@domain.com testuser9@domain.com
 57121690282,science,testuser1@domain.com testuser2@domain.com testuser3@domain.com
 $ gam csv CourseStudentCombined.csv gam courses "~id" add students users "~student"
+
+For large files, set INPUT_ORDER = GROUPED if the rows of each key are together, e.g., as gam print course-participants writes them;
+otherwise set EXTERNAL_SORT = True. Set MAX_ITEMS_PER_ROW to limit the length of the gam commands;
+a key with more data items is output in multiple rows.
+The data items of a key are output in the order in which they appear in the input.
+An output file is written as a temporary file in its directory that replaces it only if there are no errors,
+e.g., INPUT_ORDER = GROUPED and the rows of a key are not together; when the output is written to stdout,
+it is incomplete and must not be used if the exit status is non-zero.
 """
 
 import csv
+import itertools
+import operator
+import os
 import re
 import sys
+import tempfile
+
+from ExternalSort import externalSort
 
 QUOTE_CHAR = '"' # Adjust as needed to properly read CSV files
 DATA_DELIMITER = ' '# Delimiter between data field items
@@ -91,6 +105,20 @@ MATCHFIELDS = {}
 # SKIPFIELDS = {'name': re.compile(r'english')}
 SKIPFIELDS = {}
 
+# UNSORTED: the rows of a key can be anywhere in the input; all keys are kept in memory until the end, the keys are output sorted
+# GROUPED: the rows of each key are together; each key is output when its rows end, in input order,
+#   so only the data items of one key are kept in memory; the keys seen, not their data items, are kept to check
+#   that the rows of each key are together, so that memory grows with the number of keys
+UNSORTED = 'unsorted'
+GROUPED = 'grouped'
+INPUT_ORDER = UNSORTED
+# With INPUT_ORDER = UNSORTED, set EXTERNAL_SORT = True to sort the rows by key on disk, at most MAX_ROWS rows in memory
+# at once, rather than keeping all keys in memory, see ExternalSort.py; the keys are output sorted
+EXTERNAL_SORT = False
+MAX_ROWS = 1000000
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+# Maximum number of data items in an output row; a key with more data items is output in multiple rows. 0 = no limit
+MAX_ITEMS_PER_ROW = 0
 
 def fieldError(category, fieldName):
   sys.stderr.write(f'Error: {category}field "{fieldName}" not in file {sys.argv[1]} field names: {",".join(inputFieldNames)}\n')
@@ -104,7 +132,36 @@ def checkMatchSkipFields(row, matchFields, skipFields):
       return False
   return True
 
-data = {}
+def getRows(inputCSV):
+  # Yield [keyfield, datafield, save fields...] for the rows to be processed
+  for irow in inputCSV:
+    keyfield = irow[KEYFIELD]
+    datafield = irow[DATAFIELD]
+    if keyfield and datafield and checkMatchSkipFields(irow, MATCHFIELDS, SKIPFIELDS):
+      yield [keyfield, datafield, *[irow[field] for field in SAVEFIELDS]]
+
+def groupRows(rows, checkGrouped):
+  # Yield (keyfield, data items, save fields) for each run of rows with the same key; the save fields are from the last row
+  keysSeen = set()
+  for keyfield, group in itertools.groupby(rows, key=operator.itemgetter(0)):
+    if checkGrouped:
+      if keyfield in keysSeen:
+        sys.stderr.write(f'Error: INPUT_ORDER = GROUPED but the rows of {KEYFIELD} {keyfield} are not together\n')
+        sys.exit(1)
+      keysSeen.add(keyfield)
+    items = {}
+    for row in group:
+      items[row[1]] = None
+    yield keyfield, items, row[2:]
+
+def writeKey(keyfield, items, saveValues):
+  items = list(items)
+  step = MAX_ITEMS_PER_ROW if MAX_ITEMS_PER_ROW > 0 else len(items)
+  for i in range(0, len(items), step):
+    orow = {KEYFIELD: keyfield, DATAFIELD: DATA_DELIMITER.join(items[i:i+step])}
+    for field, value in zip(SAVEFIELDS, saveValues):
+      orow[field] = value
+    outputCSV.writerow(orow)
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
@@ -137,29 +194,40 @@ outputFieldNames = []
 for field in inputFieldNames:
   if field == KEYFIELD or field == DATAFIELD or field in SAVEFIELDS:
     outputFieldNames.append(field)
-for irow in inputCSV:
-  keyfield = irow[KEYFIELD]
-  datafield = irow[DATAFIELD]
-  if keyfield and datafield and checkMatchSkipFields(irow, MATCHFIELDS, SKIPFIELDS):
-    data.setdefault(keyfield, {DATAFIELD: set()})
-    data[keyfield][DATAFIELD].add(datafield)
-    for field in SAVEFIELDS:
-      data[keyfield][field] = irow[field]
-if inputFile != sys.stdin:
-  inputFile.close()
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', newline='')
+  # Keys are written as they are processed; an error, e.g., a key whose rows are not together, must not leave
+  # a partial file that looks like valid gam input
+  fd, tempFileName = tempfile.mkstemp(prefix='CSVKMD', suffix='.csv', dir=os.path.dirname(os.path.abspath(sys.argv[2])))
+  outputFile = open(fd, 'w', newline='')
 else:
   outputFile = sys.stdout
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for kp, kv in sorted(data.items()):
-  orow = {KEYFIELD: kp, DATAFIELD: DATA_DELIMITER.join(kv[DATAFIELD])}
-  for field in SAVEFIELDS:
-    orow[field] = kv[field]
-  outputCSV.writerow(orow)
-
-if outputFile != sys.stdout:
-  outputFile.close()
+completed = False
+try:
+  if INPUT_ORDER == GROUPED:
+    for kp, items, saveValues in groupRows(getRows(inputCSV), True):
+      writeKey(kp, items, saveValues)
+  elif EXTERNAL_SORT:
+    for kp, items, saveValues in groupRows(externalSort(getRows(inputCSV), key=operator.itemgetter(0), maxRows=MAX_ROWS, tempDir=TEMP_DIR), False):
+      writeKey(kp, items, saveValues)
+  else:
+    data = {}
+    for row in getRows(inputCSV):
+      kv = data.setdefault(row[0], [{}, None])
+      kv[0][row[1]] = None
+      kv[1] = row[2:]
+    for kp, kv in sorted(data.items()):
+      writeKey(kp, kv[0], kv[1])
+  completed = True
+finally:
+  if inputFile != sys.stdin:
+    inputFile.close()
+  if outputFile != sys.stdout:
+    outputFile.close()
+    if completed:
+      os.replace(tempFileName, sys.argv[2])
+    else:
+      os.remove(tempFileName)
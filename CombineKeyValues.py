@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Make a CSV file that merges all values for a given key.
-# Customize: Set KEY_FIELD and VALUE_FIELD
+# Customize: Set KEY_FIELD and VALUE_FIELD, INPUT_ORDER, EXTERNAL_SORT, MAX_ITEMS_PER_ROW
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -10,10 +10,23 @@
 # 2: Output an updated CSV file with columns KEY_FIELD and VALUE_FIELD containing a row per key
 #    with its merged (space separated) values
 #  $ python3 CombineKeyValues.py ./KeyValue.csv ./KeyMergedValues.csv
+#
+# For large files, set INPUT_ORDER = GROUPED if the rows of each key are together; otherwise set EXTERNAL_SORT = True.
+# Set MAX_ITEMS_PER_ROW to limit the length of gam commands that use the merged values;
+# a key with more values is output in multiple rows.
+# The output file is written as a temporary file in its directory that replaces it only if there are no errors,
+# e.g., INPUT_ORDER = GROUPED and the rows of a key are not together; when the output is written to stdout,
+# it is incomplete and must not be used if the exit status is non-zero.
 """
 
 import csv
+import itertools
+import operator
+import os
 import sys
+import tempfile
+
+from ExternalSort import externalSort
 
 # Name of input key field
 INPUT_KEY_FIELD = 'key'
@@ -27,28 +40,79 @@ OUTPUT_VALUE_FIELD = 'value'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-keyValues = {}
+# UNSORTED: the rows of a key can be anywhere in the input; all keys are kept in memory until the end, the keys are output sorted
+# GROUPED: the rows of each key are together; each key is output when its rows end, in input order,
+#   so only the values of one key are kept in memory; the keys seen, not their values, are kept to check
+#   that the rows of each key are together, so that memory grows with the number of keys
+UNSORTED = 'unsorted'
+GROUPED = 'grouped'
+INPUT_ORDER = UNSORTED
+# With INPUT_ORDER = UNSORTED, set EXTERNAL_SORT = True to sort the rows by key on disk, at most MAX_ROWS rows in memory
+# at once, rather than keeping all keys in memory, see ExternalSort.py; the keys are output sorted
+EXTERNAL_SORT = False
+MAX_ROWS = 1000000
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+# Maximum number of values in an output row; a key with more values is output in multiple rows. 0 = no limit
+MAX_ITEMS_PER_ROW = 0
+
+def getRows(inputCSV):
+  for row in inputCSV:
+    yield [row[INPUT_KEY_FIELD], row[INPUT_VALUE_FIELD]]
+
+def groupRows(rows, checkGrouped):
+  # Yield (key, values) for each run of rows with the same key
+  keysSeen = set()
+  for key, group in itertools.groupby(rows, key=operator.itemgetter(0)):
+    if checkGrouped:
+      if key in keysSeen:
+        sys.stderr.write(f'ERROR: INPUT_ORDER = GROUPED but the rows of {INPUT_KEY_FIELD} {key} are not together\n')
+        sys.exit(1)
+      keysSeen.add(key)
+    yield key, dict.fromkeys(row[1] for row in group)
+
+def writeKey(key, values):
+  values = list(values)
+  step = MAX_ITEMS_PER_ROW if MAX_ITEMS_PER_ROW > 0 else len(values)
+  for i in range(0, len(values), step):
+    outputCSV.writerow({OUTPUT_KEY_FIELD: key, OUTPUT_VALUE_FIELD: ' '.join(values[i:i+step])})
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  key = row[INPUT_KEY_FIELD]
-  keyValues.setdefault(key, set())
-  keyValues[key].add(row[INPUT_VALUE_FIELD])
+inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
+  # Keys are written as they are processed; an error, e.g., a key whose rows are not together, must not leave
+  # a partial file that looks like valid gam input
+  fd, tempFileName = tempfile.mkstemp(prefix='KeyMergedValues', suffix='.csv', dir=os.path.dirname(os.path.abspath(sys.argv[2])))
+  outputFile = open(fd, 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
 
 outputCSV = csv.DictWriter(outputFile, [OUTPUT_KEY_FIELD, OUTPUT_VALUE_FIELD], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for key, values in sorted(iter(keyValues.items())):
-  outputCSV.writerow({OUTPUT_KEY_FIELD: key, OUTPUT_VALUE_FIELD: ' '.join(values)})
-
-inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+completed = False
+try:
+  if INPUT_ORDER == GROUPED:
+    for key, values in groupRows(getRows(inputCSV), True):
+      writeKey(key, values)
+  elif EXTERNAL_SORT:
+    for key, values in groupRows(externalSort(getRows(inputCSV), key=operator.itemgetter(0), maxRows=MAX_ROWS, tempDir=TEMP_DIR), False):
+      writeKey(key, values)
+  else:
+    keyValues = {}
+    for key, value in getRows(inputCSV):
+      keyValues.setdefault(key, {})[value] = None
+    for key, values in sorted(keyValues.items()):
+      writeKey(key, values)
+  completed = True
+finally:
+  inputFile.close()
+  if outputFile != sys.stdout:
+    outputFile.close()
+    if completed:
+      os.replace(tempFileName, sys.argv[2])
+    else:
+      os.remove(tempFileName)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared memory-compact set of email addresses used by scripts that check ACLs against a large list of users,
+#          e.g., GetSharedWithListOfUsersDriveACLs.py
+#          The addresses are stored sorted and deduplicated in a length-prefixed byte blob with an array of offsets
+#          that is searched by bisection; a Bloom filter in front of it rejects most addresses that are not in the set
+#          without searching. The set is saved in a sidecar file next to the users CSV file, e.g., Users.csv.emailset,
+#          that later runs map into memory with mmap rather than reading the CSV file again.
+#          The sidecar file is rebuilt when the CSV file or the way the addresses are read from it changes.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  userSet = CompactEmailSet.fromFile('Users.csv', readUsers, USER_HEADERS)
+#  if emailAddress in userSet:
+#    ...
+#
+#  readUsers is called without arguments, only when the sidecar file is missing or out of date, and returns an iterable
+#  of the addresses in the CSV file; the third argument identifies how the addresses are read, e.g., the headers.
+#  If the sidecar file can't be written, the set is kept in memory.
+"""
+
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+SIDECAR_SUFFIX = '.emailset'
+BLOOM_BITS_PER_ADDRESS = 10 # About 1% false positives with BLOOM_HASHES = 7
+BLOOM_HASHES = 7
+
+_MAGIC = b'CESL' if sys.byteorder == 'little' else b'CESB' # The offsets are stored in native byte order
+# magic, count, blob bytes, Bloom filter bytes, Bloom filter hashes, source size, source mtime, signature
+_HEADER = struct.Struct('=4s4xQQQQQq32s')
+_LENGTH = struct.Struct('<H')
+
+def _hashes(address, bloomBits):
+  digest = hashlib.blake2b(address, digest_size=16).digest()
+  h1 = int.from_bytes(digest[:8], 'little')
+  h2 = int.from_bytes(digest[8:], 'little') | 1
+  return [(h1+i*h2) % bloomBits for i in range(BLOOM_HASHES)]
+
+class CompactEmailSet():
+  """A read-only set of email addresses; membership is tested with the in operator.
+
+  Args:
+    buffer: the contents of a sidecar file, bytes or an mmap
+  """
+
+  def __init__(self, buffer):
+    self.buffer = buffer
+    _, self.count, _, bloomSize, _, _, _, _ = _HEADER.unpack_from(buffer)
+    self.bloomStart = _HEADER.size
+    self.bloomBits = bloomSize*8
+    offsetsStart = self.bloomStart+bloomSize
+    self.offsets = memoryview(buffer)[offsetsStart:offsetsStart+self.count*8].cast('Q')
+    self.blobStart = offsetsStart+self.count*8
+
+  @staticmethod
+  def build(addresses, sourceSize=0, sourceMtime=0, signature=b''):
+    """Return the contents of a sidecar file for addresses, an iterable of str."""
+    encoded = sorted({address.encode('utf-8') for address in addresses if address})
+    bloomSize = max((len(encoded)*BLOOM_BITS_PER_ADDRESS+63)//64*8, 8)
+    bloom = bytearray(bloomSize)
+    offsets = array.array('Q')
+    blob = bytearray()
+    for address in encoded:
+      for bit in _hashes(address, bloomSize*8):
+        bloom[bit >> 3] |= 1 << (bit & 7)
+      offsets.append(len(blob))
+      blob += _LENGTH.pack(len(address))
+      blob += address
+    return b''.join([_HEADER.pack(_MAGIC, len(encoded), len(blob), bloomSize, BLOOM_HASHES, sourceSize, sourceMtime,
+                                  hashlib.sha256(signature).digest()),
+                     bloom, offsets.tobytes(), blob])
+
+  @classmethod
+  def fromFile(cls, fileName, readAddresses, signature=''):
+    """Return the set of addresses in fileName, loaded from its sidecar file; the sidecar file is built if necessary."""
+    signature = repr(signature).encode('utf-8')
+    stat = os.stat(fileName)
+    sidecarFileName = fileName+SIDECAR_SUFFIX
+    try:
+      with open(sidecarFileName, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) == _HEADER.size:
+          magic, _, _, _, bloomHashes, sourceSize, sourceMtime, sidecarSignature = _HEADER.unpack(header)
+          if (magic == _MAGIC and bloomHashes == BLOOM_HASHES and sourceSize == stat.st_size and sourceMtime == stat.st_mtime_ns and
+              sidecarSignature == hashlib.sha256(signature).digest()):
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(buffer)
+    except OSError:
+      pass
+    data = cls.build(readAddresses(), stat.st_size, stat.st_mtime_ns, signature)
+    # Write a temporary file and rename it so that an interrupted or concurrent run never leaves a partial sidecar file
+    try:
+      with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(sidecarFileName)),
+                                       prefix=os.path.basename(sidecarFileName), suffix='.tmp', delete=False) as f:
+        tempFileName = f.name
+        try:
+          f.write(data)
+        except OSError:
+          f.close()
+          os.remove(tempFileName)
+          raise
+      os.replace(tempFileName, sidecarFileName)
+    except OSError as e:
+      sys.stderr.write(f'Warning: {sidecarFileName}: {e}, not saved\n')
+    return cls(data)
+
+  def _mayContain(self, address):
+    buffer = self.buffer
+    bloomStart = self.bloomStart
+    for bit in _hashes(address, self.bloomBits):
+      if not buffer[bloomStart+(bit >> 3)] & (1 << (bit & 7)):
+        return False
+    return True
+
+  def _get(self, i):
+    offset = self.blobStart+self.offsets[i]
+    length = _LENGTH.unpack_from(self.buffer, offset)[0]
+    return self.buffer[offset+_LENGTH.size:offset+_LENGTH.size+length]
+
+  def __contains__(self, address):
+    if not address:
+      return False
+    address = address.encode('utf-8')
+    if not self._mayContain(address):
+      return False
+    buffer = self.buffer
+    offsets = self.offsets
+    blobStart = self.blobStart+_LENGTH.size
+    lo, hi = 0, self.count
+    while lo < hi:
+      mid = (lo+hi)//2
+      offset = blobStart+offsets[mid]
+      if buffer[offset:offset+buffer[offset-2]+(buffer[offset-1] << 8)] < address:
+        lo = mid+1
+      else:
+        hi = mid
+    return lo < self.count and self._get(lo) == address
+
+  def __len__(self):
+    return self.count
+
+  def __iter__(self):
+    for i in range(self.count):
+      yield self._get(i).decode('utf-8')
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a CSV file with JSON columns, produce a file with no header row (optional) and only JSON data.
-# Customize: Set INPUT_QUOTE_CHAR, OUTPUT_QUOTE_CHAR, LINE_TERMINATOR, MERGE_NON_JSON_DATA, NON_JSON_DATA_SKIP_FIELDS, MAKE_LIST, HEADER_ROW
+# Customize: Set INPUT_QUOTE_CHAR, OUTPUT_QUOTE_CHAR, LINE_TERMINATOR, MERGE_NON_JSON_DATA, NON_JSON_DATA_SKIP_FIELDS, MAKE_LIST, HEADER_ROW, COMPACT
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -9,12 +9,22 @@
 # 1: Produce a CSV file Input.csv
 # 2: Produce a JSON file Output.json
 #  $ python3 ./ConvertCSVtoJSON.py Input.csv Output.json
+#
+# Each row is written as soon as it is converted, so large files are converted in constant memory
+# and the output can be stdout. Install orjson, pip install orjson, for faster conversion.
 """
 
 import csv
 import json
+import math
+import re
 import sys
 
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
 INPUT_QUOTE_CHAR = "'" # Adjust as needed
 OUTPUT_QUOTE_CHAR = "'" # Adjust as desired; can be empty ""
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
@@ -36,6 +46,57 @@ HEADER_ROW = True # True - Header row JSON; False - no header row. Only applies
 #   JSON
 #   '{"key": "value", "key": "value"}'
 #   '{"key": "value", "key": "value"}'
+# When MAKE_LIST = False, HEADER_ROW = False, OUTPUT_QUOTE_CHAR = "": output is JSON Lines
+#   {"key": "value", "key": "value"}
+#   {"key": "value", "key": "value"}
+COMPACT = False # True - No spaces after , and : in the JSON, e.g., {"key":"value","key":"value"}; orjson is used if installed
+# With COMPACT = True and orjson installed, the text of numbers can differ from that written by json and between
+# orjson versions, e.g., 1.5e300 rather than 1.5e+300; the values are the same. Rows with NaN or Infinity values,
+# which orjson writes as null, are written by json
+
+# orjson decodes integers beyond 64 bits as floats; values with long digit strings are decoded by json
+LONG_DIGITS = re.compile(r'\d{19}')
+
+def loadJSON(value):
+  # Return the decoded value and True if json decoded it; only json decodes NaN and Infinity
+  if orjson is not None and not LONG_DIGITS.search(value):
+    try:
+      return orjson.loads(value), False
+    except orjson.JSONDecodeError:
+      pass # Let json decode it or report the error
+  return json.loads(value), True
+
+def isFinite(value):
+  # False if value is or contains a NaN or Infinity float
+  if isinstance(value, float):
+    return math.isfinite(value)
+  if isinstance(value, dict):
+    return all(isFinite(v) for v in value.values())
+  if isinstance(value, list):
+    return all(isFinite(v) for v in value)
+  return True
+
+def dumpJSON(jsonRow, decodedByJSON):
+  if COMPACT:
+    if orjson is not None and (not decodedByJSON or isFinite(jsonRow)):
+      try:
+        return orjson.dumps(jsonRow, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+      except orjson.JSONEncodeError:
+        pass
+    return json.dumps(jsonRow, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+  return json.dumps(jsonRow, ensure_ascii=False, sort_keys=True)
+
+def readJSONRows(inputCSV, plainFields, jsonFields):
+  for row in inputCSV:
+    jsonRow = {}
+    decodedByJSON = False
+    for k in plainFields:
+      jsonRow[k] = row[k]
+    for k in jsonFields:
+      value, byJSON = loadJSON(row[k])
+      jsonRow.update(value)
+      decodedByJSON = decodedByJSON or byJSON
+    yield jsonRow, decodedByJSON
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -53,26 +114,20 @@ for fieldName in inputCSV.fieldnames:
     jsonFields.append(fieldName)
   elif MERGE_NON_JSON_DATA and fieldName not in NON_JSON_DATA_SKIP_FIELDS:
     plainFields.append(fieldName)
-jsonRows = []
-for row in inputCSV:
-  jsonRow = {}
-  for k in plainFields:
-    jsonRow[k] = row[k]
-  for k in jsonFields:
-    jsonRow.update(json.loads(row[k]))
-  jsonRows.append(jsonRow)
+jsonRows = readJSONRows(inputCSV, plainFields, jsonFields)
 if MAKE_LIST:
-  outputFile.write('['+LINE_TERMINATOR)
-  lineTerminator = ','+LINE_TERMINATOR
-  for jsonRow in jsonRows:
-    outputFile.write('  '+json.dumps(jsonRow, ensure_ascii=False, sort_keys=True)+lineTerminator)
-  outputFile.seek(outputFile.tell()-(1+len(LINE_TERMINATOR)), 0)
+  # The separator is written before each row after the first, so the output is never rewound
+  outputFile.write('[')
+  separator = LINE_TERMINATOR
+  for jsonRow, decodedByJSON in jsonRows:
+    outputFile.write(separator+'  '+dumpJSON(jsonRow, decodedByJSON))
+    separator = ','+LINE_TERMINATOR
   outputFile.write(LINE_TERMINATOR+']'+LINE_TERMINATOR)
 else:
   if HEADER_ROW:
     outputFile.write('JSON'+LINE_TERMINATOR)
-  for jsonRow in jsonRows:
-    outputFile.write(OUTPUT_QUOTE_CHAR+json.dumps(jsonRow, ensure_ascii=False, sort_keys=True)+OUTPUT_QUOTE_CHAR+LINE_TERMINATOR)
+  for jsonRow, decodedByJSON in jsonRows:
+    outputFile.write(OUTPUT_QUOTE_CHAR+dumpJSON(jsonRow, decodedByJSON)+OUTPUT_QUOTE_CHAR+LINE_TERMINATOR)
 if inputFile != sys.stdin:
   inputFile.close()
 if outputFile != sys.stdout:
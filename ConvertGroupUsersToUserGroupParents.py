@@ -9,36 +9,19 @@
 # 1: Get group members; omit field role if you're not interested the user's role
 #  $ gam redirect csv ./GroupUsers.csv print group-members fields email,type,role
 # 2: From that list of group members, output a CSV file with headers primaryEmail,Group,Role,ParentsCount,Parents that shows the groups and their parents for each user
+#    Parents are all of the groups that Group is nested within, directly or indirectly, sorted
 #  $ python3 ConvertGroupUsersToUserGroupParents.py ./GroupUsers.csv ./UserGroupParents.csv
 """
 
 import csv
 import sys
 
+from GroupClosure import GroupClosure
+
 DELIMITER = ' '
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-def getGroupParents(groupEmail):
-  groupParents[groupEmail] = {'parents': []}
-  for parentGroup in GroupGroups[groupEmail]:
-    groupParents[groupEmail]['parents'].append(parentGroup)
-    if parentGroup not in groupParents:
-      getGroupParents(parentGroup)
-
-def printGroupParents(groupEmail, urow):
-  if groupParents[groupEmail]['parents']:
-    for parentEmail in groupParents[groupEmail]['parents']:
-      urow['parents'].append(parentEmail)
-      printGroupParents(parentEmail, urow)
-      del urow['parents'][-1]
-  else:
-    csvRow = {'primaryEmail': urow['primaryEmail'], 'Group': urow['Group'],
-              'ParentsCount': len(urow['parents']), 'Parents': DELIMITER.join(urow['parents'])}
-    if includeRole:
-      csvRow['Role'] = urow['Role']
-    outputCSV.writerow(csvRow)
-
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
@@ -58,30 +41,25 @@ else:
 outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-groupParents = {}
-GroupGroups = {}
+groupClosure = GroupClosure()
 UserGroups = {}
 for row in inputCSV:
   if row['type'] == 'USER':
-    GroupGroups.setdefault(row['group'], [])
     email = row['email'].lower()
     UserGroups.setdefault(email, {'role': None, 'groups': []})
     UserGroups[email]['groups'].append(row['group'].lower())
     if includeRole:
       UserGroups[email]['role'] = row['role']
   elif row['type'] == 'GROUP':
-    GroupGroups.setdefault(row['group'], [])
-    email = row['email'].lower()
-    GroupGroups.setdefault(email, [])
-    GroupGroups[email].append(row['group'].lower())
+    groupClosure.addMember(row['group'].lower(), row['email'].lower())
 
-for group in groupParents:
-  groupParents[group].sort()
 for user, info in sorted(iter(UserGroups.items())):
   for group in sorted(info['groups']):
-    if group not in groupParents:
-      getGroupParents(group)
-    printGroupParents(group, {'primaryEmail': user, 'Group': group, 'Role': info['role'], 'parents': []})
+    parents = [parentEmail for parentEmail in groupClosure.ancestors(group) if parentEmail != group]
+    csvRow = {'primaryEmail': user, 'Group': group, 'ParentsCount': len(parents), 'Parents': DELIMITER.join(parents)}
+    if includeRole:
+      csvRow['Role'] = info['role']
+    outputCSV.writerow(csvRow)
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -1,27 +1,112 @@
 #!/usr/bin/env python3
 """
 # Purpose: Count rows in a CSV file
-#
+# Customize: FAST_COUNT
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
 # Usage:
 # python3 CountCSVRows.py File.csv
 #
+# The count is the number of rows that csv.DictReader returns: the header and blank lines are not counted,
+# a quoted field with embedded newlines is part of one row.
 """
 
 import csv
+import mmap
+import multiprocessing
+import os
+import re
 import sys
 
 QUOTE_CHAR = '"' # Adjust as needed
 
+# FAST_COUNT = True counts the newlines that are not within quoted fields in large blocks of the file, in parallel, without parsing the fields;
+# quote characters within a field must be doubled and the field quoted, as GAM and csv.writer do.
+# The csv module is used for stdin, a QUOTE_CHAR that is not an ASCII character and files with \r line endings that are not \r\n
+FAST_COUNT = True
+BLOCK_SIZE = 16*1024*1024 # Bytes per block
+
+BLANK_LINE = re.compile(b'\n(?=\r?\n)')
+
+def csvCount(inputFile):
+  rows = 0
+  for _ in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+    rows += 1
+  return rows
+
+def countBlock(args):
+  # Return the number of quotes and, for the block starting outside and inside a quoted field,
+  # the number of record ending newlines and blank lines; whether a lone \r was seen; and whether a record follows the last newline
+  fileName, start, end, quote, isLast = args
+  with open(fileName, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    block = mm[start:end]
+  parts = block.split(quote)
+  counts = []
+  for outside in (parts[0::2], parts[1::2]):
+    newlines = 0
+    blanks = 0
+    for part in outside:
+      newlines += part.count(b'\n')
+      if b'\n\n' in part or b'\n\r\n' in part:
+        blanks += len(BLANK_LINE.findall(part))
+    counts.append((newlines, blanks))
+  # The block starts after a newline; a newline at its start, outside of a quoted field, ends a blank line
+  startsBlank = block.startswith(b'\n') or block.startswith(b'\r\n')
+  loneCR = block.count(b'\r') != block.count(b'\r\n')
+  trailingRecord = isLast and not block.endswith(b'\n')
+  return len(parts)-1, counts, startsBlank, loneCR, trailingRecord
+
+def fastCount(fileName):
+  # Return the number of rows, or None if the file must be read with the csv module
+  quote = QUOTE_CHAR.encode('utf-8')
+  if len(quote) != 1 or quote in b'\r\n':
+    return None
+  fileSize = os.path.getsize(fileName)
+  if fileSize == 0:
+    return 0
+  # Blocks end after a newline so that \r\n and blank lines are not split
+  starts = [0]
+  with open(fileName, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+    while starts[-1]+BLOCK_SIZE < fileSize:
+      newline = mm.find(b'\n', starts[-1]+BLOCK_SIZE)
+      if newline < 0:
+        break
+      starts.append(newline+1)
+  ends = starts[1:]+[fileSize]
+  blocks = [(fileName, start, end, quote, end == fileSize) for start, end in zip(starts, ends) if start < end]
+  processes = min(os.cpu_count() or 1, len(blocks))
+  if processes > 1 and 'fork' in multiprocessing.get_all_start_methods():
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+      results = pool.map(countBlock, blocks)
+  else:
+    results = map(countBlock, blocks)
+  records = 0
+  blankRecords = 0
+  firstBlank = None
+  inQuotes = False
+  for quotes, counts, startsBlank, loneCR, trailingRecord in results:
+    if loneCR:
+      return None
+    newlines, blanks = counts[inQuotes]
+    records += newlines+trailingRecord
+    blankRecords += blanks
+    if startsBlank and not inQuotes:
+      blankRecords += 1
+    if firstBlank is None:
+      firstBlank = startsBlank
+    inQuotes ^= quotes % 2 == 1
+  nonBlankRecords = records-blankRecords
+  # csv.DictReader takes the first line as the header even if it is blank
+  return max(nonBlankRecords-(0 if firstBlank else 1), 0)
+
+rows = None
 if sys.argv[1] != '-':
-  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+  if FAST_COUNT:
+    rows = fastCount(sys.argv[1])
+  if rows is None:
+    with open(sys.argv[1], 'r', encoding='utf-8') as inputFile:
+      rows = csvCount(inputFile)
 else:
-  inputFile = sys.stdin
-rows = 0
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  rows += 1
+  rows = csvCount(sys.stdin)
 print(rows)
-if inputFile != sys.stdin:
-  inputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Make a CSV file showing the number of messages from each unique from address
-# Customize: Set NUM_FROMS_TO_SHOW
+# Customize: Set NUM_FROMS_TO_SHOW, COUNT_MODE, SKETCH_ERROR
 # Python: Use python or python3 below as appropriate to your system; verify that you have version  3.9 or greater
 #  $ python -V   or python3 -V
 #  Python 3.x.y
@@ -12,9 +12,13 @@
 # 2: From that list of message Froms, output a CSV file with headers "From,Count" that shows the
 #    number of messages per from address sorted from most to least
 #  $ python3 CountFroms.py ./Froms.csv ./FromCounts.csv
+#    With COUNT_MODE = SKETCH, the headers are "From,Count,MaxOvercount"; Count may be higher than the actual number
+#    of messages by up to MaxOvercount, which is at most SKETCH_ERROR times the number of messages
 """
 
 import csv
+import heapq
+import math
 import re
 import sys
 
@@ -23,34 +27,80 @@ LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 NUM_FROMS_TO_SHOW = 0 # 0 - Show all froms; N - Show the first N froms
 
+# EXACT: count every from address; memory grows with the number of unique addresses
+# SKETCH: count the most frequent NUM_FROMS_TO_SHOW (required) addresses in fixed memory with the Space-Saving algorithm;
+#   at most max(NUM_FROMS_TO_SHOW, 1/SKETCH_ERROR) addresses are kept and any address that is sent more than
+#   SKETCH_ERROR times the number of messages is found
+EXACT = 'exact'
+SKETCH = 'sketch'
+COUNT_MODE = EXACT
+SKETCH_ERROR = 0.0001
+
+FROM_PATTERN = re.compile(r'^.+<(.+)>$')
+
+def getFromAddrs(inputCSV):
+  fromIndex = next(inputCSV).index('From')
+  for row in filter(None, inputCSV):
+    fromValue = row[fromIndex]
+    if '<' in fromValue:
+      fromMatch = FROM_PATTERN.match(fromValue)
+      if fromMatch:
+        fromValue = fromMatch.group(1)
+    yield fromValue.lower()
+
+def spaceSaving(fromAddrs, capacity):
+  # counts[fromAddr] = [count, overcount]; when all counters are in use, the address with the smallest count is replaced
+  # by the new address, which inherits its count. The heap holds one (count, fromAddr) entry per address;
+  # an entry whose count is out of date is updated when it reaches the top of the heap.
+  counts = {}
+  heap = []
+  for fromAddr in fromAddrs:
+    counter = counts.get(fromAddr)
+    if counter is not None:
+      counter[0] += 1
+    elif len(counts) < capacity:
+      counts[fromAddr] = [1, 0]
+      heapq.heappush(heap, (1, fromAddr))
+    else:
+      while True:
+        count, minAddr = heap[0]
+        if counts[minAddr][0] == count:
+          break
+        heapq.heapreplace(heap, (counts[minAddr][0], minAddr))
+      del counts[minAddr]
+      counts[fromAddr] = [count+1, count]
+      heapq.heapreplace(heap, (count+1, fromAddr))
+  return counts
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, ['From', 'Count'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+if COUNT_MODE == SKETCH and NUM_FROMS_TO_SHOW <= 0:
+  sys.stderr.write('ERROR: COUNT_MODE = SKETCH requires NUM_FROMS_TO_SHOW > 0\n')
+  sys.exit(1)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['From', 'Count'] if COUNT_MODE == EXACT else ['From', 'Count', 'MaxOvercount'])
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-fromPattern = re.compile(r'^.+<(.+)>$')
-fromCounts = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  fromMatch = fromPattern.match(row['From'])
-  if not fromMatch:
-    fromAddr = row['From'].lower()
+fromAddrs = getFromAddrs(csv.reader(inputFile, quotechar=QUOTE_CHAR))
+if COUNT_MODE == EXACT:
+  fromCounts = {}
+  for fromAddr in fromAddrs:
+    fromCounts[fromAddr] = fromCounts.get(fromAddr, 0)+1
+  if NUM_FROMS_TO_SHOW > 0:
+    topFroms = heapq.nlargest(NUM_FROMS_TO_SHOW, fromCounts.items(), key=lambda item: item[1])
   else:
-    fromAddr = fromMatch.group(1).lower()
-  fromCounts.setdefault(fromAddr, 0)
-  fromCounts[fromAddr] += 1
-fromsShown = 0
-for fromAddr, count in sorted(fromCounts.items(), key=lambda item: item[1], reverse=True):
-  outputCSV.writerow({'From': fromAddr, 'Count': count})
-  fromsShown += 1
-  if fromsShown == NUM_FROMS_TO_SHOW:
-    break
+    topFroms = sorted(fromCounts.items(), key=lambda item: item[1], reverse=True)
+  outputCSV.writerows(topFroms)
+else:
+  fromCounts = spaceSaving(fromAddrs, max(NUM_FROMS_TO_SHOW, math.ceil(1/SKETCH_ERROR)))
+  for fromAddr, (count, overcount) in heapq.nlargest(NUM_FROMS_TO_SHOW, fromCounts.items(), key=lambda item: item[1][0]):
+    outputCSV.writerow([fromAddr, count, overcount])
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -1,77 +1,250 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a Google Drive User(s), delete all duplicate drive files
+# Customize: DUPLICATE_MATCH, DUPLICATE_DETECTION, MAX_FILES_IN_MEMORY
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
 # Usage:
 # 1: Get information for all files, if you don't want all users, replace all users with your user selection in the command below
 #    These fields are required: fields id,title,createddate,mimetype fullpath
+#    With DUPLICATE_MATCH = CHECKSUM, these fields are required: fields id,title,createddate,mimetype,md5checksum,size
 #    You can add additional fields that will be preserved in the output.
 #    You can add a select option if you want to only process files in a specific folder
 #    If you don't want to delete folders, add showmimetype not gfolder
 #  $ gam redirect csv ./UserFiles.csv multiprocess all users print filelist fields id,title,createddate,mimetype,owners.emailaddress fullpath
 #  $ gam redirect csv ./UserFiles.csv user user@domain.com print filelist fields id,title,createddate,mimetype,owners.emailaddress fullpath
 #                               select drivefilename "Folder Name" showmimetype not gfolder
+#  $ gam redirect csv ./UserFiles.csv multiprocess all users print filelist fields id,title,createddate,mimetype,owners.emailaddress,md5checksum,size
+#    fullpath makes GAM get the parents of every file, which is slow for many files; instead, the paths can be built
+#    from the parents of the files in the list, see DrivePathResolver.py; the input file can't be stdin
+#  $ gam redirect csv ./UserFiles.csv multiprocess all users print filelist fields id,title,createddate,mimetype,owners.emailaddress,parents
 # 2: From that list of files, output a CSV file with the same headers as the input CSV file
 #    that lists the drive file Ids that have the same owner, title, mimeType and paths with a createdDate older than the most recent createdDate
+#    With DUPLICATE_MATCH = CHECKSUM, the drive file Ids that have the same md5Checksum and size, regardless of owner, title and paths,
+#    with a createdDate older than the most recent createdDate are listed; files without an md5Checksum, e.g., Google Docs, are never duplicates.
+#    Optionally, output a CSV file with headers Owner,Files,Bytes that shows the number and total size of the duplicate files of each owner,
+#    i.e., the space that would be reclaimed by deleting them; this requires the size field.
 #  $ python3 DeleteDuplicateFiles.py ./UserFiles.csv ./DuplicateFiles.csv
+#  $ python3 DeleteDuplicateFiles.py ./UserFiles.csv ./DuplicateFiles.csv ./ReclaimableBytes.csv
 # 3: Inspect DuplicateFiles.csv, verify that it makes sense and then proceed
 # 4: Delete the duplicate files
 #  $ gam redirect stdout ./DeleteDuplicateFiles.log multiprocess redirect stderr stdout csv ./DuplicateFiles.csv gam user "~Owner" delete drivefile "~id"
 """
 
 import csv
+import os
 import sys
+import tempfile
+
+from DrivePathResolver import DrivePathResolver, hasParentColumns
 
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 CREATED_DATE = 'createdTime'
 ALT_CREATED_DATE = 'createdDate'
+FILE_SIZE = 'size'
+ALT_FILE_SIZE = 'fileSize'
+MD5_CHECKSUM = 'md5Checksum'
+
+# What makes files duplicates
+# NAME_PATHS: the same owner, title, mimeType and paths
+# CHECKSUM: the same md5Checksum and size; the input file is read twice, first to find the sizes shared by more than one file,
+#   then to compare the checksums of those files only. DUPLICATE_DETECTION = HASH is always used.
+NAME_PATHS = 'namepaths'
+CHECKSUM = 'checksum'
+DUPLICATE_MATCH = NAME_PATHS
+
+# How duplicates are found
+# SORT: all of the files are read into memory and sorted
+# HASH: the files are grouped by owner, title, mimeType and paths in one pass, keeping only the newest file of each group in memory;
+#   once MAX_FILES_IN_MEMORY groups are in memory, the remaining files are written to PARTITIONS temporary files that are processed one at a time
+SORT = 'sort'
+HASH = 'hash'
+DUPLICATE_DETECTION = SORT
+
+MAX_FILES_IN_MEMORY = 1000000 # With DUPLICATE_DETECTION = HASH, reduce to use less memory
+PARTITIONS = 64 # With DUPLICATE_DETECTION = HASH, number of temporary files used when MAX_FILES_IN_MEMORY is exceeded
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+def getPathResolver(fieldnames):
+  if 'paths' in fieldnames or not hasParentColumns(fieldnames):
+    return None
+  if inputFile == sys.stdin:
+    sys.stderr.write('ERROR: Resolving paths from parents reads the input file twice, it can not be stdin\n')
+    sys.exit(1)
+  return DrivePathResolver.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
+
 def rowPaths(crow):
+  if pathResolver:
+    return set(pathResolver.paths(crow['id']))
   paths = set()
   for i in range(0, int(crow['paths'])):
     paths.add(crow[f'path.{i}'])
   return paths
 
+def namePathsKey(row):
+  if pathResolver:
+    paths = frozenset(pathResolver.paths(row[idIndex]))
+  else:
+    paths = frozenset(row[pathIndexes[i]] for i in range(int(row[pathsIndex] or 0)))
+  return (row[ownerIndex], row[titleIndex], row[mimeTypeIndex], paths)
+
+def checksumKey(row):
+  return (row[sizeIndex], row[md5ChecksumIndex])
+
+def reportDuplicate(owner, size):
+  ownerBytes = reclaimableBytes.setdefault(owner, [0, 0])
+  ownerBytes[0] += 1
+  ownerBytes[1] += int(size or 0)
+
+def writeDuplicate(row):
+  outputCSV.writerow(row)
+  if reclaimableBytes is not None:
+    reportDuplicate(row[ownerIndex], row[sizeIndex])
+
+def findDuplicates(row, newestFiles):
+  # newestFiles[key] = [createdDate, rows with that createdDate]; older files are output as soon as a newer one is seen
+  key = fileKey(row)
+  createdDate = row[createdDateIndex]
+  newest = newestFiles.get(key)
+  if newest is None:
+    newestFiles[key] = [createdDate, [row]]
+  elif createdDate > newest[0]:
+    for newestRow in newest[1]:
+      writeDuplicate(newestRow)
+    newestFiles[key] = [createdDate, [row]]
+  elif createdDate < newest[0]:
+    writeDuplicate(row)
+  else:
+    newest[1].append(row)
+
+def spillPartitions(rows, newestFiles):
+  # Write the files kept so far and the rest of the files to partitions by key; files with the same key are in the same partition
+  partitionFiles = []
+  try:
+    for _ in range(PARTITIONS):
+      fd, fileName = tempfile.mkstemp(prefix='dupfiles', suffix='.csv', dir=TEMP_DIR)
+      partitionFiles.append((fileName, open(fd, 'w', encoding='utf-8', newline='')))
+    partitionCSVs = [csv.writer(f, lineterminator='\n') for _, f in partitionFiles]
+    for key, newest in newestFiles.items():
+      partitionCSVs[hash(key) % PARTITIONS].writerows(newest[1])
+    newestFiles.clear()
+    for row in rows:
+      partitionCSVs[hash(fileKey(row)) % PARTITIONS].writerow(row)
+    for _, f in partitionFiles:
+      f.close()
+    for fileName, _ in partitionFiles:
+      with open(fileName, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+          findDuplicates(row, newestFiles)
+      newestFiles.clear()
+  finally:
+    for fileName, f in partitionFiles:
+      f.close()
+      os.remove(fileName)
+
+def getSharedSizes(fileName):
+  # Return the sizes of the files with checksums that are shared by more than one file; only these files can be duplicates
+  sizeCounts = {}
+  with open(fileName, 'r', encoding='utf-8') as f:
+    inputCSV = csv.reader(f, quotechar=QUOTE_CHAR)
+    next(inputCSV, None)
+    for row in filter(None, inputCSV):
+      if row[md5ChecksumIndex]:
+        size = row[sizeIndex]
+        sizeCounts[size] = sizeCounts.get(size, 0)+1
+  return {size for size, count in sizeCounts.items() if count > 1}
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+elif DUPLICATE_MATCH == CHECKSUM:
+  sys.stderr.write('ERROR: DUPLICATE_MATCH = CHECKSUM reads the input file twice, it can not be stdin\n')
+  sys.exit(1)
 else:
   inputFile = sys.stdin
+reclaimableBytes = {} if len(sys.argv) > 3 else None
 
-prevOwner = None
-prevTitle = None
-prevMimeType = None
-prevCreatedDate = None
-prevPaths = None
-
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-rows = sorted(inputCSV, key=lambda k: k.get(CREATED_DATE, k.get(ALT_CREATED_DATE)), reverse=True)
-for row in sorted(rows, key=lambda k: (k['owners.0.emailAddress'], k.get(FILE_NAME, k.get(ALT_FILE_NAME)), k['mimeType'], k['paths'])):
-  if ((row['owners.0.emailAddress'] == prevOwner)
-      and (row.get(FILE_NAME, row.get(ALT_FILE_NAME)) == prevTitle)
-      and (row['mimeType'] == prevMimeType)
-      and (row.get(CREATED_DATE, row.get(ALT_CREATED_DATE)) < prevCreatedDate)
-      and (rowPaths(row) == prevPaths)):
-    outputCSV.writerow(row)
+if DUPLICATE_DETECTION == HASH or DUPLICATE_MATCH == CHECKSUM:
+  inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+  fieldnames = next(inputCSV)
+  outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+  outputCSV.writerow(fieldnames)
+  ownerIndex = fieldnames.index('owners.0.emailAddress')
+  createdDateIndex = fieldnames.index(CREATED_DATE if CREATED_DATE in fieldnames else ALT_CREATED_DATE)
+  if FILE_SIZE in fieldnames or ALT_FILE_SIZE in fieldnames:
+    sizeIndex = fieldnames.index(FILE_SIZE if FILE_SIZE in fieldnames else ALT_FILE_SIZE)
+  elif reclaimableBytes is not None or DUPLICATE_MATCH == CHECKSUM:
+    sys.stderr.write(f'ERROR: Field {FILE_SIZE} or {ALT_FILE_SIZE} is required\n')
+    sys.exit(1)
+  rows = filter(None, inputCSV)
+  if DUPLICATE_MATCH == CHECKSUM:
+    md5ChecksumIndex = fieldnames.index(MD5_CHECKSUM)
+    fileKey = checksumKey
+    sharedSizes = getSharedSizes(sys.argv[1])
+    rows = (row for row in rows if row[md5ChecksumIndex] and row[sizeIndex] in sharedSizes)
   else:
-    prevOwner = row['owners.0.emailAddress']
-    prevTitle = row.get(FILE_NAME, row.get(ALT_FILE_NAME))
-    prevMimeType = row['mimeType']
-    prevCreatedDate = row.get(CREATED_DATE, row.get(ALT_CREATED_DATE))
-    prevPaths = rowPaths(row)
+    titleIndex = fieldnames.index(FILE_NAME if FILE_NAME in fieldnames else ALT_FILE_NAME)
+    mimeTypeIndex = fieldnames.index('mimeType')
+    pathResolver = getPathResolver(fieldnames)
+    if pathResolver:
+      idIndex = fieldnames.index('id')
+    else:
+      pathsIndex = fieldnames.index('paths')
+    pathIndexes = {int(fieldname[5:]): i for i, fieldname in enumerate(fieldnames) if fieldname.startswith('path.') and fieldname[5:].isdigit()}
+    fileKey = namePathsKey
+  newestFiles = {}
+  for row in rows:
+    findDuplicates(row, newestFiles)
+    if len(newestFiles) >= MAX_FILES_IN_MEMORY:
+      spillPartitions(rows, newestFiles)
+      break
+else:
+  prevOwner = None
+  prevTitle = None
+  prevMimeType = None
+  prevCreatedDate = None
+  prevPaths = None
+
+  inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+  outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+  outputCSV.writeheader()
+  pathResolver = getPathResolver(inputCSV.fieldnames)
+  if reclaimableBytes is not None and FILE_SIZE not in inputCSV.fieldnames and ALT_FILE_SIZE not in inputCSV.fieldnames:
+    sys.stderr.write(f'ERROR: Field {FILE_SIZE} or {ALT_FILE_SIZE} is required\n')
+    sys.exit(1)
+
+  rows = sorted(inputCSV, key=lambda k: k.get(CREATED_DATE, k.get(ALT_CREATED_DATE)), reverse=True)
+  for row in sorted(rows, key=lambda k: (k['owners.0.emailAddress'], k.get(FILE_NAME, k.get(ALT_FILE_NAME)), k['mimeType'], k['paths'] if not pathResolver else sorted(rowPaths(k)))):
+    if ((row['owners.0.emailAddress'] == prevOwner)
+        and (row.get(FILE_NAME, row.get(ALT_FILE_NAME)) == prevTitle)
+        and (row['mimeType'] == prevMimeType)
+        and (row.get(CREATED_DATE, row.get(ALT_CREATED_DATE)) < prevCreatedDate)
+        and (rowPaths(row) == prevPaths)):
+      outputCSV.writerow(row)
+      if reclaimableBytes is not None:
+        reportDuplicate(row['owners.0.emailAddress'], row.get(FILE_SIZE, row.get(ALT_FILE_SIZE)))
+    else:
+      prevOwner = row['owners.0.emailAddress']
+      prevTitle = row.get(FILE_NAME, row.get(ALT_FILE_NAME))
+      prevMimeType = row['mimeType']
+      prevCreatedDate = row.get(CREATED_DATE, row.get(ALT_CREATED_DATE))
+      prevPaths = rowPaths(row)
 if inputFile != sys.stdin:
   inputFile.close()
 if outputFile != sys.stdout:
   outputFile.close()
+
+if reclaimableBytes is not None:
+  with open(sys.argv[3], 'w', encoding='utf-8', newline='') as reportFile:
+    reportCSV = csv.writer(reportFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+    reportCSV.writerow(['Owner', 'Files', 'Bytes'])
+    for owner, (files, size) in sorted(reclaimableBytes.items(), key=lambda item: (-item[1][1], item[0])):
+      reportCSV.writerow([owner, files, size])
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a CSV file, delete the duplcate rows based an a field. You can optionally delete unwanted fields.
-# Customize: Set ID_FIELD, DELETE_FIELDS, LINE_TERMINATOR
+# Customize: Set ID_FIELD, ID_FIELDS, DELETE_FIELDS, OUTPUT_ORDER, LINE_TERMINATOR
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -12,14 +12,75 @@
 """
 
 import csv
+import hashlib
+import operator
+import os
+import sqlite3
 import sys
+import tempfile
+
+from ExternalSort import externalSort
 
 ID_FIELD = 'id' # Field name to use for duplicate checking
+ID_FIELDS = [] # Multiple fields to use for duplicate checking, e.g., ['Owner', 'id']; if set, ID_FIELD is not used
 DELETE_FIELDS = [] # Fields to delete; Single field ['Field',]; multiple fields ['Field1', 'Field2', ...]
 
+# SORTED: the rows are output sorted by the duplicate checking fields; the sort uses at most MAX_ROWS rows of memory, see ExternalSort.py
+# INPUT: the first row with each value is output as it is read, in input order; only a 64-bit hash of each value is kept,
+#   in memory for the first MAX_KEYS_IN_MEMORY values, then in a temporary database on disk
+SORTED = 'sorted'
+INPUT = 'input'
+OUTPUT_ORDER = SORTED
+
+MAX_ROWS = 1000000 # With OUTPUT_ORDER = SORTED, rows sorted in memory at once; reduce to use less memory
+MAX_KEYS_IN_MEMORY = 10000000 # With OUTPUT_ORDER = INPUT, values kept in memory before moving to disk
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+class SeenKeys():
+  """The 64-bit hashes of the values seen; a set in memory until it has MAX_KEYS_IN_MEMORY members, then an SQLite table."""
+
+  def __init__(self):
+    self.digests = set()
+    self.db = None
+    self.dbFileName = None
+
+  def add(self, key):
+    """Add key, a str; return True if it was not seen before."""
+    digest = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+    if self.db is None:
+      if digest in self.digests:
+        return False
+      self.digests.add(digest)
+      if len(self.digests) >= MAX_KEYS_IN_MEMORY:
+        self._moveToDisk()
+      return True
+    return self.db.execute('INSERT OR IGNORE INTO seen VALUES (?)', (digest,)).rowcount == 1
+
+  def _moveToDisk(self):
+    fd, self.dbFileName = tempfile.mkstemp(prefix='dupkeys', suffix='.db', dir=TEMP_DIR)
+    os.close(fd)
+    self.db = sqlite3.connect(self.dbFileName)
+    self.db.execute('PRAGMA journal_mode = OFF')
+    self.db.execute('PRAGMA synchronous = OFF')
+    self.db.execute('CREATE TABLE seen (digest INTEGER PRIMARY KEY) WITHOUT ROWID')
+    self.db.executemany('INSERT INTO seen VALUES (?)', ((digest,) for digest in sorted(self.digests)))
+    self.digests = set()
+
+  def close(self):
+    if self.db is not None:
+      self.db.close()
+      os.remove(self.dbFileName)
+
+def readRows(inputCSV, numFields):
+  # Pad short rows as csv.DictReader does
+  for row in filter(None, inputCSV):
+    if len(row) < numFields:
+      row.extend(['']*(numFields-len(row)))
+    yield row
+
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -29,24 +90,32 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-outputFieldnames = inputCSV.fieldnames[:]
-deleteFieldnames = []
-for field in DELETE_FIELDS:
-  if field in outputFieldnames:
-    outputFieldnames.remove(field)
-    deleteFieldnames.append(field)
-outputCSV = csv.DictWriter(outputFile, outputFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-previousId = None
-for row in sorted(inputCSV, key=lambda row: (row[ID_FIELD]), reverse=False):
-  currentId = row[ID_FIELD]
-  if currentId != previousId:
-    for field in deleteFieldnames:
-      row.pop(field, None)
-    outputCSV.writerow(row)
-    previousId = currentId
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+inputFieldnames = next(inputCSV)
+outputIndexes = [i for i, field in enumerate(inputFieldnames) if field not in DELETE_FIELDS]
+getOutputFields = operator.itemgetter(*outputIndexes) if len(outputIndexes) > 1 else lambda row: [row[i] for i in outputIndexes]
+keyIndexes = [inputFieldnames.index(field) for field in (ID_FIELDS or [ID_FIELD])]
+getKey = operator.itemgetter(*keyIndexes)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(getOutputFields(inputFieldnames))
+
+rows = readRows(inputCSV, len(inputFieldnames))
+if OUTPUT_ORDER == INPUT:
+  seenKeys = SeenKeys()
+  try:
+    for row in rows:
+      key = getKey(row)
+      if seenKeys.add(key if len(keyIndexes) == 1 else '\x00'.join(key)):
+        outputCSV.writerow(getOutputFields(row))
+  finally:
+    seenKeys.close()
+else:
+  previousKey = None
+  for row in externalSort(rows, key=getKey, maxRows=MAX_ROWS, tempDir=TEMP_DIR):
+    currentKey = getKey(row)
+    if currentKey != previousKey:
+      outputCSV.writerow(getOutputFields(row))
+      previousKey = currentKey
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Compare two lists of Drive file ACLs, e.g., from last week and today, and output a CSV file with headers
+#          "change,Owner,driveFileId,driveFileTitle,mimeType,permissionId,oldRole,role,type,emailAddress,domain,allowFileDiscovery"
+#          change is added, removed or roleChanged; for removed ACLs, the other columns are from the old list.
+#          The permissions are decoded as in GetSharedFilePermissions.py.
+#          Both lists are sorted by (driveFileId, permissionId) with a bounded-memory external sort and then compared in a single pass,
+#          so the lists can be much larger than memory; adjust MAX_ROWS to control the memory used.
+#          A file that appears more than once in a list, e.g., it is shared with several of the users, is compared once.
+# Customize: INCLUDE_OWNER_PERMISSIONS, MAX_ROWS, TEMP_DIR
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Get ACLs for all files, if you don't want all users, replace all users with your user selection in the command below
+#    Do this at two points in time, e.g., weekly; use the same command each time
+#  $ gam config auto_batch_min 1 redirect csv ./filelistperms.csv multiprocess all users print filelist fields id,name,permissions,owners.emailaddress,mimetype
+# 2: From the two lists of ACLs, output a CSV file that lists the changed ACLs
+#  $ python3 DiffDriveACLSnapshots.py oldfilelistperms.csv newfilelistperms.csv aclchanges.csv
+"""
+
+import csv
+import operator
+import sys
+
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+from ExternalSort import externalSort
+
+FILE_NAME = 'name'
+ALT_FILE_NAME = 'title'
+
+# Should permissions with role owner be compared; ownership changes then appear as role changes or removed/added ACLs
+INCLUDE_OWNER_PERMISSIONS = False
+
+MAX_ROWS = 1000000 # ACLs sorted in memory at a time; reduce to use less memory
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+
+QUOTE_CHAR = '"' # Adjust as needed
+LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
+
+# Columns of the sorted ACL records
+FILE_ID, PERMISSION_ID, ROLE, TYPE, EMAIL_ADDRESS, DOMAIN, ALLOW_FILE_DISCOVERY, OWNER, FILE_TITLE, MIME_TYPE = range(10)
+ACL_KEY = operator.itemgetter(FILE_ID, PERMISSION_ID)
+
+def readACLs(fileName):
+  """Yield an ACL record for each permission in fileName."""
+  with open(fileName, 'r', encoding='utf-8') as inputFile:
+    inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink'],
+                                      quotechar=QUOTE_CHAR)
+    getOwner = inputCSV.getter('owners.0.emailAddress', default='')
+    getFileId = inputCSV.getter('id')
+    getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+    getMimeType = inputCSV.getter('mimeType', default='')
+    for row in inputCSV:
+      for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink in inputCSV.permissions(row):
+        if role == 'owner' and not INCLUDE_OWNER_PERMISSIONS:
+          continue
+        if v in ['user', 'group']:
+          allowFileDiscovery = ''
+          emailAddress = (emailAddress or '').lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+        elif v == 'domain':
+          allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+          emailAddress = ''
+          domain = (domain or '').lower()
+        else: #anyone
+          allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+          emailAddress = ''
+          domain = ''
+        yield (getFileId(row), permissionId, role, v, emailAddress, domain, allowFileDiscovery,
+               getOwner(row), getFileTitle(row), getMimeType(row))
+
+def sortedACLs(fileName):
+  """Yield the ACL records of fileName sorted by (fileId, permissionId), skipping duplicates."""
+  lastKey = None
+  for acl in externalSort(readACLs(fileName), key=ACL_KEY, maxRows=MAX_ROWS, tempDir=TEMP_DIR):
+    key = ACL_KEY(acl)
+    if key != lastKey:
+      lastKey = key
+      yield acl
+
+def writeChange(change, acl, oldRole=''):
+  outputCSV.writerow([change, acl[OWNER], acl[FILE_ID], acl[FILE_TITLE], acl[MIME_TYPE], f'id:{acl[PERMISSION_ID]}',
+                      oldRole, acl[ROLE], acl[TYPE], acl[EMAIL_ADDRESS], acl[DOMAIN], acl[ALLOW_FILE_DISCOVERY]])
+
+if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
+  outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
+else:
+  outputFile = sys.stdout
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['change', 'Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                    'permissionId', 'oldRole', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery'])
+
+counts = {'added': 0, 'removed': 0, 'roleChanged': 0}
+oldACLs = sortedACLs(sys.argv[1])
+newACLs = sortedACLs(sys.argv[2])
+oldACL = next(oldACLs, None)
+newACL = next(newACLs, None)
+while oldACL is not None or newACL is not None:
+  if newACL is None or (oldACL is not None and ACL_KEY(oldACL) < ACL_KEY(newACL)):
+    writeChange('removed', oldACL)
+    counts['removed'] += 1
+    oldACL = next(oldACLs, None)
+  elif oldACL is None or ACL_KEY(newACL) < ACL_KEY(oldACL):
+    writeChange('added', newACL)
+    counts['added'] += 1
+    newACL = next(newACLs, None)
+  else:
+    if oldACL[ROLE] != newACL[ROLE]:
+      writeChange('roleChanged', newACL, oldACL[ROLE])
+      counts['roleChanged'] += 1
+    oldACL = next(oldACLs, None)
+    newACL = next(newACLs, None)
+
+if outputFile != sys.stdout:
+  outputFile.close()
+sys.stderr.write(f'ACLs added: {counts["added"]}, removed: {counts["removed"]}, role changed: {counts["roleChanged"]}\n')
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared domain classifier used by the scripts with DOMAIN_LIST, DOMAIN_EXPRESSIONS and EXCLUSIVE_DOMAINS settings,
+#          e.g., GetNonDomainDriveACLs.py, GetSharedExternallyDriveACLs.py
+#          DOMAIN_LIST is compiled into a set and a trie of reversed domain labels (com -> domain -> sub) so that subdomains
+#          can be matched with one lookup per label; DOMAIN_EXPRESSIONS are combined into a single regular expression.
+#          Each distinct domain is classified once; the results are kept in a bounded cache.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  domainClassifier = DomainClassifier(DOMAIN_LIST, DOMAIN_EXPRESSIONS, EXCLUSIVE_DOMAINS, INCLUDE_SUBDOMAINS)
+#  if domainClassifier.checkDomain(domain):
+#    ...
+"""
+
+import functools
+import re
+
+CACHE_SIZE = 65536 # Number of domains whose results are cached
+
+_END = '' # Marks the end of a domain in the trie; domain labels are never empty
+
+# A numbered or named back reference would refer to the wrong group once the expressions are combined
+_BACK_REFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+# A global inline flag, e.g., (?i), is only allowed at the start of the combined expression
+_INLINE_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
+def _combineExpressions(domainExpressions):
+  """Return a list of regular expressions equivalent to domainExpressions; a single expression when they can be combined."""
+  expressions = [re.compile(regex) if isinstance(regex, str) else regex for regex in domainExpressions]
+  if len(expressions) <= 1:
+    return expressions
+  flags = {regex.flags for regex in expressions}
+  if (len(flags) > 1 or any(not isinstance(regex.pattern, str) or _BACK_REFERENCE.search(regex.pattern) or _INLINE_FLAGS.match(regex.pattern)
+                             for regex in expressions)):
+    return expressions
+  flags = flags.pop()
+  # A # comment in a verbose expression would hide the ) that closes it
+  if flags & re.VERBOSE:
+    return expressions
+  # Any other expression that can't be combined is used as is
+  try:
+    return [re.compile('|'.join(f'(?:{regex.pattern})' for regex in expressions), flags)]
+  except re.error:
+    return expressions
+
+class DomainClassifier():
+  """Classify domains against a list of domains and a list of regular expressions.
+
+  Args:
+    domainList: the domains, e.g., DOMAIN_LIST
+    domainExpressions: regular expressions, compiled or not, that are searched for in a domain, e.g., DOMAIN_EXPRESSIONS
+    exclusive: True = isSelected/checkDomain select the domains not in domainList/domainExpressions, e.g., EXCLUSIVE_DOMAINS
+    includeSubdomains: True = a subdomain of a domain in domainList, e.g., sub.domain.com, is in domainList
+    cacheSize: the number of domains whose results are cached
+  """
+
+  def __init__(self, domainList, domainExpressions=None, exclusive=False, includeSubdomains=False, cacheSize=CACHE_SIZE):
+    self.domainList = domainList
+    self.domainSet = frozenset(domainList)
+    self.domainExpressions = domainExpressions or []
+    self.expressions = _combineExpressions(self.domainExpressions)
+    self.exclusive = exclusive
+    self.includeSubdomains = includeSubdomains
+    self.trie = {}
+    for domain in self.domainSet:
+      node = self.trie
+      for label in reversed(domain.split('.')):
+        node = node.setdefault(label, {})
+      node[_END] = True
+    self.inDomains = functools.lru_cache(maxsize=cacheSize)(self._inDomains)
+    self.isSelected = functools.lru_cache(maxsize=cacheSize)(self._isSelected)
+    self.checkDomain = functools.lru_cache(maxsize=cacheSize)(self._checkDomain)
+
+  def _inList(self, domain):
+    """Return True if domain, or with includeSubdomains one of its parent domains, is in domainList."""
+    if domain in self.domainSet:
+      return True
+    if not self.includeSubdomains:
+      return False
+    node = self.trie
+    for label in reversed(domain.split('.')):
+      node = node.get(label)
+      if node is None:
+        return False
+      if _END in node:
+        return True
+    return False
+
+  def _matchesExpression(self, domain):
+    for regex in self.expressions:
+      if regex.search(domain):
+        return True
+    return False
+
+  def _inDomains(self, domain):
+    """Return True if domain is in domainList or matches one of domainExpressions."""
+    return self._inList(domain) or self._matchesExpression(domain)
+
+  def _isSelected(self, domain):
+    """Return True if domain is in domainList/domainExpressions and exclusive is False or vice versa."""
+    return self._inDomains(domain) != self.exclusive
+
+  def _checkDomain(self, d):
+    """Return True if domain d is selected by the rules of checkDomain in GetNonDomainDriveACLs.py.
+
+    Unlike isSelected, an empty domainList and domainExpressions select every domain when exclusive is False.
+    """
+    if self.exclusive:
+      if self.domainList and self._inList(d):
+        return False
+      if self._matchesExpression(d):
+        return False
+    else:
+      if self.domainList and not self._inList(d):
+        return False
+      if self.expressions:
+        return self._matchesExpression(d)
+    return not self.exclusive
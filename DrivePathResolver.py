@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared resolver that builds the paths of drive files from the id, name and parents.N.id columns of a
+#          gam print filelist CSV file, e.g., for GetFilePermissionsWithPaths.py, GetPermissionsByPath.py, SelectiveDelete.py
+#          and DeleteDuplicateFiles.py, so that the file list can be made without fullpath/filepath,
+#          which make GAM do extra API calls per file.
+#          The folder tree is kept in memory; the paths of each folder are computed once, without recursion,
+#          and reused for all of the files and folders in it. A folder that is directly or indirectly its own parent
+#          doesn't cause a loop; no path goes through a folder twice.
+#          A parent with parents.N.isRoot True, or id root, is My Drive; a parent that is not in the file is not resolved,
+#          so folders owned by others should be included in the file list, e.g., with showownedby any.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  if 'paths' not in fieldnames and hasParentColumns(fieldnames):
+#    pathResolver = DrivePathResolver.fromFile('UserFiles.csv', quotechar=QUOTE_CHAR)
+#  pathResolver.paths(fileId)   # ['My Drive/Folder/File', ...] as path.0, path.1, ... of fullpath
+#
+#  fromFile reads the file once to build the tree; the script then reads it again, so the file can't be stdin.
+"""
+
+import csv
+import re
+import sys
+
+ROOT_NAME = 'My Drive'
+ROOT_ID = 'root'
+FILE_NAME = 'name'
+ALT_FILE_NAME = 'title'
+
+PARENTS_N_ID = re.compile(r"parents.(\d+).id$")
+
+def hasParentColumns(fieldnames):
+  """Return True if fieldnames include the columns needed to resolve paths."""
+  return 'id' in fieldnames and (FILE_NAME in fieldnames or ALT_FILE_NAME in fieldnames) and any(PARENTS_N_ID.match(fieldname) for fieldname in fieldnames)
+
+class DrivePathResolver():
+  """The folder tree of a file list; paths() returns the paths of a file or folder."""
+
+  def __init__(self, rootName=ROOT_NAME):
+    self.rootName = rootName
+    self.names = {} # id -> name
+    self.parents = {} # id -> tuple of parent ids
+    self.rootIds = {ROOT_ID}
+    self.folderIds = set() # The ids that are a parent of another item; only their paths are kept
+    self._paths = {}
+
+  def addFile(self, fileId, name, parentIds, rootIds=()):
+    """Add a file or folder; rootIds are those of parentIds that are My Drive."""
+    self.names[fileId] = name
+    self.parents[fileId] = tuple(parentIds)
+    self.folderIds.update(parentIds)
+    self.rootIds.update(rootIds)
+    self._paths.clear()
+
+  @classmethod
+  def fromFile(cls, fileName, rootName=ROOT_NAME, **kwargs):
+    """Return the resolver for the files in the CSV file fileName; kwargs are passed to csv.reader, e.g., quotechar=QUOTE_CHAR."""
+    resolver = cls(rootName)
+    with open(fileName, 'r', encoding='utf-8', newline='') as f:
+      inputCSV = csv.reader(f, **kwargs)
+      fieldnames = next(inputCSV, [])
+      if not hasParentColumns(fieldnames):
+        sys.stderr.write(f'ERROR: {fileName}: Fields id, {FILE_NAME} or {ALT_FILE_NAME}, and parents are required to resolve paths\n')
+        sys.exit(1)
+      idIndex = fieldnames.index('id')
+      nameIndex = fieldnames.index(FILE_NAME if FILE_NAME in fieldnames else ALT_FILE_NAME)
+      parentIndexes = []
+      for i, fieldname in enumerate(fieldnames):
+        mg = PARENTS_N_ID.match(fieldname)
+        if mg:
+          isRootField = f'parents.{mg.group(1)}.isRoot'
+          parentIndexes.append((i, fieldnames.index(isRootField) if isRootField in fieldnames else None))
+      for row in filter(None, inputCSV):
+        parentIds = []
+        rootIds = []
+        for i, isRootIndex in parentIndexes:
+          parentId = row[i]
+          if parentId:
+            parentIds.append(parentId)
+            if isRootIndex is not None and row[isRootIndex] == 'True':
+              rootIds.append(parentId)
+        resolver.addFile(row[idIndex], row[nameIndex], parentIds, rootIds)
+    return resolver
+
+  def paths(self, fileId):
+    """Return a list of the paths of fileId; a file with no parents in the file list, other than My Drive, has no paths."""
+    memo = self._paths
+    if fileId in memo:
+      return list(memo[fileId])
+    if fileId not in self.names:
+      return []
+    # Resolve the parents before their children with an explicit stack of the items being resolved; a parent that is
+    # already on the stack is a cycle, it is skipped. Paths that skipped a cycle depend on where
+    # the resolution started, so they are used for this call only.
+    partial = {}
+    onPath = {fileId}
+    stack = [fileId]
+    while stack:
+      itemId = stack[-1]
+      unresolved = next((parentId for parentId in self.parents[itemId]
+                         if parentId not in memo and parentId not in partial and parentId not in onPath
+                         and parentId not in self.rootIds and parentId in self.names), None)
+      if unresolved is not None:
+        onPath.add(unresolved)
+        stack.append(unresolved)
+        continue
+      stack.pop()
+      onPath.discard(itemId)
+      name = self.names[itemId]
+      itemPaths = []
+      isPartial = False
+      for parentId in self.parents[itemId]:
+        if parentId in self.rootIds:
+          itemPaths.append(f'{self.rootName}/{name}')
+        elif parentId in memo:
+          itemPaths.extend(f'{path}/{name}' for path in memo[parentId])
+        elif parentId in partial:
+          itemPaths.extend(f'{path}/{name}' for path in partial[parentId])
+          isPartial = True
+        elif parentId in onPath:
+          isPartial = True
+      if isPartial:
+        partial[itemId] = itemPaths
+      elif itemId in self.folderIds:
+        memo[itemId] = tuple(itemPaths)
+      else:
+        partial[itemId] = itemPaths
+    return list(memo[fileId]) if fileId in memo else partial[fileId]
+
+  def maxPaths(self):
+    """Return the largest number of paths of any file or folder, i.e., the number of path.N columns."""
+    return max((len(self.paths(fileId)) for fileId in self.names), default=0)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared CSV reader used by the Drive ACL scripts, e.g., GetNonDomainDriveACLs.py, GetSharedWithAnyoneDriveACLs.py
+#          The header of a gam print filelist/print drivefileacls/print teamdrives CSV file is parsed once into a table
+#          permissions.N -> {field: column index}; each row's permissions are then returned as tuples of field values
+#          so the scripts don't have to match every column name against a regular expression on every row.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it and ShardedCSVReader.py in the same directory as the scripts that import it.
+#
+#  inputCSV = DrivePermissionsReader(inputFile, ['role', 'id', 'emailAddress'], quotechar=QUOTE_CHAR)
+#  getOwner = inputCSV.getter('owners.0.emailAddress')
+#  for row in inputCSV:
+#    for v, role, permissionId, emailAddress in inputCSV.permissions(row):
+#      ...
+#
+#  To parse the file with multiple processes, see ShardedCSVReader.py:
+#  inputCSV = DrivePermissionsReader(inputFile, ['role', 'id', 'emailAddress'], quotechar=QUOTE_CHAR, parallel=True)
+"""
+
+import csv
+import operator
+import re
+
+from ShardedCSVReader import ShardedCSVReader
+
+PERMISSIONS_N_FIELD = re.compile(r"permissions.(\d+).(.+)")
+
+_REQUIRED = object()
+
+def getAllowFileDiscovery(allowFileDiscovery, withLink):
+  """Return allowFileDiscovery; fall back to the inverse of withLink when the allowFileDiscovery column is not present."""
+  if allowFileDiscovery is not None:
+    return allowFileDiscovery
+  return str(withLink == 'False')
+
+def _makePermissionGetter(indexes):
+  if None not in indexes:
+    if len(indexes) > 1:
+      return operator.itemgetter(*indexes)
+    index = indexes[0]
+    return lambda row: (row[index],)
+  return lambda row: tuple([row[i] if i is not None else None for i in indexes])
+
+class DrivePermissionsReader():
+  """Iterate over the rows of a CSV file as lists; look up permission and general columns by precomputed index.
+
+  Args:
+    f: the file to read
+    fields: the permission fields, e.g., ['role', 'id', 'emailAddress'], that permissions() returns after the type;
+            a field whose column is not present for a permission is returned as None
+    typeField: the permission field that determines whether a permission is present
+    parallel: True = parse the file with a ShardedCSVReader
+    ordered: False = the rows can be returned out of order, see ShardedCSVReader
+    kwargs: passed to csv.reader, e.g., quotechar=QUOTE_CHAR
+  """
+
+  def __init__(self, f, fields=None, typeField='type', parallel=False, ordered=True, **kwargs):
+    if parallel:
+      self.reader = ShardedCSVReader(f, ordered=ordered, **kwargs)
+      self.fieldnames = self.reader.fieldnames
+    else:
+      self.reader = csv.reader(f, **kwargs)
+      self.fieldnames = next(self.reader, [])
+    self.columns = {}
+    self.fieldIndexes = {}
+    typeColumns = []
+    for i, fieldname in enumerate(self.fieldnames):
+      self.columns.setdefault(fieldname, i)
+      mg = PERMISSIONS_N_FIELD.match(fieldname)
+      if mg:
+        permissions_N, field = mg.groups()
+        self.fieldIndexes.setdefault(permissions_N, {})[field] = i
+        if field == typeField:
+          typeColumns.append(permissions_N)
+    fields = [typeField]+list(fields or [])
+    self.permissionsNs = typeColumns
+    self._permissionGetters = [_makePermissionGetter([self.fieldIndexes[permissions_N].get(field) for field in fields])
+                               for permissions_N in typeColumns]
+
+  def __iter__(self):
+    # csv.DictReader skips blank lines, do the same
+    return filter(None, self.reader)
+
+  def getter(self, *names, default=_REQUIRED):
+    """Return a function that gets the value of the first of names that is a column in the file.
+
+    If none of the names are columns, the function returns default;
+    if no default was specified, the function raises KeyError just as row[name] would.
+    """
+    for name in names:
+      if name in self.columns:
+        return operator.itemgetter(self.columns[name])
+    if default is _REQUIRED:
+      def missing(_):
+        raise KeyError(names[0])
+      return missing
+    return lambda _: default
+
+  def hasPermissionField(self, field):
+    """Return True if any permissions.N.field column is in the file."""
+    return any(field in self.fieldIndexes[permissions_N] for permissions_N in self.permissionsNs)
+
+  def permissions(self, row):
+    """Yield (type, field, ...) for each permission in row whose type is not blank."""
+    for getter in self._permissionGetters:
+      permission = getter(row)
+      if permission[0]:
+        yield permission
+
+  def numberedPermissions(self, row):
+    """Yield (N, (type, field, ...)) for each permission in row whose type is not blank."""
+    for permissions_N, getter in zip(self.permissionsNs, self._permissionGetters):
+      permission = getter(row)
+      if permission[0]:
+        yield permissions_N, permission
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared bounded-memory sort used by scripts that process CSV files too large to sort in memory,
+#          e.g., DiffDriveACLSnapshots.py
+#          Rows are sorted in runs of at most MAX_ROWS rows; each run is written to a temporary CSV file
+#          and the runs are merged, at most MERGE_WIDTH files at a time, as the sorted rows are read.
+#          If all of the rows fit in one run, no temporary files are written.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  for row in externalSort(rows, key=operator.itemgetter(0, 1)):
+#    ...
+#
+#  rows is an iterable of lists/tuples of strings, e.g., a csv.reader; they are returned as lists.
+#  Temporary files are written to tempDir, by default the system temporary directory, and removed when the sort is complete.
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import tempfile
+
+MAX_ROWS = 1000000 # Rows sorted in memory per run; reduce to use less memory
+MERGE_WIDTH = 64 # Maximum number of runs merged at once
+
+def _writeRun(rows, tempDir):
+  fd, fileName = tempfile.mkstemp(prefix='sort', suffix='.csv', dir=tempDir)
+  with open(fd, 'w', encoding='utf-8', newline='') as f:
+    csv.writer(f, lineterminator='\n').writerows(rows)
+  return fileName
+
+def _readRun(fileName):
+  with open(fileName, 'r', encoding='utf-8', newline='') as f:
+    yield from csv.reader(f)
+
+def _mergeRuns(fileNames, key, reverse):
+  return heapq.merge(*[_readRun(fileName) for fileName in fileNames], key=key, reverse=reverse)
+
+def externalSort(rows, key=None, reverse=False, maxRows=MAX_ROWS, mergeWidth=MERGE_WIDTH, tempDir=None):
+  """Yield rows sorted by key; the sort is stable. The rows are yielded as lists, whether or not they were written to disk.
+
+  Args:
+    rows: an iterable of lists/tuples of strings
+    key: as for sorted()
+    reverse: as for sorted()
+    maxRows: the maximum number of rows held in memory while sorting a run
+    mergeWidth: the maximum number of temporary files that are open at once while merging
+    tempDir: the directory for the temporary files; None = the system temporary directory
+  """
+  mergeWidth = max(mergeWidth, 2)
+  runs = []
+  try:
+    rows = iter(rows)
+    while True:
+      chunk = list(itertools.islice(rows, maxRows))
+      if not runs and len(chunk) < maxRows:
+        # Everything fits in memory
+        chunk.sort(key=key, reverse=reverse)
+        for row in chunk:
+          yield row if isinstance(row, list) else list(row)
+        return
+      if not chunk:
+        break
+      chunk.sort(key=key, reverse=reverse)
+      runs.append(_writeRun(chunk, tempDir))
+      del chunk
+      # Merge the oldest runs so that no more than mergeWidth are merged at the end; heapq.merge is stable
+      # when the runs are passed in the order they were written, so merged runs replace the runs they came from
+      if len(runs) >= 2*mergeWidth:
+        merged = _writeRun(_mergeRuns(runs[:mergeWidth], key, reverse), tempDir)
+        for fileName in runs[:mergeWidth]:
+          os.remove(fileName)
+        runs[:mergeWidth] = [merged]
+    while len(runs) > mergeWidth:
+      merged = _writeRun(_mergeRuns(runs[:mergeWidth], key, reverse), tempDir)
+      for fileName in runs[:mergeWidth]:
+        os.remove(fileName)
+      runs[:mergeWidth] = [merged]
+    yield from _mergeRuns(runs, key, reverse)
+  finally:
+    for fileName in runs:
+      try:
+        os.remove(fileName)
+      except OSError:
+        pass
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Create a CSV file showing email addresses that appear in all CSV files generated by separate gam report commands
+# Customize: MODE, MIN_FILES, PRESORTED
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -11,33 +12,143 @@
 #  $ gam redirect csv ./last_interaction_time.csv report users filter "gmail:last_interaction_time<2016-01-01T00:00:00.000Z" parameters gmail:last_interaction_time
 # 2: From that list of files, output a CSV file with the header email that shows the email addresses that appear in all files
 #  $ python3 FindCommonEmails.py ./CommonEmails.csv ./num_emails_sent.csv ./creation_time.csv ./last_interaction_time.csv
+#    Set MODE to show the email addresses that appear in any file, that appear in the first file but not in the others,
+#    or that appear in at least MIN_FILES files; an address that appears more than once in a file is counted once
 """
 
 import csv
+import heapq
+import itertools
+import os
 import sys
+import tempfile
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+# INTERSECTION: addresses in all of the files
+# UNION: addresses in any of the files
+# DIFFERENCE: addresses in the first file and none of the others
+# AT_LEAST: addresses in at least MIN_FILES of the files
+INTERSECTION = 'intersection'
+UNION = 'union'
+DIFFERENCE = 'difference'
+AT_LEAST = 'atleast'
+MODE = INTERSECTION
+MIN_FILES = 2
+
+# Set PRESORTED = True if the email column of each file is sorted in Python (code point) order, the order of LC_ALL=C sort;
+# the files are then merged without keeping the addresses in memory. A locale-aware sort, e.g., plain sort, uses
+# a different order that is rejected. If email is the only column, sort a file keeping its header with:
+#  $ (head -n 1 ./File.csv; tail -n +2 ./File.csv | LC_ALL=C sort) > ./SortedFile.csv
+# Running this script with MODE = UNION on a single file also writes its addresses sorted in this order.
+# The output file is written as a temporary file in its directory that replaces it only if there are no errors,
+# e.g., a file that is not sorted; when the output is written to stdout, it is incomplete if the exit status is non-zero
+PRESORTED = False
+
+def readEmails(fileName):
+  with open(fileName, 'r', encoding='utf-8') as inputFile:
+    for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      yield row['email']
+
+def readSortedEmails(fileName, fileNum):
+  # Yield (email, fileNum) for each distinct address in fileName, checking that they are sorted
+  previousEmail = None
+  for email in readEmails(fileName):
+    if previousEmail is not None and email <= previousEmail:
+      if email == previousEmail:
+        continue
+      sys.stderr.write(f'ERROR: PRESORTED = True but {fileName} is not sorted by email: {email} follows {previousEmail}\n')
+      sys.exit(1)
+    previousEmail = email
+    yield email, fileNum
+
+def isSelected(fileNums):
+  # fileNums is the set of numbers of the files that contain an address
+  if MODE == INTERSECTION:
+    return len(fileNums) == numFiles
+  if MODE == UNION:
+    return True
+  if MODE == DIFFERENCE:
+    return fileNums == {0}
+  return len(fileNums) >= MIN_FILES
+
+def mergeSortedFiles(fileNames):
+  merged = heapq.merge(*[readSortedEmails(fileName, fileNum) for fileNum, fileName in enumerate(fileNames)])
+  for email, group in itertools.groupby(merged, key=lambda item: item[0]):
+    if isSelected({fileNum for _, fileNum in group}):
+      yield email
+
+def intersectFiles(fileNames):
+  # Start with the addresses of the smallest file; each file can only narrow them
+  fileNames = sorted(fileNames, key=os.path.getsize)
+  candidates = set(readEmails(fileNames[0]))
+  for fileName in fileNames[1:]:
+    if not candidates:
+      break
+    candidates = {email for email in readEmails(fileName) if email in candidates}
+  return candidates
+
+def subtractFiles(fileNames):
+  candidates = set(readEmails(fileNames[0]))
+  for fileName in fileNames[1:]:
+    if not candidates:
+      break
+    candidates.difference_update(readEmails(fileName))
+  return candidates
+
+def countFiles(fileNames):
+  # counts[email] = [number of files, number of the last file]; an address first seen when fewer than MIN_FILES files remain can't be selected
+  counts = {}
+  for fileNum, fileName in enumerate(fileNames):
+    canAdd = len(fileNames)-fileNum >= MIN_FILES
+    for email in readEmails(fileName):
+      count = counts.get(email)
+      if count is None:
+        if canAdd:
+          counts[email] = [1, fileNum]
+      elif count[1] != fileNum:
+        count[0] += 1
+        count[1] = fileNum
+  return {email for email, (count, _) in counts.items() if count >= MIN_FILES}
+
+fileNames = sys.argv[2:]
+numFiles = len(fileNames)
+if MODE not in {INTERSECTION, UNION, DIFFERENCE, AT_LEAST}:
+  sys.stderr.write(f'ERROR: MODE {MODE} is not one of {INTERSECTION}, {UNION}, {DIFFERENCE}, {AT_LEAST}\n')
+  sys.exit(1)
+
 if sys.argv[1] != '-':
-  outputFile = open(sys.argv[1], 'w', encoding='utf-8', newline='')
+  # With PRESORTED = True, addresses are written as the files are merged; a file that is not sorted must not leave
+  # a partial list of addresses
+  fd, tempFileName = tempfile.mkstemp(prefix='CommonEmails', suffix='.csv', dir=os.path.dirname(os.path.abspath(sys.argv[1])))
+  outputFile = open(fd, 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, ['email',], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-users = {}
-allFilesCount = len(sys.argv)-2
-for i in range(2, len(sys.argv)):
-  inputFile = open(sys.argv[i], 'r', encoding='utf-8')
-  for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-    email = row['email']
-    users.setdefault(email, 0)
-    users[email] += 1
-  inputFile.close()
-for user, count in sorted(iter(users.items())):
-  if count == allFilesCount:
-    outputCSV.writerow({'email': user})
-
-if outputFile != sys.stdout:
-  outputFile.close()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['email'])
+
+completed = False
+try:
+  if not fileNames:
+    emails = []
+  elif PRESORTED:
+    emails = mergeSortedFiles(fileNames)
+  elif MODE == INTERSECTION:
+    emails = sorted(intersectFiles(fileNames))
+  elif MODE == DIFFERENCE:
+    emails = sorted(subtractFiles(fileNames))
+  elif MODE == UNION:
+    emails = sorted(set().union(*[readEmails(fileName) for fileName in fileNames]))
+  else:
+    emails = sorted(countFiles(fileNames))
+  for email in emails:
+    outputCSV.writerow([email])
+  completed = True
+finally:
+  if outputFile != sys.stdout:
+    outputFile.close()
+    if completed:
+      os.replace(tempFileName, sys.argv[1])
+    else:
+      os.remove(tempFileName)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a Google Drive User(s), output a CSV file showing the number of files created by day by mimeType
-# Customize: Set REVERSE
+# Customize: Set REVERSE, BUCKET
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -11,52 +11,137 @@
 # 2: From that list of ACLs, output a CSV file with headers:
 #      Owner,createdTime,mimeType
 #  $ python3 GetDailyMimeTypeCreations.py filelist.csv mimetypecreations.csv
+#    To count by week, month or year rather than by day, set BUCKET or add it as the third argument
+#  $ python3 GetDailyMimeTypeCreations.py filelist.csv mimetypecreations.csv month
+# If NumPy is installed, it is used to count; otherwise the counting is done in Python with the same results
 """
 
+import array
+import collections
 import csv
+import datetime
 import sys
 
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
 # Set REVERSE = True for createdTime newest to oldest
 # Set REVERSE = False for createdTime oldest to newest
 REVERSE = True
+# The period counted in each row; the createdTime column shows
+# DAY: the date, YYYY-MM-DD
+# WEEK: the ISO week, YYYY-Www
+# MONTH: the month, YYYY-MM
+# YEAR: the year, YYYY
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+YEAR = 'year'
+BUCKET = DAY
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
+def getBucket(createdDate):
+  if BUCKET == WEEK:
+    year, week, _ = datetime.date.fromisoformat(createdDate).isocalendar()
+    return f'{year}-W{week:02d}'
+  if BUCKET == MONTH:
+    return createdDate[:7]
+  if BUCKET == YEAR:
+    return createdDate[:4]
+  return createdDate
+
+def getCode(codes, value):
+  code = codes.get(value)
+  if code is None:
+    code = codes[value] = len(codes)
+  return code
+
+def getSortedCodes(codes, reverse=False):
+  # Return a mapping from each code to its position when the values are sorted
+  ranks = array.array('L', bytes(len(codes)*array.array('L').itemsize))
+  for rank, code in enumerate(code for _, code in sorted(codes.items(), reverse=reverse)):
+    ranks[code] = rank
+  return ranks
+
+def countCreations(ownerCodes, dayCodes, mimeTypeCodes, numMimeTypes):
+  # Return {(ownerCode, dayCode): [count per mimeType code]}
+  if numpy is not None and ownerCodes:
+    owners = numpy.frombuffer(ownerCodes, dtype=numpy.uint32).astype(numpy.int64)
+    days = numpy.frombuffer(dayCodes, dtype=numpy.uint32).astype(numpy.int64)
+    mimeTypes = numpy.frombuffer(mimeTypeCodes, dtype=numpy.uint32).astype(numpy.int64)
+    numDays = int(days.max())+1
+    # One output row per distinct (owner, day); bincount counts the mimeTypes of all of the rows at once
+    ownerDays, rowIndexes = numpy.unique(owners*numDays+days, return_inverse=True)
+    counts = numpy.bincount(rowIndexes.ravel()*numMimeTypes+mimeTypes, minlength=len(ownerDays)*numMimeTypes)
+    counts = counts.reshape(len(ownerDays), numMimeTypes)
+    return {divmod(int(ownerDay), numDays): counts[i].tolist() for i, ownerDay in enumerate(ownerDays)}
+  rows = {}
+  for (ownerCode, dayCode, mimeTypeCode), count in collections.Counter(zip(ownerCodes, dayCodes, mimeTypeCodes)).items():
+    row = rows.get((ownerCode, dayCode))
+    if row is None:
+      row = rows[(ownerCode, dayCode)] = [0]*numMimeTypes
+    row[mimeTypeCode] = count
+  return rows
+
+if len(sys.argv) > 3:
+  BUCKET = sys.argv[3].lower()
+if BUCKET not in {DAY, WEEK, MONTH, YEAR}:
+  sys.stderr.write(f'ERROR: Bucket {BUCKET} is not one of {DAY}, {WEEK}, {MONTH}, {YEAR}\n')
+  sys.exit(1)
+
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-userDailyMimeTypeCounts = {}
-mimeTypesSet = set()
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  owner = row['Owner']
-  createdDate, createdTime = row['createdTime'].split('T')
-  mimeType = row['mimeType']
-  mimeTypesSet.add(mimeType)
-  userDailyMimeTypeCounts.setdefault(owner, {})
-  userDailyMimeTypeCounts[owner].setdefault(createdDate, {})
-  userDailyMimeTypeCounts[owner][createdDate].setdefault(mimeType, 0)
-  userDailyMimeTypeCounts[owner][createdDate][mimeType] += 1
+# Owners, dates and mimeTypes are stored as integer codes, one of each per file
+owners = {}
+dates = {}
+mimeTypes = {}
+ownerCodes = array.array('I')
+dateCodes = array.array('I')
+mimeTypeCodes = array.array('I')
+inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+fieldnames = next(inputCSV)
+ownerIndex = fieldnames.index('Owner')
+createdTimeIndex = fieldnames.index('createdTime')
+mimeTypeIndex = fieldnames.index('mimeType')
+for row in filter(None, inputCSV):
+  ownerCodes.append(getCode(owners, row[ownerIndex]))
+  dateCodes.append(getCode(dates, row[createdTimeIndex].split('T')[0]))
+  mimeTypeCodes.append(getCode(mimeTypes, row[mimeTypeIndex]))
+
+# Map the date codes to bucket codes; each distinct date is converted once
+buckets = {}
+dateBuckets = [0]*len(dates)
+for createdDate, dateCode in dates.items():
+  dateBuckets[dateCode] = getCode(buckets, getBucket(createdDate))
+if BUCKET != DAY:
+  dateCodes = array.array('I', map(dateBuckets.__getitem__, dateCodes))
+else:
+  buckets = dates
+
+counts = countCreations(ownerCodes, dateCodes, mimeTypeCodes, len(mimeTypes))
+del ownerCodes, dateCodes, mimeTypeCodes
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-outputFieldNames = ['Owner', 'createdTime']
-outputFieldNames.extend(sorted(mimeTypesSet))
-outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
-
-for owner, createdTimes in sorted(userDailyMimeTypeCounts.items()):
-  for createdTime, mimeTypes in sorted(createdTimes.items(), reverse=REVERSE):
-    row = {'Owner': owner, 'createdTime': createdTime}
-    for mimeType, count in sorted(mimeTypes.items()):
-      row[mimeType] = count
-    for mimeType in mimeTypesSet:
-      if mimeType not in row:
-        row[mimeType] = 0
-    outputCSV.writerow(row)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+sortedMimeTypes = sorted(mimeTypes.items())
+outputCSV.writerow(['Owner', 'createdTime']+[mimeType for mimeType, _ in sortedMimeTypes])
+mimeTypeOrder = [code for _, code in sortedMimeTypes]
+ownerNames = list(owners)
+bucketNames = list(buckets)
+ownerRanks = getSortedCodes(owners)
+bucketRanks = getSortedCodes(buckets, REVERSE)
+for ownerCode, bucketCode in sorted(counts, key=lambda key: (ownerRanks[key[0]], bucketRanks[key[1]])):
+  row = counts[(ownerCode, bucketCode)]
+  outputCSV.writerow([ownerNames[ownerCode], bucketNames[bucketCode]]+[row[code] for code in mimeTypeOrder])
 
 if inputFile != sys.stdin:
   inputFile.close()
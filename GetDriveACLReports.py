@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+# Purpose: For a Google Drive User(s), read a list of ACLs once and produce several reports from it.
+#          Each report produces the same output as the script it is named after:
+#            NonDomainDriveACLs - GetNonDomainDriveACLs.py
+#            SharedWithAnyoneDriveACLs - GetSharedWithAnyoneDriveACLs.py
+#            LinkSharedDriveACLs - GetLinkSharedDriveACLs.py
+#            UserShareCounts - GetUserShareCounts.py
+#            ExternalShareCounts - GetExternalShareCounts.py
+#          When all reports are complete, the number of rows, elapsed time and rows per second for each report are written to stderr.
+# Customize: Set the variables for each report as you would in the script it is named after; set LINK_FIELD and LINK_VALUE.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Get ACLs for all files, if you don't want all users, replace all users with your user selection in the command below
+#    Include the fields needed by all of the reports you want; don't use pm/pmfilter clauses as they would remove ACLs
+#    that some of the reports need, e.g., UserShareCounts counts the files each user owns.
+#  $ gam config auto_batch_min 1 redirect csv ./filelistperms.csv multiprocess all users print filelist fields id,name,permissions,owners.emailaddress,mimetype,linksharemetadata,resourcekey,webviewlink
+# 2: From that list of ACLs, output the reports; specify one or more Report=OutputFile arguments
+#  $ python3 GetDriveACLReports.py filelistperms.csv NonDomainDriveACLs=nondomainperms.csv SharedWithAnyoneDriveACLs=anyoneperms.csv LinkSharedDriveACLs=linksharedperms.csv UserShareCounts=usersharecounts.csv ExternalShareCounts=externalsharecounts.csv
+"""
+
+import csv
+import re
+import sys
+import time
+
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
+FILE_NAME = 'name'
+ALT_FILE_NAME = 'title'
+
+# For GAMADV-XTD3 with drive_v3_native_names = false
+#LINK_FIELD = 'withLink'
+#LINK_VALUE = 'True'
+# For GAMADV-XTD/GAMADV-XTD3 with drive_v3_native_names = true
+LINK_FIELD = 'allowFileDiscovery'
+LINK_VALUE = 'False'
+
+# NonDomainDriveACLs - see GetNonDomainDriveACLs.py
+# Define your domain(s) in the list below,
+# e.g., NON_DOMAIN_DOMAIN_LIST = ['domain.com'] NON_DOMAIN_DOMAIN_LIST = ['domain1.com', 'domain2.com']
+NON_DOMAIN_DOMAIN_LIST = []
+# Set NON_DOMAIN_INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in NON_DOMAIN_DOMAIN_LIST
+NON_DOMAIN_INCLUDE_SUBDOMAINS = False
+# Provide a list of regular expressions that define your domains(s),
+# e.g., NON_DOMAIN_DOMAIN_EXPRESSIONS = [re.compile(r'@domain\.com$')] NON_DOMAIN_DOMAIN_EXPRESSIONS = [re.compile(r'@.*domain1\.com$'0, re.compile(r'@.*domain2\.com$')]
+NON_DOMAIN_DOMAIN_EXPRESSIONS = []
+# Indicate whether the list is exclusive or inclusive
+# NON_DOMAIN_EXCLUSIVE_DOMAINS = True: You're interested only in domains not in NON_DOMAIN_DOMAIN_LIST/NON_DOMAIN_DOMAIN_EXPRESSIONS
+# NON_DOMAIN_EXCLUSIVE_DOMAINS = False: You're interested only in domains in NON_DOMAIN_DOMAIN_LIST/NON_DOMAIN_DOMAIN_EXPRESSIONS
+NON_DOMAIN_EXCLUSIVE_DOMAINS = True
+# Indicate whether shares to anyone should be included
+NON_DOMAIN_INCLUDE_ANYONE = True
+
+# SharedWithAnyoneDriveACLs - see GetSharedWithAnyoneDriveACLs.py
+# Specify desired value of allowFileDiscovery field: 'True', 'False', 'Any' (matches True and False)
+ANYONE_DESIRED_ALLOWFILEDISCOVERY = 'Any'
+
+# UserShareCounts - see GetUserShareCounts.py
+# Substitute your internal domain(s) in the list below, e.g., USER_SHARE_DOMAIN_LIST = ['domain.com',] USER_SHARE_DOMAIN_LIST = ['domain1.com', 'domain2.com',]
+USER_SHARE_DOMAIN_LIST = ['domain.com',]
+# Set USER_SHARE_INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in USER_SHARE_DOMAIN_LIST
+USER_SHARE_INCLUDE_SUBDOMAINS = False
+
+# ExternalShareCounts - see GetExternalShareCounts.py
+# Substitute your domain(s) in the list below, e.g., EXTERNAL_SHARE_DOMAIN_LIST = ['domain.com',] EXTERNAL_SHARE_DOMAIN_LIST = ['domain1.com', 'domain2.com',]
+EXTERNAL_SHARE_DOMAIN_LIST = ['domain.com']
+# Set EXTERNAL_SHARE_INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in EXTERNAL_SHARE_DOMAIN_LIST
+EXTERNAL_SHARE_INCLUDE_SUBDOMAINS = False
+# Indicate whether the list is exclusive or inclusive
+EXTERNAL_SHARE_EXCLUSIVE_DOMAINS = True
+# Indicate whether shares to anyone should be included
+EXTERNAL_SHARE_INCLUDE_ANYONE = True
+
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
+QUOTE_CHAR = '"' # Adjust as needed
+LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
+
+# Every report receives each permission as a tuple of the type followed by these fields
+PERMISSION_FIELDS = ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink', 'deleted', LINK_FIELD]
+
+class DriveACLReport():
+  """Base class for a report.
+
+  A report is created after the input file header has been read; processRow is called
+  with each row and its permissions, close is called after the last row.
+  """
+
+  fieldnames = []
+
+  def __init__(self, inputCSV, outputFile):
+    self.getOwner = inputCSV.getter('owners.0.emailAddress')
+    self.getFileId = inputCSV.getter('id')
+    self.getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+    self.getMimeType = inputCSV.getter('mimeType')
+    self.outputCSV = csv.DictWriter(outputFile, self.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+    self.outputCSV.writeheader()
+
+  def processRow(self, row, permissions):
+    """Process a row and its permissions; each report overrides this, the base report ignores the row."""
+
+  def close(self):
+    pass
+
+class NonDomainDriveACLs(DriveACLReport):
+  fieldnames = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                'permissionId', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery']
+
+  def __init__(self, inputCSV, outputFile):
+    super().__init__(inputCSV, outputFile)
+    self.domainClassifier = DomainClassifier(NON_DOMAIN_DOMAIN_LIST, NON_DOMAIN_DOMAIN_EXPRESSIONS,
+                                             NON_DOMAIN_EXCLUSIVE_DOMAINS, NON_DOMAIN_INCLUDE_SUBDOMAINS)
+
+  def processRow(self, row, permissions):
+    for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink, deleted, _ in permissions:
+      if v == 'domain':
+        emailAddress = ''
+        domain = domain.lower()
+        allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      elif v in ['user', 'group']:
+        if deleted == 'True':
+          continue
+        emailAddress = emailAddress.lower()
+        domain = emailAddress[emailAddress.find('@')+1:]
+        allowFileDiscovery = ''
+      else: #anyone
+        if not NON_DOMAIN_INCLUDE_ANYONE:
+          continue
+        domain = emailAddress = ''
+        allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      if ((v == 'anyone') or # Can only be true is NON_DOMAIN_INCLUDE_ANYONE = True
+          self.domainClassifier.checkDomain(domain)):
+        self.outputCSV.writerow({'Owner': self.getOwner(row),
+                                 'driveFileId': self.getFileId(row),
+                                 'driveFileTitle': self.getFileTitle(row),
+                                 'mimeType': self.getMimeType(row),
+                                 'permissionId': f'id:{permissionId}',
+                                 'role': role,
+                                 'type': v,
+                                 'emailAddress': emailAddress,
+                                 'domain': domain,
+                                 'allowFileDiscovery': allowFileDiscovery})
+
+class SharedWithAnyoneDriveACLs(DriveACLReport):
+  fieldnames = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                'permissionId', 'role', 'allowFileDiscovery']
+
+  def processRow(self, row, permissions):
+    for v, permissionId, role, _, _, allowFileDiscovery, withLink, _, _ in permissions:
+      if v != 'anyone':
+        continue
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      if ANYONE_DESIRED_ALLOWFILEDISCOVERY in ('Any', allowFileDiscovery):
+        self.outputCSV.writerow({'Owner': self.getOwner(row),
+                                 'driveFileId': self.getFileId(row),
+                                 'driveFileTitle': self.getFileTitle(row),
+                                 'mimeType': self.getMimeType(row),
+                                 'permissionId': f'id:{permissionId}',
+                                 'role': role,
+                                 'allowFileDiscovery': allowFileDiscovery})
+
+class LinkSharedDriveACLs(DriveACLReport):
+  fieldnames = ['Owner', 'driveFileId', 'driveFileTitle', 'mimeType', 'permissionId', 'role', 'allowFileDiscovery',
+                'resourceKey', 'linkShareMetadata.securityUpdateEligible', 'linkShareMetadata.securityUpdateEnabled',
+                'webViewLink']
+
+  def __init__(self, inputCSV, outputFile):
+    super().__init__(inputCSV, outputFile)
+    self.getSecurityUpdateEligible = inputCSV.getter('linkShareMetadata.securityUpdateEligible', default='')
+    self.getSecurityUpdateEnabled = inputCSV.getter('linkShareMetadata.securityUpdateEnabled', default='')
+    self.getResourceKey = inputCSV.getter('resourceKey', default='')
+    self.getWebViewLink = inputCSV.getter('webViewLink', default='')
+
+  def processRow(self, row, permissions):
+    for v, permissionId, role, _, _, allowFileDiscovery, withLink, _, _ in permissions:
+      if v in {'anyone', 'domain'}:
+        allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+        if allowFileDiscovery == 'False':
+          self.outputCSV.writerow({'Owner': self.getOwner(row),
+                                   'driveFileId': self.getFileId(row),
+                                   'driveFileTitle': self.getFileTitle(row),
+                                   'mimeType': self.getMimeType(row),
+                                   'permissionId': f'id:{permissionId}',
+                                   'role': role,
+                                   'allowFileDiscovery': allowFileDiscovery,
+                                   'linkShareMetadata.securityUpdateEligible': self.getSecurityUpdateEligible(row),
+                                   'linkShareMetadata.securityUpdateEnabled': self.getSecurityUpdateEnabled(row),
+                                   'resourceKey': self.getResourceKey(row),
+                                   'webViewLink': self.getWebViewLink(row)})
+
+class UserShareCounts(DriveACLReport):
+  TOTAL_COUNTER = 'Total'
+  SHARED_COUNTER = 'Shared'
+  SHARED_EXTERNAL_COUNTER = 'Shared External'
+  SHARED_INTERNAL_COUNTER = 'Shared Internal'
+  fieldnames = [
+    'Owner',
+    TOTAL_COUNTER, SHARED_COUNTER, SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER,
+    'anyone', 'anyoneWithLink',
+    'externalDomain', 'externalDomainWithLink',
+    'internalDomain', 'internalDomainWithLink',
+    'externalGroup', 'internalGroup',
+    'externalUser', 'internalUser',
+    'deletedGroup', 'deletedUser',
+    ]
+  zeroCounts = {field: 0 for field in fieldnames[1:]}
+  COUNT_CATEGORIES = {
+    'anyone': {False: 'anyone', True: 'anyoneWithLink'},
+    'domain': {False: {False: 'externalDomain', True: 'externalDomainWithLink'}, True: {False: 'internalDomain', True: 'internalDomainWithLink'}},
+    'group': {False: 'externalGroup', True: 'internalGroup'},
+    'user': {False: 'externalUser', True: 'internalUser'},
+    'deleted': {'group': 'deletedGroup', 'user': 'deletedUser'},
+    }
+
+  def __init__(self, inputCSV, outputFile):
+    super().__init__(inputCSV, outputFile)
+    self.domainClassifier = DomainClassifier(USER_SHARE_DOMAIN_LIST, includeSubdomains=USER_SHARE_INCLUDE_SUBDOMAINS)
+    self.userShareCounts = {}
+
+  def processRow(self, row, permissions):
+    owner = self.getOwner(row)
+    counts = self.userShareCounts.setdefault(owner, self.zeroCounts.copy())
+    counterSet = set()
+
+    def incrementCounter(counter):
+      if counter not in counterSet:
+        counts[counter] += 1
+        counterSet.add(counter)
+
+    for v, _, role, emailAddress, domain, _, _, deleted, link in permissions:
+      if role == 'owner':
+        incrementCounter(self.TOTAL_COUNTER)
+      else:
+        incrementCounter(self.SHARED_COUNTER)
+        if v == 'anyone':
+          incrementCounter(self.SHARED_EXTERNAL_COUNTER)
+          counts[self.COUNT_CATEGORIES[v][link == LINK_VALUE]] += 1
+        else:
+          domain = (domain or '').lower()
+          if not domain and v in ['user', 'group']:
+            if deleted == 'True':
+              counts[self.COUNT_CATEGORIES['deleted'][v]] += 1
+              continue
+            emailAddress = emailAddress.lower()
+            domain = emailAddress[emailAddress.find('@')+1:]
+          internal = self.domainClassifier.inDomains(domain)
+          incrementCounter([self.SHARED_EXTERNAL_COUNTER, self.SHARED_INTERNAL_COUNTER][internal])
+          if v == 'domain':
+            counts[self.COUNT_CATEGORIES[v][internal][link == LINK_VALUE]] += 1
+          else: # group, user
+            counts[self.COUNT_CATEGORIES[v][internal]] += 1
+
+  def close(self):
+    for owner, counts in sorted(iter(self.userShareCounts.items())):
+      row = {'Owner': owner}
+      row.update(counts)
+      self.outputCSV.writerow(row)
+
+class ExternalShareCounts(DriveACLReport):
+  fieldnames = ['Type', 'ExternalShare', 'Count']
+
+  def __init__(self, inputCSV, outputFile):
+    super().__init__(inputCSV, outputFile)
+    self.domainClassifier = DomainClassifier(EXTERNAL_SHARE_DOMAIN_LIST, exclusive=EXTERNAL_SHARE_EXCLUSIVE_DOMAINS,
+                                             includeSubdomains=EXTERNAL_SHARE_INCLUDE_SUBDOMAINS)
+    self.anyoneShareCount = self.anyoneWithLinkShareCount = 0
+    self.domainShareCounts = {}
+    self.domainWithLinkShareCounts = {}
+    self.groupShareCounts = {}
+    self.userShareCounts = {}
+
+  def processRow(self, row, permissions):
+    for v, _, role, emailAddress, domain, _, _, deleted, link in permissions:
+      if role == 'owner':
+        continue
+      if deleted == 'True':
+        continue
+      if v == 'anyone':
+        if not EXTERNAL_SHARE_INCLUDE_ANYONE:
+          continue
+        if link == LINK_VALUE:
+          self.anyoneWithLinkShareCount += 1
+        else:
+          self.anyoneShareCount += 1
+      elif v == 'domain':
+        domain = domain.lower()
+        if not self.domainClassifier.isSelected(domain):
+          continue
+        if link == LINK_VALUE:
+          self.domainWithLinkShareCounts.setdefault(domain, 0)
+          self.domainWithLinkShareCounts[domain] += 1
+        else:
+          self.domainShareCounts.setdefault(domain, 0)
+          self.domainShareCounts[domain] += 1
+      else: # group, user
+        emailAddress = emailAddress.lower()
+        domain = (domain or '').lower()
+        if not domain:
+          domain = emailAddress[emailAddress.find('@')+1:]
+        if not self.domainClassifier.isSelected(domain):
+          continue
+        if v == 'group':
+          self.groupShareCounts.setdefault(emailAddress, 0)
+          self.groupShareCounts[emailAddress] += 1
+        else:
+          self.userShareCounts.setdefault(emailAddress, 0)
+          self.userShareCounts[emailAddress] += 1
+
+  def close(self):
+    self.outputCSV.writerow({'Type': 'anyone', 'Count': self.anyoneShareCount})
+    self.outputCSV.writerow({'Type': 'anyoneWithLink', 'Count': self.anyoneWithLinkShareCount})
+    for externalShare, count in sorted(iter(self.domainShareCounts.items())):
+      self.outputCSV.writerow({'Type': 'domain', 'ExternalShare': externalShare, 'Count': count})
+    for externalShare, count in sorted(iter(self.domainWithLinkShareCounts.items())):
+      self.outputCSV.writerow({'Type': 'domainWithLink', 'ExternalShare': externalShare, 'Count': count})
+    for externalShare, count in sorted(iter(self.groupShareCounts.items())):
+      self.outputCSV.writerow({'Type': 'group', 'ExternalShare': externalShare, 'Count': count})
+    for externalShare, count in sorted(iter(self.userShareCounts.items())):
+      self.outputCSV.writerow({'Type': 'user', 'ExternalShare': externalShare, 'Count': count})
+
+REPORTS = {
+  'NonDomainDriveACLs': NonDomainDriveACLs,
+  'SharedWithAnyoneDriveACLs': SharedWithAnyoneDriveACLs,
+  'LinkSharedDriveACLs': LinkSharedDriveACLs,
+  'UserShareCounts': UserShareCounts,
+  'ExternalShareCounts': ExternalShareCounts,
+  }
+
+reportOutputFileNames = {}
+for arg in sys.argv[2:]:
+  reportName, _, outputFileName = arg.partition('=')
+  if reportName not in REPORTS or not outputFileName:
+    sys.stderr.write(f'Error: invalid argument {arg}, expected Report=OutputFile where Report is one of: {",".join(REPORTS)}\n')
+    sys.exit(1)
+  reportOutputFileNames[reportName] = outputFileName
+if not reportOutputFileNames:
+  sys.stderr.write(f'Error: no reports specified, expected one or more Report=OutputFile where Report is one of: {",".join(REPORTS)}\n')
+  sys.exit(1)
+
+if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
+  inputFile = open(sys.argv[1], 'r', encoding='utf-8')
+else:
+  inputFile = sys.stdin
+
+inputCSV = DrivePermissionsReader(inputFile, PERMISSION_FIELDS, quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+outputFiles = []
+reports = []
+for reportName, outputFileName in reportOutputFileNames.items():
+  if outputFileName != '-':
+    outputFile = open(outputFileName, 'w', encoding='utf-8', newline='')
+  else:
+    outputFile = sys.stdout
+  outputFiles.append(outputFile)
+  reports.append(REPORTS[reportName](inputCSV, outputFile))
+
+# Time spent in each report; the time to read the rows and decode their permissions is shared by all reports
+reportTimes = [0.0]*len(reports)
+rowCount = 0
+perf_counter = time.perf_counter
+startTime = perf_counter()
+for row in inputCSV:
+  permissions = list(inputCSV.permissions(row))
+  t1 = perf_counter()
+  for i, report in enumerate(reports):
+    report.processRow(row, permissions)
+    t2 = perf_counter()
+    reportTimes[i] += t2-t1
+    t1 = t2
+  rowCount += 1
+for i, report in enumerate(reports):
+  t1 = perf_counter()
+  report.close()
+  reportTimes[i] += perf_counter()-t1
+elapsedTime = perf_counter()-startTime
+
+if inputFile != sys.stdin:
+  inputFile.close()
+for outputFile in outputFiles:
+  if outputFile != sys.stdout:
+    outputFile.close()
+
+def rowsPerSecond(seconds):
+  return f'{rowCount/seconds:.0f}' if seconds > 0 else 'n/a'
+
+for reportName, reportTime in zip(reportOutputFileNames, reportTimes):
+  sys.stderr.write(f'{reportName}: {rowCount} rows, {reportTime:.3f} seconds, {rowsPerSecond(reportTime)} rows/second\n')
+readTime = elapsedTime-sum(reportTimes)
+sys.stderr.write(f'Read/Decode: {rowCount} rows, {readTime:.3f} seconds, {rowsPerSecond(readTime)} rows/second\n')
+sys.stderr.write(f'Total: {rowCount} rows, {elapsedTime:.3f} seconds, {rowsPerSecond(elapsedTime)} rows/second\n')
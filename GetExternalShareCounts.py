@@ -21,11 +21,15 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader
+
 # Substitute your domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com']
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 # Indicate whether the list is exclusive or inclusive
 # EXCLUSIVE_DOMAINS = True: You're interested only in domains not in DOMAIN_LIST which would typically be your internal domains
 # EXCLUSIVE_DOMAINS = False: You're interested only in domains in DOMAIN_LIST which would typically be external domains
@@ -40,10 +44,13 @@ INCLUDE_ANYONE = True
 LINK_FIELD = 'allowFileDiscovery'
 LINK_VALUE = 'False'
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the counts are the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainClassifier = DomainClassifier(DOMAIN_LIST, exclusive=EXCLUSIVE_DOMAINS, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -62,49 +69,45 @@ domainShareCounts = {}
 domainWithLinkShareCounts = {}
 groupShareCounts = {}
 userShareCounts = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'domain', LINK_FIELD, 'deleted'], quotechar=QUOTE_CHAR, parallel=PARALLEL_READ, ordered=False)
+if inputCSV.permissionsNs and not inputCSV.hasPermissionField(LINK_FIELD):
+  sys.stderr.write(f'WARNING: no permissions.N.{LINK_FIELD} columns in the input file, the {LINK_FIELD} counts will be 0; check LINK_FIELD\n')
+for row in inputCSV:
+  for v, role, emailAddress, domain, link, deleted in inputCSV.permissions(row):
+    if role == 'owner':
+      continue
+    if deleted == 'True':
+      continue
+    if v == 'anyone':
+      if not INCLUDE_ANYONE:
+        continue
+      if link == LINK_VALUE:
+        anyoneWithLinkShareCount += 1
+      else:
+        anyoneShareCount += 1
+    elif v == 'domain':
+      domain = domain.lower()
+      if not domainClassifier.isSelected(domain):
         continue
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
+      if link == LINK_VALUE:
+        domainWithLinkShareCounts.setdefault(domain, 0)
+        domainWithLinkShareCounts[domain] += 1
+      else:
+        domainShareCounts.setdefault(domain, 0)
+        domainShareCounts[domain] += 1
+    else: # group, user
+      emailAddress = emailAddress.lower()
+      domain = (domain or '').lower()
+      if not domain:
+        domain = emailAddress[emailAddress.find('@')+1:]
+      if not domainClassifier.isSelected(domain):
         continue
-      if v == 'anyone':
-        if not INCLUDE_ANYONE:
-          continue
-        if row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE:
-          anyoneWithLinkShareCount += 1
-        else:
-          anyoneShareCount += 1
-      elif v == 'domain':
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        if ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-            (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST)):
-          continue
-        if row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE:
-          domainWithLinkShareCounts.setdefault(domain, 0)
-          domainWithLinkShareCounts[domain] += 1
-        else:
-          domainShareCounts.setdefault(domain, 0)
-          domainShareCounts[domain] += 1
-      else: # group, user
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = row.get(f'permissions.{permissions_N}.domain', '').lower()
-        if not domain:
-          domain = emailAddress[emailAddress.find('@')+1:]
-        if ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-            (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST)):
-          continue
-        if v == 'group':
-          groupShareCounts.setdefault(emailAddress, 0)
-          groupShareCounts[emailAddress] += 1
-        else:
-          userShareCounts.setdefault(emailAddress, 0)
-          userShareCounts[emailAddress] += 1
+      if v == 'group':
+        groupShareCounts.setdefault(emailAddress, 0)
+        groupShareCounts[emailAddress] += 1
+      else:
+        userShareCounts.setdefault(emailAddress, 0)
+        userShareCounts[emailAddress] += 1
 outputCSV.writerow({'Type': 'anyone', 'Count': anyoneShareCount})
 outputCSV.writerow({'Type': 'anyoneWithLink', 'Count': anyoneWithLinkShareCount})
 for externalShare, count in sorted(iter(domainShareCounts.items())):
@@ -10,6 +10,9 @@
 #    To select a folder as a starting point rather than My Drive, add: select <DriveFileID>
 #    To have that folder included in the output, add: showparent
 #  $ gam redirect csv ./filelistperms.csv user user@domain.com print filelist fields id,name,mimetype,permissions,owners.emailaddress filepath showownedby any
+#    filepath makes GAM get the parents of every file, which is slow for many files; instead, the paths can be built
+#    from the parents of the files in the list, see DrivePathResolver.py; the input file can't be stdin
+#  $ gam redirect csv ./filelistperms.csv user user@domain.com print filelist fields id,name,mimetype,permissions,owners.emailaddress,parents showownedby any
 # 2: From that list of ACLs, output a CSV file that lists the shared file permissions; the file paths are included on each line
 #  $ python3 GetFilePermissionsWithPaths.py filelistperms.csv deleteperms.csv
 # 3: Inspect deleteperms.csv, verify that it makes sense and then proceed if desired
@@ -18,24 +21,38 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePathResolver import DrivePathResolver, hasParentColumns
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink'],
+                                  quotechar=QUOTE_CHAR)
 inputFieldNames = inputCSV.fieldnames
 pathFieldNames = [field for field in inputFieldNames if field.startswith('path')]
+pathFieldIndexes = [(field, inputCSV.columns[field]) for field in pathFieldNames]
+pathResolver = None
+if not pathFieldNames and hasParentColumns(inputFieldNames):
+  if inputFile == sys.stdin:
+    sys.stderr.write('ERROR: Resolving paths from parents reads the input file twice, it can not be stdin\n')
+    sys.exit(1)
+  pathResolver = DrivePathResolver.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
+  pathFieldNames = ['paths']+[f'path.{i}' for i in range(pathResolver.maxPaths())]
+getUser = inputCSV.getter('Owner')
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType', default='')
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -49,39 +66,40 @@ outputCSV.writeheader()
 
 for row in inputCSV:
   prow = {}
-  for field in pathFieldNames:
-    prow[field] = row[field]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v in ['user', 'group']:
-        allowFileDiscovery = ''
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      elif v == 'domain':
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      else: #anyone
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = ''
-      orow = {'User': row['Owner'],
-              'Owner': row['owners.0.emailAddress'],
-              'driveFileId': row['id'],
-              'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-              'mimeType': row.get('mimeType', ''),
-              'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-              'role': row[f'permissions.{permissions_N}.role'],
-              'type': v,
-              'emailAddress': emailAddress,
-              'domain': domain,
-              'allowFileDiscovery': allowFileDiscovery}
-      orow.update(prow)
-      outputCSV.writerow(orow)
+  if pathResolver:
+    paths = pathResolver.paths(getFileId(row))
+    prow['paths'] = len(paths)
+    for i, path in enumerate(paths):
+      prow[f'path.{i}'] = path
+  else:
+    for field, index in pathFieldIndexes:
+      prow[field] = row[index]
+  for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink in inputCSV.permissions(row):
+    if v in ['user', 'group']:
+      allowFileDiscovery = ''
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+    elif v == 'domain':
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      emailAddress = ''
+      domain = domain.lower()
+    else: #anyone
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      emailAddress = ''
+      domain = ''
+    orow = {'User': getUser(row),
+            'Owner': getOwner(row),
+            'driveFileId': getFileId(row),
+            'driveFileTitle': getFileTitle(row),
+            'mimeType': getMimeType(row),
+            'permissionId': f'id:{permissionId}',
+            'role': role,
+            'type': v,
+            'emailAddress': emailAddress,
+            'domain': domain,
+            'allowFileDiscovery': allowFileDiscovery}
+    orow.update(prow)
+    outputCSV.writerow(orow)
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Create a CSV file that totals message label data: count and size
-# Customize: DELIMITER, SHOW_TOTALS
+# Customize: DELIMITER, SHOW_TOTALS, INPUT_ORDER, CHECK_GROUPED, PARALLEL_READ
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -12,10 +12,20 @@
 #  Multiple users; replace all users as desired
 #  $ gam config auto_batch_min 1 redirect csv ./LabelData.csv multiprocess all users print messages showlabels showsize headers "" delimiter '|'
 # 2: python3 GetLabelsCountSize.py LabelData.csv LabelSummary.csv
+#
+# LabelSummary.csv is written as a temporary file in its directory that replaces it only if there are no errors,
+# e.g., INPUT_ORDER = GROUPED, CHECK_GROUPED = True and the messages of a user are not together; when the output is written to stdout,
+# it is incomplete and must not be used if the exit status is non-zero.
 """
 
+import array
 import csv
+import hashlib
+import os
 import sys
+import tempfile
+
+from ShardedCSVReader import ShardedCSVReader
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
@@ -23,45 +33,156 @@ LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 DELIMITER = '|' # Must match delimiter from command line
 SHOW_TOTALS = False # False: Don't show total label counts/size for each user; True: Do show
 
-if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
-  outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
-else:
-  outputFile = sys.stdout
-outputCSV = csv.DictWriter(outputFile, ['User', 'Label', 'Count', 'SizeEstimate'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+# UNSORTED: the messages of a user can be anywhere in the input; the counts of all users are kept until the end, the users are output sorted
+# GROUPED: all of the messages of a user are together, as gam print messages writes them, even with multiprocess;
+#   each user is output when their messages end, in input order, so only the label counts of one user are kept in memory
+#   and memory does not grow with the number of users; a user whose messages are not together is output more than once
+UNSORTED = 'unsorted'
+GROUPED = 'grouped'
+INPUT_ORDER = UNSORTED
+# With INPUT_ORDER = GROUPED, set CHECK_GROUPED = True to stop with an error if the messages of a user are not together;
+# a 64-bit hash of each user is kept, so memory then grows with the number of users
+CHECK_GROUPED = False
+
+# Set PARALLEL_READ = True to parse and count a large input file with multiple processes; the counts are the same,
+# the users are output sorted and INPUT_ORDER is not used, see ShardedCSVReader.py
+PARALLEL_READ = False
+
+# Label names are interned to integer ids; each distinct Labels value is split once
+labelIds = {}
+labelNames = []
+labelSets = {}
+
+def getLabelId(label):
+  labelId = labelIds.get(label)
+  if labelId is None:
+    labelId = labelIds[label] = len(labelNames)
+    labelNames.append(label)
+  return labelId
+
+def getLabelSet(labels):
+  labelSet = labelSets.get(labels)
+  if labelSet is None:
+    labelSet = labelSets[labels] = tuple(getLabelId(label) for label in labels.split(DELIMITER))
+  return labelSet
+
+class UserLabels():
+  """The message count and size of each label of a user, in arrays indexed by the slot of the label."""
+
+  def __init__(self):
+    self.slots = {} # label id -> slot
+    self.counts = array.array('q')
+    self.sizes = array.array('q')
+
+  def add(self, labelId, count, size):
+    slot = self.slots.get(labelId)
+    if slot is None:
+      slot = self.slots[labelId] = len(self.counts)
+      self.counts.append(0)
+      self.sizes.append(0)
+    self.counts[slot] += count
+    self.sizes[slot] += size
+
+  def addMessage(self, labelSet, size):
+    for labelId in labelSet:
+      self.add(labelId, 1, size)
+
+  def labels(self):
+    """Return a list of (label, count, size) sorted by label."""
+    return sorted((labelNames[labelId], self.counts[slot], self.sizes[slot]) for labelId, slot in self.slots.items())
+
+def writeUser(user, userLabels):
+  count = 0
+  size = 0
+  for label, labelCount, labelSize in userLabels.labels():
+    count += labelCount
+    size += labelSize
+    outputCSV.writerow([user, label, labelCount, labelSize])
+  if SHOW_TOTALS:
+    outputCSV.writerow([user, 'Total', count, size])
+
+def countUsers(rows):
+  users = {}
+  for row in rows:
+    user = row[userIndex]
+    userLabels = users.get(user)
+    if userLabels is None:
+      userLabels = users[user] = UserLabels()
+    userLabels.addMessage(getLabelSet(row[labelsIndex]), int(row[sizeIndex]))
+  return users
+
+def countShard(rows):
+  # Run in a worker process; the label ids are those of the worker, so return the label names
+  return {user: userLabels.labels() for user, userLabels in countUsers(rows).items()}
 
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
 
-Users = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  user = row['User']
-  Users.setdefault(user, {})
-  size = int(row['SizeEstimate'])
-  for label in row['Labels'].split(DELIMITER):
-    Users[user].setdefault(label, {'Count': 0, 'SizeEstimate': 0})
-    Users[user][label]['Count'] +=1
-    Users[user][label]['SizeEstimate'] += size
-
-for user in sorted(Users):
-  count = 0
-  size = 0
-  for label, data in sorted(iter(Users[user].items())):
-    count += data['Count']
-    size += data['SizeEstimate']
-    outputCSV.writerow({'User': user,
-                        'Label': label,
-                        'Count': data['Count'],
-                        'SizeEstimate': data['SizeEstimate']})
-  if SHOW_TOTALS:
-    outputCSV.writerow({'User': user,
-                        'Label': 'Total',
-                        'Count': count,
-                        'SizeEstimate': size})
-
-if inputFile != sys.stdin:
-  inputFile.close()
-if outputFile != sys.stdout:
-  outputFile.close()
+if PARALLEL_READ:
+  inputCSV = ShardedCSVReader(inputFile, quotechar=QUOTE_CHAR)
+else:
+  inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+fieldnames = inputCSV.fieldnames if PARALLEL_READ else next(inputCSV)
+userIndex = fieldnames.index('User')
+labelsIndex = fieldnames.index('Labels')
+sizeIndex = fieldnames.index('SizeEstimate')
+
+if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
+  # Users are written as they are processed; an error, e.g., a user whose messages are not together, must not leave
+  # a partial summary
+  fd, tempFileName = tempfile.mkstemp(prefix='LabelSummary', suffix='.csv', dir=os.path.dirname(os.path.abspath(sys.argv[2])))
+  outputFile = open(fd, 'w', encoding='utf-8', newline='')
+else:
+  outputFile = sys.stdout
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['User', 'Label', 'Count', 'SizeEstimate'])
+
+completed = False
+try:
+  if PARALLEL_READ:
+    Users = {}
+    for shardUsers in inputCSV.mapShards(countShard):
+      for user, labels in shardUsers.items():
+        userLabels = Users.get(user)
+        if userLabels is None:
+          userLabels = Users[user] = UserLabels()
+        for label, count, size in labels:
+          userLabels.add(getLabelId(label), count, size)
+    for user in sorted(Users):
+      writeUser(user, Users[user])
+  elif INPUT_ORDER == GROUPED:
+    usersSeen = set() # With CHECK_GROUPED = True, the 64-bit hashes of the users seen
+    currentUser = None
+    userLabels = None
+    for row in filter(None, inputCSV):
+      user = row[userIndex]
+      if user != currentUser:
+        if currentUser is not None:
+          writeUser(currentUser, userLabels)
+        if CHECK_GROUPED:
+          digest = hashlib.blake2b(user.encode('utf-8'), digest_size=8).digest()
+          if digest in usersSeen:
+            sys.stderr.write(f'ERROR: INPUT_ORDER = GROUPED but the messages of {user} are not together\n')
+            sys.exit(1)
+          usersSeen.add(digest)
+        currentUser = user
+        userLabels = UserLabels()
+      userLabels.addMessage(getLabelSet(row[labelsIndex]), int(row[sizeIndex]))
+    if currentUser is not None:
+      writeUser(currentUser, userLabels)
+  else:
+    Users = countUsers(filter(None, inputCSV))
+    for user in sorted(Users):
+      writeUser(user, Users[user])
+  completed = True
+finally:
+  if inputFile != sys.stdin:
+    inputFile.close()
+  if outputFile != sys.stdout:
+    outputFile.close()
+    if completed:
+      os.replace(tempFileName, sys.argv[2])
+    else:
+      os.remove(tempFileName)
@@ -14,17 +14,19 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -41,24 +43,31 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v in {'anyone', 'domain'}:
-      permissions_N = mg.group(1)
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'allowFileDiscovery', 'withLink'], quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+getSecurityUpdateEligible = inputCSV.getter('linkShareMetadata.securityUpdateEligible', default='')
+getSecurityUpdateEnabled = inputCSV.getter('linkShareMetadata.securityUpdateEnabled', default='')
+getResourceKey = inputCSV.getter('resourceKey', default='')
+getWebViewLink = inputCSV.getter('webViewLink', default='')
+for row in inputCSV:
+  for v, permissionId, role, allowFileDiscovery, withLink in inputCSV.permissions(row):
+    if v in {'anyone', 'domain'}:
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
       if allowFileDiscovery == 'False':
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
+        outputCSV.writerow({'Owner': getOwner(row),
+                            'driveFileId': getFileId(row),
+                            'driveFileTitle': getFileTitle(row),
+                            'mimeType': getMimeType(row),
+                            'permissionId': f'id:{permissionId}',
+                            'role': role,
                             'allowFileDiscovery': allowFileDiscovery,
-                            'linkShareMetadata.securityUpdateEligible': row.get('linkShareMetadata.securityUpdateEligible', ''),
-                            'linkShareMetadata.securityUpdateEnabled': row.get('linkShareMetadata.securityUpdateEnabled', ''),
-                            'resourceKey': row.get('resourceKey', ''),
-                            'webViewLink': row.get('webViewLink', '')})
+                            'linkShareMetadata.securityUpdateEligible': getSecurityUpdateEligible(row),
+                            'linkShareMetadata.securityUpdateEnabled': getSecurityUpdateEnabled(row),
+                            'resourceKey': getResourceKey(row),
+                            'webViewLink': getWebViewLink(row)})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -42,9 +42,10 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -54,8 +55,6 @@ NON_INHERITED_ACLS_ONLY = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
 else:
@@ -79,28 +78,38 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v in {'anyone', 'domain'}:
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'allowFileDiscovery', 'withLink', 'permissionDetails.0.inherited'],
+                                  quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('Owner')
+getDriveId = inputCSV.getter('driveId')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+getSecurityUpdateEligible = inputCSV.getter('linkShareMetadata.securityUpdateEligible', default='')
+getSecurityUpdateEnabled = inputCSV.getter('linkShareMetadata.securityUpdateEnabled', default='')
+getResourceKey = inputCSV.getter('resourceKey', default='')
+getWebViewLink = inputCSV.getter('webViewLink', default='')
+for row in inputCSV:
+  for v, permissionId, role, allowFileDiscovery, withLink, inherited in inputCSV.permissions(row):
+    if v in {'anyone', 'domain'}:
+      if NON_INHERITED_ACLS_ONLY and inherited == 'True':
         continue
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
       if allowFileDiscovery == 'False':
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'teamDriveId': row['driveId'],
-                            'teamDriveName': teamDriveNames.get(row['driveId'], row['driveId']),
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
+        driveId = getDriveId(row)
+        outputCSV.writerow({'Owner': getOwner(row),
+                            'teamDriveId': driveId,
+                            'teamDriveName': teamDriveNames.get(driveId, driveId),
+                            'driveFileId': getFileId(row),
+                            'driveFileTitle': getFileTitle(row),
+                            'mimeType': getMimeType(row),
+                            'permissionId': f'id:{permissionId}',
+                            'role': role,
                             'allowFileDiscovery': allowFileDiscovery,
-                            'linkShareMetadata.securityUpdateEligible': row.get('linkShareMetadata.securityUpdateEligible', ''),
-                            'linkShareMetadata.securityUpdateEnabled': row.get('linkShareMetadata.securityUpdateEnabled', ''),
-                            'resourceKey': row.get('resourceKey', ''),
-                            'webViewLink': row.get('webViewLink', '')})
+                            'linkShareMetadata.securityUpdateEligible': getSecurityUpdateEligible(row),
+                            'linkShareMetadata.securityUpdateEnabled': getSecurityUpdateEnabled(row),
+                            'resourceKey': getResourceKey(row),
+                            'webViewLink': getWebViewLink(row)})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -35,12 +35,17 @@ import csv
 import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 # Define your domain(s) in the list below,
 # e.g., DOMAIN_LIST = ['domain.com'] DOMAIN_LIST = ['domain1.com', 'domain2.com']
 DOMAIN_LIST = []
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 
 # Provide a list of regular expressions that define your domains(s),
 # e.g., DOMAIN_EXPRESSIONS = [re.compile(r'@domain\.com$')] DOMAIN_EXPRESSIONS = [re.compile(r'@.*domain1\.com$'0, re.compile(r'@.*domain2\.com$')]
@@ -53,27 +58,13 @@ EXCLUSIVE_DOMAINS = True
 # Indicate whether shares to anyone should be included
 INCLUDE_ANYONE = True
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
-def checkDomain(d):
-  if EXCLUSIVE_DOMAINS:
-    if DOMAIN_LIST and d in DOMAIN_LIST:
-      return False
-    for regex in DOMAIN_EXPRESSIONS:
-      if regex.search(d):
-        return False
-  else:
-    if DOMAIN_LIST and d not in DOMAIN_LIST:
-      return False
-    if DOMAIN_EXPRESSIONS:
-      for regex in DOMAIN_EXPRESSIONS:
-        if regex.search(d):
-          return True
-      return False
-  return not EXCLUSIVE_DOMAINS
+domainClassifier = DomainClassifier(DOMAIN_LIST, DOMAIN_EXPRESSIONS, EXCLUSIVE_DOMAINS, INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -89,38 +80,41 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-        allowFileDiscovery = ''
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        domain = emailAddress = ''
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
-          checkDomain(domain)):
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v,
-                            'emailAddress': emailAddress,
-                            'domain': domain,
-                            'allowFileDiscovery': allowFileDiscovery})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink', 'deleted'],
+                                  quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink, deleted in inputCSV.permissions(row):
+    if v == 'domain':
+      emailAddress = ''
+      domain = domain.lower()
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    elif v in ['user', 'group']:
+      if deleted == 'True':
+        continue
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+      allowFileDiscovery = ''
+    else: #anyone
+      if not INCLUDE_ANYONE:
+        continue
+      domain = emailAddress = ''
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
+        domainClassifier.checkDomain(domain)):
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'type': v,
+                          'emailAddress': emailAddress,
+                          'domain': domain,
+                          'allowFileDiscovery': allowFileDiscovery})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -30,9 +30,14 @@ import csv
 import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader
+
 # Define your domain(s) in the list below,
 # e.g., DOMAIN_LIST = ['domain.com'] DOMAIN_LIST = ['domain1.com', 'domain2.com']
 DOMAIN_LIST = []
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 
 # Provide a list of regular expressions that define your domains(s),
 # e.g., DOMAIN_EXPRESSIONS = [re.compile(r'@domain\.com$')] DOMAIN_EXPRESSIONS = [re.compile(r'@.*domain1\.com$'0, re.compile(r'@.*domain2\.com$')]
@@ -48,24 +53,7 @@ INCLUDE_ANYONE = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
-def checkDomain(d):
-  if EXCLUSIVE_DOMAINS:
-    if DOMAIN_LIST and d in DOMAIN_LIST:
-      return False
-    for regex in DOMAIN_EXPRESSIONS:
-      if regex.search(d):
-        return False
-  else:
-    if DOMAIN_LIST and d not in DOMAIN_LIST:
-      return False
-    if DOMAIN_EXPRESSIONS:
-      for regex in DOMAIN_EXPRESSIONS:
-        if regex.search(d):
-          return True
-      return False
-  return not EXCLUSIVE_DOMAINS
+domainClassifier = DomainClassifier(DOMAIN_LIST, DOMAIN_EXPRESSIONS, EXCLUSIVE_DOMAINS, INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -80,32 +68,31 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        emailAddress = ''
-        domain = ''
-      if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
-          checkDomain(domain)):
-        outputCSV.writerow({'teamDriveId': row['id'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v,
-                            'emailAddress': emailAddress,
-                            'domain': domain})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'deleted'], quotechar=QUOTE_CHAR)
+getTeamDriveId = inputCSV.getter('id')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain, deleted in inputCSV.permissions(row):
+    if v == 'domain':
+      emailAddress = ''
+      domain = domain.lower()
+    elif v in ['user', 'group']:
+      if deleted == 'True':
+        continue
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+    else: #anyone
+      if not INCLUDE_ANYONE:
+        continue
+      emailAddress = ''
+      domain = ''
+    if ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
+        domainClassifier.checkDomain(domain)):
+      outputCSV.writerow({'teamDriveId': getTeamDriveId(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'type': v,
+                          'emailAddress': emailAddress,
+                          'domain': domain})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Show the number of CrOS devices in each Org Unit
-# Customize: Set SHOW_STATUS,SHOW_TOTALS
+# Customize: Set SHOW_STATUS, SHOW_TOTALS, SHOW_SUB_OU_TOTALS and SHOW_TREE
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -12,27 +12,24 @@
 #  $ gam redirect csv ./CrOS.csv print cros ou status
 # 3: From those lists of Org Units and CrOS devices, output a CSV file with CrOS device counts for each Org Unit
 #  $ python3 GetOrgUnitCrOSCounts.py ./OrgUnits.csv ./CrOS.csv ./OrgUnitCrOSCounts.csv
+#    An Org Unit of a CrOS device that is not in OrgUnits.csv is added; see OrgUnitTree.py
 """
 
 import csv
 import sys
 
+from OrgUnitTree import OrgUnitTree
+
 SHOW_STATUS = True # False if you don't want status information
 SHOW_TOTALS = True # False if you don't want totals
+SHOW_SUB_OU_TOTALS = False # True to add columns includeSubOUs.<field> with the counts of each Org Unit and its sub-OUs
+SHOW_TREE = False # True to output all Org Units in tree order with the indented Org Unit name in column orgUnit
+INDENT_SPACES = '  ' # How much to indent each level of the tree
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-orgUnits = {}
-inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-inputFieldNames = inputCSV.fieldnames
-if 'orgUnitPath' not in inputFieldNames:
-  sys.stderr.write(f'Error: no header orgUnitPath in Org Units file {sys.argv[1]} field names: {",".join(inputFieldNames)}\n')
-  sys.exit(1)
-for row in inputCSV:
-  orgUnits[row['orgUnitPath']] = {'devices' : 0, 'statusValues': {}}
-inputFile.close()
+orgUnitTree = OrgUnitTree.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
 
 if sys.argv[2] != '-':
   inputFile = open(sys.argv[2], 'r', encoding='utf-8')
@@ -43,7 +40,7 @@ inputFieldNames = inputCSV.fieldnames
 if 'orgUnitPath' not in inputFieldNames:
   sys.stderr.write(f'Error: no header orgUnitPath in CrOS file {sys.argv[2]} field names: {",".join(inputFieldNames)}\n')
   sys.exit(1)
-fieldnames = ['orgUnitPath', 'devices']
+countFields = ['devices']
 checkStatus = SHOW_STATUS and 'status' in inputFieldNames
 statusValues = set()
 
@@ -52,40 +49,24 @@ if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
 else:
   outputFile = sys.stdout
 
-totals = {'devices' : 0, 'statusValues': {}}
 for row in inputCSV:
   orgUnitPath = row['orgUnitPath']
-  if orgUnitPath not in orgUnits:
-    orgUnits[orgUnitPath] = {'devices' : 0, 'statusValues': {}}
-  orgUnits[orgUnitPath]['devices'] += 1
+  orgUnitTree.addCount(orgUnitPath, 'devices')
   if checkStatus:
     statusValue = row['status']
-    if statusValue not in statusValues:
-      statusValues.add(statusValue)
-    orgUnits[orgUnitPath]['statusValues'].setdefault(statusValue, 0)
-    orgUnits[orgUnitPath]['statusValues'][statusValue] += 1
+    statusValues.add(statusValue)
+    orgUnitTree.addCount(orgUnitPath, f'status.{statusValue}')
 if checkStatus:
   for statusValue in sorted(statusValues):
-    fieldnames.append(f'status.{statusValue}')
-    totals['statusValues'][statusValue] = 0
+    countFields.append(f'status.{statusValue}')
 
-outputCSV = csv.DictWriter(outputFile, fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV = csv.DictWriter(outputFile, OrgUnitTree.countFieldnames(countFields, SHOW_SUB_OU_TOTALS, SHOW_TREE),
+                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
-for orgUnit, counts in sorted(iter(orgUnits.items())):
-  row = {'orgUnitPath': orgUnit, 'devices': counts['devices']}
-  totals['devices'] += counts['devices']
-  if checkStatus:
-    for statusValue in statusValues:
-      count = counts['statusValues'].get(statusValue, 0)
-      row[f'status.{statusValue}'] = count
-      totals['statusValues'][statusValue] += count
+for row in orgUnitTree.countRows(countFields, SHOW_SUB_OU_TOTALS, SHOW_TREE, INDENT_SPACES):
   outputCSV.writerow(row)
 if SHOW_TOTALS:
-  row = {'orgUnitPath': 'Totals', 'devices': totals['devices']}
-  if checkStatus:
-    for statusValue, count in iter(totals['statusValues'].items()):
-      row[f'status.{statusValue}'] = count
-  outputCSV.writerow(row)
+  outputCSV.writerow(orgUnitTree.totalsRow(countFields, SHOW_SUB_OU_TOTALS))
 
 if inputFile != sys.stdin:
   inputFile.close()
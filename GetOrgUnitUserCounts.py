@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Show the number of Users in each Org Unit
-# Customize: Set SHOW_SUSPENDED, SHOW_SUSPENSION_REASON and SHOW_TOTALS
+# Customize: Set SHOW_SUSPENDED, SHOW_SUSPENSION_REASON, SHOW_TOTALS, SHOW_SUB_OU_TOTALS and SHOW_TREE
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -12,28 +12,25 @@
 #  $ gam redirect csv ./Users.csv print users ou suspended
 # 3: From those lists of Users and Org Units, output a CSV file with user counts for each Org Unit
 #  $ python3 GetOrgUnitUserCounts.py ./OrgUnits.csv ./Users.csv ./OrgUnitUserCounts.csv
+#    An Org Unit of a user that is not in OrgUnits.csv is added; see OrgUnitTree.py
 """
 
 import csv
 import sys
 
+from OrgUnitTree import OrgUnitTree
+
 SHOW_SUSPENDED = True # False if you don't want suspension info
 SHOW_SUSPENSION_REASON = True # False if you don't want suspensionReason info
 SHOW_TOTALS = True # False if you don't want totals
+SHOW_SUB_OU_TOTALS = False # True to add columns includeSubOUs.<field> with the counts of each Org Unit and its sub-OUs
+SHOW_TREE = False # True to output all Org Units in tree order with the indented Org Unit name in column orgUnit
+INDENT_SPACES = '  ' # How much to indent each level of the tree
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-orgUnits = {}
-inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-inputFieldNames = inputCSV.fieldnames
-if 'orgUnitPath' not in inputFieldNames:
-  sys.stderr.write(f'Error: no header orgUnitPath in Org Units file {sys.argv[1]} field names: {",".join(inputFieldNames)}\n')
-  sys.exit(1)
-for row in inputCSV:
-  orgUnits[row['orgUnitPath']] = {'users' : 0, 'active': 0, 'suspended': 0, 'suspensionReason': {}}
-inputFile.close()
+orgUnitTree = OrgUnitTree.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
 
 if sys.argv[2] != '-':
   inputFile = open(sys.argv[2], 'r', encoding='utf-8')
@@ -44,10 +41,10 @@ inputFieldNames = inputCSV.fieldnames
 if 'orgUnitPath' not in inputFieldNames:
   sys.stderr.write(f'Error: no header orgUnitPath in Users file {sys.argv[2]} field names: {",".join(inputFieldNames)}\n')
   sys.exit(1)
-fieldnames = ['orgUnitPath', 'users']
+countFields = ['users']
 checkSuspended = SHOW_SUSPENDED and 'suspended' in inputFieldNames
 if checkSuspended:
-  fieldnames.extend(['active', 'suspended'])
+  countFields.extend(['active', 'suspended'])
 checkSuspensionReason = SHOW_SUSPENSION_REASON and 'suspensionReason' in inputFieldNames
 suspensionReasons = set()
 
@@ -56,54 +53,29 @@ if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
 else:
   outputFile = sys.stdout
 
-totals = {'users' : 0, 'active': 0, 'suspended': 0, 'suspensionReason': {}}
-
 for row in inputCSV:
   orgUnitPath = row['orgUnitPath']
-  if orgUnitPath not in orgUnits:
-    orgUnits[orgUnitPath] = {'users' : 0, 'active': 0, 'suspended': 0, 'suspensionReason': {}}
-  orgUnits[orgUnitPath]['users'] += 1
+  orgUnitTree.addCount(orgUnitPath, 'users')
   if checkSuspended:
     if row['suspended'] != 'True':
-      orgUnits[orgUnitPath]['active'] += 1
+      orgUnitTree.addCount(orgUnitPath, 'active')
     else:
-      orgUnits[orgUnitPath]['suspended'] += 1
+      orgUnitTree.addCount(orgUnitPath, 'suspended')
       if checkSuspensionReason:
         suspensionReason = row['suspensionReason']
-        if suspensionReason not in suspensionReasons:
-          suspensionReasons.add(suspensionReason)
-        orgUnits[orgUnitPath]['suspensionReason'].setdefault(suspensionReason, 0)
-        orgUnits[orgUnitPath]['suspensionReason'][suspensionReason] += 1
+        suspensionReasons.add(suspensionReason)
+        orgUnitTree.addCount(orgUnitPath, f'suspensionReason.{suspensionReason}')
 if checkSuspensionReason:
   for suspensionReason in sorted(suspensionReasons):
-    fieldnames.append(f'suspensionReason.{suspensionReason}')
-    totals['suspensionReason'][suspensionReason] = 0
+    countFields.append(f'suspensionReason.{suspensionReason}')
 
-outputCSV = csv.DictWriter(outputFile, fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV = csv.DictWriter(outputFile, OrgUnitTree.countFieldnames(countFields, SHOW_SUB_OU_TOTALS, SHOW_TREE),
+                           lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
-for orgUnit, counts in sorted(iter(orgUnits.items())):
-  row = {'orgUnitPath': orgUnit, 'users': counts['users']}
-  totals['users'] += counts['users']
-  if checkSuspended:
-    row['active'] = counts['active']
-    totals['active'] += counts['active']
-    row['suspended'] = counts['suspended']
-    totals['suspended'] += counts['suspended']
-    if checkSuspensionReason:
-      for suspensionReason in suspensionReasons:
-        count = counts['suspensionReason'].get(suspensionReason, 0)
-        row[f'suspensionReason.{suspensionReason}'] = count
-        totals['suspensionReason'][suspensionReason] += count
+for row in orgUnitTree.countRows(countFields, SHOW_SUB_OU_TOTALS, SHOW_TREE, INDENT_SPACES):
   outputCSV.writerow(row)
 if SHOW_TOTALS:
-  row = {'orgUnitPath': 'Totals', 'users': totals['users']}
-  if checkSuspended:
-    row['active'] = totals['active']
-    row['suspended'] = totals['suspended']
-    if checkSuspensionReason:
-      for suspensionReason, count in iter(totals['suspensionReason'].items()):
-        row[f'suspensionReason.{suspensionReason}'] = count
-  outputCSV.writerow(row)
+  outputCSV.writerow(orgUnitTree.totalsRow(countFields, SHOW_SUB_OU_TOTALS))
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -10,6 +10,9 @@
 #		[query <QueryDriveFile>] [fullquery <QueryDriveFile>] [select <DriveFileEntity>|orphans] [depth <Number>] [showparent] [filepath|fullpath]
 #    For a full description of print filelist, see: https://github.com/taers232c/GAMADV-XTD/wiki/Users-Drive-Files
 #    Example: gam redirect csv ./filelistperms.csv user testuser@domain.com print filelist id title permissions fullpath
+#    fullpath makes GAM get the parents of every file, which is slow for many files; instead, the paths can be built
+#    from the parents of the files in the list, see DrivePathResolver.py; the input file can't be stdin
+#    Example: gam redirect csv ./filelistperms.csv user testuser@domain.com print filelist id title permissions parents
 # 2: From that list of ACLs, output a CSV file with headers "path,type,value,role"
 #    that lists the file path and ACL for all ACLs except those indicating the user as owner.
 #    There is one row per ACL per file path
@@ -17,24 +20,22 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePathResolver import DrivePathResolver, hasParentColumns
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
-def getWithLink(r, n):
-  withLink = r.get(f'permissions.{n}.withLink')
+def getWithLink(withLink, allowFileDiscovery):
   if withLink is not None:
     return withLink == 'True'
-  withLink = r.get(f'permissions.{n}.allowFileDiscovery')
-  if withLink is not None:
-    return withLink == 'False'
+  if allowFileDiscovery is not None:
+    return allowFileDiscovery == 'False'
   return False
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
@@ -50,34 +51,44 @@ else:
   inputFile = sys.stdin
 
 pathPerms = []
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  numPaths = int(row.get('paths', '0'))
-  if numPaths > 0:
-    pathList = []
-    for p in range(0, numPaths):
-      pathList.append(row[f'path.{p}'])
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'domain', 'withLink', 'allowFileDiscovery', 'deleted'],
+                                  quotechar=QUOTE_CHAR)
+getNumPaths = inputCSV.getter('paths', default='0')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getOwner = inputCSV.getter('Owner')
+pathResolver = None
+if 'paths' not in inputCSV.columns and hasParentColumns(inputCSV.fieldnames):
+  if inputFile == sys.stdin:
+    sys.stderr.write('ERROR: Resolving paths from parents reads the input file twice, it can not be stdin\n')
+    sys.exit(1)
+  pathResolver = DrivePathResolver.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
+  getFileId = inputCSV.getter('id')
+for row in inputCSV:
+  if pathResolver:
+    pathList = pathResolver.paths(getFileId(row))
   else:
-    pathList = [row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown'))]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        value = row[f'permissions.{permissions_N}.domain']
-        if getWithLink(row, permissions_N):
-          v += 'WithLink'
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        value = row[f'permissions.{permissions_N}.emailAddress']
-      else:
-        value = ''
-        if getWithLink(row, permissions_N):
-          v += 'WithLink'
-      role = row[f'permissions.{permissions_N}.role']
-      if v != 'user' or role != 'owner' or value != row['Owner']:
-        for path in pathList:
-          pathPerms.append({'path': path, 'type': v, 'value': value, 'role': role})
+    pathList = []
+    for p in range(0, int(getNumPaths(row))):
+      pathList.append(row[inputCSV.columns[f'path.{p}']])
+  if not pathList:
+    pathList = [getFileTitle(row)]
+  for v, role, emailAddress, domain, withLink, allowFileDiscovery, deleted in inputCSV.permissions(row):
+    if v == 'domain':
+      value = domain
+      if getWithLink(withLink, allowFileDiscovery):
+        v += 'WithLink'
+    elif v in ['user', 'group']:
+      if deleted == 'True':
+        continue
+      value = emailAddress
+    else:
+      value = ''
+      if getWithLink(withLink, allowFileDiscovery):
+        v += 'WithLink'
+    if v != 'user' or role != 'owner' or value != getOwner(row):
+      for path in pathList:
+        pathPerms.append({'path': path, 'type': v, 'value': value, 'role': role})
+
 outputCSV.writerows(sorted(pathPerms, key=lambda row: row['path']))
 
 if inputFile != sys.stdin:
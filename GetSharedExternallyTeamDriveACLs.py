@@ -69,28 +69,31 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 # Substitute your domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com',]
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 # Indicate whether the list is exclusive or inclusive
 # EXCLUSIVE_DOMAINS = True: You're interested only in domains not in DOMAIN_LIST which would typically be your internal domains
 # EXCLUSIVE_DOMAINS = False: You're interested only in domains in DOMAIN_LIST which would typically be external domains
 EXCLUSIVE_DOMAINS = True
 # Indicate whether shares to anyone should be included
 INCLUDE_ANYONE = True
-
 # Specify whether only non-inherited ACLs should be output; inherited ACLs can't be deleted
 NON_INHERITED_ACLS_ONLY = True
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainClassifier = DomainClassifier(DOMAIN_LIST, exclusive=EXCLUSIVE_DOMAINS, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -112,41 +115,45 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'deleted', 'permissionDetails.0.inherited'],
+                                  quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('Owner')
+getDriveId = inputCSV.getter('driveId')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain, deleted, inherited in inputCSV.permissions(row):
+    if NON_INHERITED_ACLS_ONLY and inherited == 'True':
+      continue
+    if v == 'domain':
+      emailAddress = ''
+      domain = domain.lower()
+    elif v in ['user', 'group']:
+      if deleted == 'True':
+        continue
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+    else: #anyone
+      if not INCLUDE_ANYONE:
         continue
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        emailAddress = ''
-        domain = ''
-      if ((row[f'permissions.{permissions_N}.role'] != 'organizer') and
-          ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
-           (EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST) or
-           (not EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST))):
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'teamDriveId': row['driveId'],
-                            'teamDriveName': teamDriveNames.get(row['driveId'], row['driveId']),
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v,
-                            'emailAddress': emailAddress,
-                            'domain': domain})
+      emailAddress = ''
+      domain = ''
+    if ((role != 'organizer') and
+        ((v == 'anyone') or # Can only be true is INCLUDE_ANYONE = True
+         domainClassifier.isSelected(domain))):
+      driveId = getDriveId(row)
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'teamDriveId': driveId,
+                          'teamDriveName': teamDriveNames.get(driveId, driveId),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'type': v,
+                          'emailAddress': emailAddress,
+                          'domain': domain})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -16,17 +16,16 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -41,19 +40,21 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'deleted'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, deleted in inputCSV.permissions(row):
+    if deleted == 'True':
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'type': v})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -16,17 +16,16 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -41,37 +40,38 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        continue
-      if v in ['user', 'group']:
-        allowFileDiscovery = ''
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      elif v == 'domain':
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      else: #anyone
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-        emailAddress = ''
-        domain = ''
-      outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                          'driveFileId': row['id'],
-                          'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                          'mimeType': row['mimeType'],
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'role': row[f'permissions.{permissions_N}.role'],
-                          'type': v,
-                          'emailAddress': emailAddress,
-                          'domain': domain,
-                          'allowFileDiscovery': allowFileDiscovery})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink'],
+                                  quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink in inputCSV.permissions(row):
+    if role == 'owner':
+      continue
+    if v in ['user', 'group']:
+      allowFileDiscovery = ''
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+    elif v == 'domain':
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      emailAddress = ''
+      domain = domain.lower()
+    else: #anyone
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+      emailAddress = ''
+      domain = ''
+    outputCSV.writerow({'Owner': getOwner(row),
+                        'driveFileId': getFileId(row),
+                        'driveFileTitle': getFileTitle(row),
+                        'mimeType': getMimeType(row),
+                        'permissionId': f'id:{permissionId}',
+                        'role': role,
+                        'type': v,
+                        'emailAddress': emailAddress,
+                        'domain': domain,
+                        'allowFileDiscovery': allowFileDiscovery})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -15,9 +15,10 @@
 
 import copy
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 SHOW_USERS = True # True: show user ACLs; False: do not show user ACLs
 SHOW_GROUPS = True # True: show group ACLs; False: do not show group ACLs
 SHOW_DOMAINS = True # True: show domain ACLs; False: do not show domain ACLs
@@ -33,8 +34,6 @@ ALT_FILE_NAME = 'title'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 USER_GROUP_ROLES = ['commenter', 'reader', 'writer', 'fileOrganizer', 'organizer']
 DOMAIN_ANYONE_ROLES = ['commenter', 'reader', 'writer']
 
@@ -143,35 +142,34 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
   permCounts = copy.deepcopy(ZERO_COUNTS)
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      role = row[f'permissions.{permissions_N}.role']
-      if role == 'owner':
-        continue
-      if v in ['user', 'group']:
-        permCounts[v][role]['count'] += 1
-        permCounts[v][role]['addresses'].append(row[f'permissions.{permissions_N}.emailAddress'].lower())
-        continue
-      if v == 'domain':
-        if not row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                       str(row.get(f'permissions.{permissions_N}.withLink') == 'False')):
-          v = 'domainWithlink'
-        permCounts[v][role]['count'] += 1
-        permCounts[v][role]['addresses'].append(row[f'permissions.{permissions_N}.domain'])
-        continue
-      # if v == 'anyone'
-      if not row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                     str(row.get(f'permissions.{permissions_N}.withLink') == 'False')):
-        v = 'anyoneWithlink'
+  for v, role, emailAddress, domain, allowFileDiscovery, withLink in inputCSV.permissions(row):
+    if role == 'owner':
+      continue
+    if v in ['user', 'group']:
+      permCounts[v][role]['count'] += 1
+      permCounts[v][role]['addresses'].append(emailAddress.lower())
+      continue
+    if v == 'domain':
+      if not getAllowFileDiscovery(allowFileDiscovery, withLink):
+        v = 'domainWithlink'
       permCounts[v][role]['count'] += 1
-  orow = {'Owner': row['owners.0.emailAddress'],
-          'driveFileId': row['id'],
-          'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-          'mimeType': row['mimeType']}
+      permCounts[v][role]['addresses'].append(domain)
+      continue
+    # if v == 'anyone'
+    if not getAllowFileDiscovery(allowFileDiscovery, withLink):
+      v = 'anyoneWithlink'
+    permCounts[v][role]['count'] += 1
+  orow = {'Owner': getOwner(row),
+          'driveFileId': getFileId(row),
+          'driveFileTitle': getFileTitle(row),
+          'mimeType': getMimeType(row)}
   if SHOW_USERS:
     atype = 'user'
     for role in USER_GROUP_ROLES:
@@ -13,44 +13,38 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
   outputFile = sys.stdout
-
 if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress'], quotechar=QUOTE_CHAR)
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(inputCSV.fieldnames)
+getOwner = inputCSV.getter('Owner')
 
 for row in inputCSV:
   shared = False
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg:
-      if v == 'user':
-        permissions_N = mg.group(1)
-        role = row[f'permissions.{permissions_N}.role']
-        emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-        if (role and role != 'owner') or (emailAddress and emailAddress != row['Owner'].lower()):
-          shared = True
-      elif v:
+  for v, role, emailAddress in inputCSV.permissions(row):
+    if v == 'user':
+      emailAddress = (emailAddress or '').lower()
+      if (role and role != 'owner') or (emailAddress and emailAddress != getOwner(row).lower()):
         shared = True
+    else:
+      shared = True
   if shared:
     outputCSV.writerow(row)
 
@@ -31,14 +31,18 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 # Substitute your domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com']
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 # EXCLUSIVE_DOMAINS = True: You're interested only in domains not in DOMAIN_LIST which would typically be your internal domains
 # EXCLUSIVE_DOMAINS = False: You're interested only in domains in DOMAIN_LIST which would typically be external domains
 # Indicate whether the list is exclusive or inclusive
@@ -46,10 +50,13 @@ EXCLUSIVE_DOMAINS = True
 # Indicate whether shares to anyone should be included
 INCLUDE_ANYONE = True
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainClassifier = DomainClassifier(DOMAIN_LIST, exclusive=EXCLUSIVE_DOMAINS, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -65,50 +72,52 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink', 'deleted'],
+                                  quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
   acls = []
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      elif v == 'user':
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        if row[f'permissions.{permissions_N}.role'] == 'owner':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-        allowFileDiscovery = ''
-      elif v == 'group':
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-        allowFileDiscovery = ''
-      else: #anyone
-        if not INCLUDE_ANYONE:
-          continue
-        domain = emailAddress = ''
-        allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery', str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if ((v != 'anyone') and
-          ((EXCLUSIVE_DOMAINS and domain in DOMAIN_LIST) or
-           (not EXCLUSIVE_DOMAINS and domain not in DOMAIN_LIST))):
-        acls = []
-        break
-      acls.append({'Owner': row['owners.0.emailAddress'],
-                   'driveFileId': row['id'],
-                   'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                   'mimeType': row['mimeType'],
-                   'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                   'role': row[f'permissions.{permissions_N}.role'],
-                   'type': v,
-                   'emailAddress': emailAddress,
-                   'domain': domain,
-                   'allowFileDiscovery': allowFileDiscovery})
+  for v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink, deleted in inputCSV.permissions(row):
+    if v == 'domain':
+      emailAddress = ''
+      domain = domain.lower()
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    elif v == 'user':
+      if deleted == 'True':
+        continue
+      if role == 'owner':
+        continue
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+      allowFileDiscovery = ''
+    elif v == 'group':
+      if deleted == 'True':
+        continue
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+      allowFileDiscovery = ''
+    else: #anyone
+      if not INCLUDE_ANYONE:
+        continue
+      domain = emailAddress = ''
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    if ((v != 'anyone') and
+        not domainClassifier.isSelected(domain)):
+      acls = []
+      break
+    acls.append({'Owner': getOwner(row),
+                 'driveFileId': getFileId(row),
+                 'driveFileTitle': getFileTitle(row),
+                 'mimeType': getMimeType(row),
+                 'permissionId': f'id:{permissionId}',
+                 'role': role,
+                 'type': v,
+                 'emailAddress': emailAddress,
+                 'domain': domain,
+                 'allowFileDiscovery': allowFileDiscovery})
   for acl in acls:
     outputCSV.writerow(acl)
 
@@ -23,9 +23,10 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -34,11 +35,12 @@ ALT_FILE_NAME = 'title'
 # allowFileDiscovery True = withLink False
 DESIRED_ALLOWFILEDISCOVERY = 'Any'
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -53,21 +55,24 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'anyone':
-      permissions_N = mg.group(1)
-      allowFileDiscovery = row.get(f'permissions.{permissions_N}.allowFileDiscovery',
-                                   str(row.get(f'permissions.{permissions_N}.withLink') == 'False'))
-      if DESIRED_ALLOWFILEDISCOVERY in ('Any', allowFileDiscovery):
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'allowFileDiscovery': allowFileDiscovery})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'allowFileDiscovery', 'withLink'], quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, allowFileDiscovery, withLink in inputCSV.permissions(row):
+    if v != 'anyone':
+      continue
+    allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    if DESIRED_ALLOWFILEDISCOVERY in ('Any', allowFileDiscovery):
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'allowFileDiscovery': allowFileDiscovery})
 
 if inputFile != sys.stdin:
   inputFile.close()
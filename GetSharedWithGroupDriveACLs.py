@@ -18,9 +18,11 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -33,11 +35,16 @@ GROUP_LIST = ['group@domain.com',]
 # Substitute your specific domain(s) in the list below if you want all groups in the domain, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 # The list should be empty if you're only specifiying groups in GROUP_LIST, e.g. DOMAIN__LIST = []
 DOMAIN_LIST = ['domain.com',]
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
+
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the output is the same, see ShardedCSVReader.py
+PARALLEL_READ = False
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+domainClassifier = DomainClassifier(DOMAIN_LIST, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -53,23 +60,27 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'group':
-      permissions_N = mg.group(1)
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-      domain = row[f'permissions.{permissions_N}.domain'].lower()
-      if ((not GROUP_LIST and not DOMAIN_LIST) or
-          (GROUP_LIST and emailAddress in GROUP_LIST) or
-          (DOMAIN_LIST and domain in DOMAIN_LIST)):
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain'], quotechar=QUOTE_CHAR, parallel=PARALLEL_READ)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain in inputCSV.permissions(row):
+    if v != 'group':
+      continue
+    emailAddress = (emailAddress or '').lower()
+    domain = domain.lower()
+    if ((not GROUP_LIST and not DOMAIN_LIST) or
+        (GROUP_LIST and emailAddress in GROUP_LIST) or
+        (DOMAIN_LIST and domainClassifier.inDomains(domain))):
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
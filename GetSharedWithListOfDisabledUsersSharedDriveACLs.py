@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a Google Drive User(s), show all drive file ACLs for files shared exclusively with a list of users from a CSV file
-# Customize: Set USER_HEADERS
+# Customize: Set USER_HEADERS, USE_COMPACT_USER_SET
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -24,52 +24,60 @@
 """
 
 import csv
-import re
 import sys
 
+from CompactEmailSet import CompactEmailSet
+from DrivePermissionsReader import DrivePermissionsReader
+
 # The headers in the CSV file that contain the user email addresses
 USER_HEADERS = ['primaryEmail']
 
+# Should the list of users be kept in a compact set saved in a file next to the CSV file, e.g., Users.csv.emailset
+# This uses much less memory for very large lists of users and later runs with the same list don't reread it
+USE_COMPACT_USER_SET = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+def readUsers():
+  with open(sys.argv[2], 'r', encoding='utf-8') as inputFile:
+    for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      for header in USER_HEADERS:
+        user = row[header].lower()
+        if user:
+          yield user
 
-userSet = set()
-inputFile = open(sys.argv[2], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for header in USER_HEADERS:
-    user = row[header].lower()
-    if user:
-      userSet.add(user)
-inputFile.close()
+if USE_COMPACT_USER_SET:
+  userSet = CompactEmailSet.fromFile(sys.argv[2], readUsers, USER_HEADERS)
+else:
+  userSet = set(readUsers())
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'deleted'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('Owner')
+getFileId = inputCSV.getter('id')
+
 outputFile = open('cleanup.csv', 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, ['owner', 'id', 'emailAddress'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
 for row in inputCSV:
   shared = False
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg:
-      if v in {'anyone', 'domain', 'group'}:
-        break
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        continue
-      emailAddress = row.get(f'permissions.{permissions_N}.emailAddress', '').lower()
-      if not emailAddress:
-        continue
-      if emailAddress not in userSet:
-        break
-      shared = True
-      outputCSV.writerow({'owner': row['Owner'],
-                        'id': row['id'],
+  for v, role, emailAddress, deleted in inputCSV.permissions(row):
+    if v in {'anyone', 'domain', 'group'}:
+      break
+    if deleted == 'True':
+      continue
+    if role == 'owner':
+      continue
+    emailAddress = (emailAddress or '').lower()
+    if not emailAddress:
+      continue
+    if emailAddress not in userSet:
+      break
+    shared = True
+    outputCSV.writerow({'owner': getOwner(row),
+                        'id': getFileId(row),
                         'emailAddress': emailAddress})
 
 inputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a Google Drive User(s), show all drive file ACLs for files shared with a list of users from a CSV file
-# Customize: Set USER_HEADERS
+# Customize: Set USER_HEADERS, USE_COMPACT_USER_SET
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -31,28 +31,36 @@
 """
 
 import csv
-import re
 import sys
 
+from CompactEmailSet import CompactEmailSet
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 # The headers in the CSV file that contain the user email addresses
 USER_HEADERS = ['email'] # USER_HEADERS = ['email1', 'email2', 'email3', 'email4']
 
+# Should the list of users be kept in a compact set saved in a file next to the CSV file, e.g., Users.csv.emailset
+# This uses much less memory for very large lists of users and later runs with the same list don't reread it
+USE_COMPACT_USER_SET = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+def readUsers():
+  with open(sys.argv[3], 'r', encoding='utf-8') as inputFile:
+    for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      for header in USER_HEADERS:
+        user = row[header].lower()
+        if user:
+          yield user
 
-userSet = set()
-inputFile = open(sys.argv[3], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for header in USER_HEADERS:
-    user = row[header].lower()
-    if user:
-      userSet.add(user)
-inputFile.close()
+if USE_COMPACT_USER_SET:
+  userSet = CompactEmailSet.fromFile(sys.argv[3], readUsers, USER_HEADERS)
+else:
+  userSet = set(readUsers())
 
 if sys.argv[2] != '-':
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -68,22 +76,26 @@ if sys.argv[1] != '-':
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted', '') == 'True':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if row[f'permissions.{permissions_N}.role'] != 'owner' and emailAddress in userSet:
-        outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'deleted'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, deleted in inputCSV.permissions(row):
+    if v != 'user':
+      continue
+    if deleted == 'True':
+      continue
+    emailAddress = emailAddress.lower()
+    if role != 'owner' and emailAddress in userSet:
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Show all drive file ACLs for Team Drive files shared with a list of users from a CSV file
-# Customize:f Set USER_HEADERS, NON_INHERITED_ACLS_ONLY
+# Customize:f Set USER_HEADERS, NON_INHERITED_ACLS_ONLY, USE_COMPACT_USER_SET
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -55,31 +55,39 @@
 """
 
 import csv
-import re
 import sys
 
+from CompactEmailSet import CompactEmailSet
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 # The headers in the CSV file that contain the user email addresses
 USER_HEADERS = ['email'] # USER_HEADERS = ['email1', 'email2', 'email3', 'email4']
 
+# Should the list of users be kept in a compact set saved in a file next to the CSV file, e.g., Users.csv.emailset
+# This uses much less memory for very large lists of users and later runs with the same list don't reread it
+USE_COMPACT_USER_SET = False
+
 # Specify whether only non-inherited ACLs should be output; inherited ACLs can't be deleted
 NON_INHERITED_ACLS_ONLY = True
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+def readUsers():
+  with open(sys.argv[3], 'r', encoding='utf-8') as inputFile:
+    for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      for header in USER_HEADERS:
+        user = row[header].lower()
+        if user:
+          yield user
 
-userSet = set()
-inputFile = open(sys.argv[3], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for header in USER_HEADERS:
-    user = row[header].lower()
-    if user:
-      userSet.add(user)
-inputFile.close()
+if USE_COMPACT_USER_SET:
+  userSet = CompactEmailSet.fromFile(sys.argv[3], readUsers, USER_HEADERS)
+else:
+  userSet = set(readUsers())
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -95,24 +103,28 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if emailAddress in userSet:
-        outputCSV.writerow({'Owner': row['Owner'],
-                            'driveFileId': row['id'],
-                            'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                            'mimeType': row['mimeType'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'deleted', 'permissionDetails.0.inherited'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('Owner')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, deleted, inherited in inputCSV.permissions(row):
+    if v != 'user':
+      continue
+    if deleted == 'True':
+      continue
+    if NON_INHERITED_ACLS_ONLY and inherited == 'True':
+      continue
+    emailAddress = emailAddress.lower()
+    if emailAddress in userSet:
+      outputCSV.writerow({'Owner': getOwner(row),
+                          'driveFileId': getFileId(row),
+                          'driveFileTitle': getFileTitle(row),
+                          'mimeType': getMimeType(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -2,6 +2,7 @@
 """
 # Purpose: Get all shared drive ACLs for a list of suspended users from a CSV file;
 #    the user's primary email and aliases are checked
+# Customize: Set USE_COMPACT_USER_SET
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -19,26 +20,36 @@ import csv
 import re
 import sys
 
+from CompactEmailSet import CompactEmailSet
+from DrivePermissionsReader import DrivePermissionsReader
+
 # The header in the CSV file that contains the user email addresses
 USER_HEADER = 'primaryEmail'
 
+# Should the list of users be kept in a compact set saved in a file next to the CSV file, e.g., SuspendedUsers.csv.emailset
+# This uses much less memory for very large lists of users and later runs with the same list don't reread it
+USE_COMPACT_USER_SET = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 ALIASES_N = re.compile(r"aliases.(\d+)")
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
 
-userSet = set()
-inputFile = open(sys.argv[3], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  user = row['primaryEmail'].lower()
-  if user:
-    userSet.add(user)
-  for k, v in iter(row.items()):
-    mg = ALIASES_N.match(k)
-    if mg and v:
-      userSet.add(v.lower())
-inputFile.close()
+def readUsers():
+  with open(sys.argv[3], 'r', encoding='utf-8') as inputFile:
+    for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+      user = row['primaryEmail'].lower()
+      if user:
+        yield user
+      for k, v in iter(row.items()):
+        mg = ALIASES_N.match(k)
+        if mg and v:
+          yield v.lower()
+
+if USE_COMPACT_USER_SET:
+  userSet = CompactEmailSet.fromFile(sys.argv[3], readUsers, ['primaryEmail', ALIASES_N.pattern])
+else:
+  userSet = set(readUsers())
 
 outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, ['id', 'name', 'createdTime', 'permissionId', 'role', 'emailAddress'],
@@ -47,21 +58,24 @@ outputCSV.writeheader()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted', '') == 'True':
-        continue
-      emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-      if emailAddress in userSet:
-        outputCSV.writerow({'id': row['id'],
-                            'name': row['name'],
-                            'createdTime': row['createdTime'],
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'emailAddress': emailAddress})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'deleted'], quotechar=QUOTE_CHAR)
+getFileId = inputCSV.getter('id')
+getFileName = inputCSV.getter('name')
+getCreatedTime = inputCSV.getter('createdTime')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, deleted in inputCSV.permissions(row):
+    if v != 'user':
+      continue
+    if deleted == 'True':
+      continue
+    emailAddress = emailAddress.lower()
+    if emailAddress in userSet:
+      outputCSV.writerow({'id': getFileId(row),
+                          'name': getFileName(row),
+                          'createdTime': getCreatedTime(row),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'emailAddress': emailAddress})
 
 inputFile.close()
 outputFile.close()
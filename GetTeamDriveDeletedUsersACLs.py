@@ -17,14 +17,13 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 teamDriveNames = {}
 inputFile = open(sys.argv[2], 'r', encoding='utf-8')
 for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
@@ -35,7 +34,8 @@ if sys.argv[1] != '-':
   inputFile = open(sys.argv[1], 'r', encoding='utf-8')
 else:
   inputFile = sys.stdin
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'deleted'], quotechar=QUOTE_CHAR)
+getTeamDriveId = inputCSV.getter('id')
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
@@ -44,17 +44,17 @@ else:
 outputCSV = csv.DictWriter(outputFile, ['id', 'name', 'permissionId', 'role', 'type'], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v == 'user':
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        outputCSV.writerow({'id': row['id'],
-                            'name': teamDriveNames.get(row['id'], row['id']),
-                            'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                            'role': row[f'permissions.{permissions_N}.role'],
-                            'type': v})
+for row in inputCSV:
+  for v, permissionId, role, deleted in inputCSV.permissions(row):
+    if v != 'user':
+      continue
+    if deleted == 'True':
+      teamDriveId = getTeamDriveId(row)
+      outputCSV.writerow({'id': teamDriveId,
+                          'name': teamDriveNames.get(teamDriveId, teamDriveId),
+                          'permissionId': f'id:{permissionId}',
+                          'role': role,
+                          'type': v})
 
 if inputFile != sys.stdin:
   inputFile.close()
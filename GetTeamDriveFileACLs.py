@@ -36,9 +36,10 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
@@ -48,8 +49,6 @@ NON_INHERITED_ACLS_ONLY = True
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
 else:
@@ -70,34 +69,39 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if NON_INHERITED_ACLS_ONLY and str(row.get(f'permissions.{permissions_N}.permissionDetails.0.inherited', False)) == 'True':
-        continue
-      if v == 'domain':
-        emailAddress = ''
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-      elif v in ['user', 'group']:
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
-        emailAddress = ''
-        domain = ''
-      outputCSV.writerow({'Owner': row['Owner'],
-                          'teamDriveId': row['driveId'],
-                          'teamDriveName': teamDriveNames.get(row['driveId'], row['driveId']),
-                          'driveFileId': row['id'],
-                          'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                          'mimeType': row['mimeType'],
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'role': row[f'permissions.{permissions_N}.role'],
-                          'type': v,
-                          'emailAddress': emailAddress,
-                          'domain': domain,
-                          'deleted': row.get(f'permissions.{permissions_N}.deleted', 'False')})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'deleted', 'permissionDetails.0.inherited'],
+                                  quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('Owner')
+getDriveId = inputCSV.getter('driveId')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, domain, deleted, inherited in inputCSV.permissions(row):
+    if NON_INHERITED_ACLS_ONLY and inherited == 'True':
+      continue
+    if v == 'domain':
+      emailAddress = ''
+      domain = domain.lower()
+    elif v in ['user', 'group']:
+      emailAddress = emailAddress.lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+    else: #anyone
+      emailAddress = ''
+      domain = ''
+    driveId = getDriveId(row)
+    outputCSV.writerow({'Owner': getOwner(row),
+                        'teamDriveId': driveId,
+                        'teamDriveName': teamDriveNames.get(driveId, driveId),
+                        'driveFileId': getFileId(row),
+                        'driveFileTitle': getFileTitle(row),
+                        'mimeType': getMimeType(row),
+                        'permissionId': f'id:{permissionId}',
+                        'role': role,
+                        'type': v,
+                        'emailAddress': emailAddress,
+                        'domain': domain,
+                        'deleted': deleted if deleted is not None else 'False'})
 
 if inputFile != sys.stdin:
   inputFile.close()
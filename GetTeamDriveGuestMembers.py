@@ -43,17 +43,16 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 # TeamDriveGuestMembers.csv
 outputFile = open(sys.argv[4], 'w', encoding='utf-8', newline='')
 outputCSV = csv.DictWriter(outputFile, ['teamDriveId', 'teamDriveName', 'driveFileId', 'driveFileName',
@@ -70,55 +69,56 @@ inputFile.close()
 
 # TeamDriveACLs.csv
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  driveId = row['id']
+inputCSV = DrivePermissionsReader(inputFile, ['emailAddress', 'domain'], quotechar=QUOTE_CHAR)
+getDriveId = inputCSV.getter('id')
+for row in inputCSV:
+  driveId = getDriveId(row)
   if driveId not in teamDrives:
     teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
   teamDrive = teamDrives[driveId]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        teamDrive[v].add(row[f'permissions.{permissions_N}.domain'].lower())
-      elif v in ['user', 'group']:
-        teamDrive[v].add(row[f'permissions.{permissions_N}.emailAddress'].lower())
+  for v, emailAddress, domain in inputCSV.permissions(row):
+    if v == 'domain':
+      teamDrive[v].add(domain.lower())
+    elif v in ['user', 'group']:
+      teamDrive[v].add(emailAddress.lower())
 inputFile.close()
 
 # TeamDriveFileACLs.csv
 inputFile = open(sys.argv[3], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  driveId = row['driveId']
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'deleted'], quotechar=QUOTE_CHAR)
+getDriveId = inputCSV.getter('driveId')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+for row in inputCSV:
+  driveId = getDriveId(row)
   if driveId not in teamDrives:
     teamDrives[driveId] = {'name': driveId, 'user': set(), 'group': set(), 'domain': set()}
   teamDrive = teamDrives[driveId]
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v == 'domain':
-        domain = row[f'permissions.{permissions_N}.domain'].lower()
-        if domain in teamDrive[v]:
-          continue
-        emailAddress = ''
-      elif v in ['user', 'group']:
-        if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-          continue
-        emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-        if emailAddress in teamDrive[v]:
-          continue
-        domain = emailAddress[emailAddress.find('@')+1:]
-      else: #anyone
+  for v, permissionId, role, emailAddress, domain, deleted in inputCSV.permissions(row):
+    if v == 'domain':
+      domain = domain.lower()
+      if domain in teamDrive[v]:
         continue
-      outputCSV.writerow({'teamDriveId': driveId,
-                          'teamDriveName': teamDrive['name'],
-                          'driveFileId': row['id'],
-                          'driveFileName': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'role': row[f'permissions.{permissions_N}.role'],
-                          'type': v,
-                          'emailAddress': emailAddress,
-                          'domain': domain})
+      emailAddress = ''
+    elif v in ['user', 'group']:
+      if deleted == 'True':
+        continue
+      emailAddress = emailAddress.lower()
+      if emailAddress in teamDrive[v]:
+        continue
+      domain = emailAddress[emailAddress.find('@')+1:]
+    else: #anyone
+      continue
+    outputCSV.writerow({'teamDriveId': driveId,
+                        'teamDriveName': teamDrive['name'],
+                        'driveFileId': getFileId(row),
+                        'driveFileName': getFileTitle(row),
+                        'permissionId': f'id:{permissionId}',
+                        'role': role,
+                        'type': v,
+                        'emailAddress': emailAddress,
+                        'domain': domain})
 
 inputFile.close()
+
 outputFile.close()
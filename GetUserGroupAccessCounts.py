@@ -14,9 +14,10 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 GROUP_ROLES = ['commenter', 'reader', 'writer'] # Choose from: commenter|reader|writer
 USER_ROLES = ['owner', 'commenter', 'reader', 'writer'] # Choose from: owner|commenter|reader|writer
 
@@ -34,8 +35,6 @@ ALT_FILE_NAME = 'title'
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 Users = {}
 Groups = {}
 
@@ -52,24 +51,21 @@ userOutputCSV = csv.DictWriter(userOutputFile, userFieldNames,
 userOutputCSV.writeheader()
 
 inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-        continue
-      role = row[f'permissions.{permissions_N}.role']
-      if v == 'user':
-        if role in USER_ROLES:
-          emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-          Users.setdefault(emailAddress, DEFAULT_USER.copy())
-          Users[emailAddress][role] += 1
-      elif v == 'group':
-        if role in GROUP_ROLES:
-          emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-          Groups.setdefault(emailAddress, DEFAULT_GROUP.copy())
-          Groups[emailAddress][role] += 1
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'deleted'], quotechar=QUOTE_CHAR)
+for row in inputCSV:
+  for v, role, emailAddress, deleted in inputCSV.permissions(row):
+    if deleted == 'True':
+      continue
+    if v == 'user':
+      if role in USER_ROLES:
+        emailAddress = emailAddress.lower()
+        Users.setdefault(emailAddress, DEFAULT_USER.copy())
+        Users[emailAddress][role] += 1
+    elif v == 'group':
+      if role in GROUP_ROLES:
+        emailAddress = emailAddress.lower()
+        Groups.setdefault(emailAddress, DEFAULT_GROUP.copy())
+        Groups[emailAddress][role] += 1
 inputFile.close()
 
 for k, v in sorted(iter(Users.items())):
@@ -23,17 +23,16 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 FILE_NAME = 'name'
 ALT_FILE_NAME = 'title'
 
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -47,19 +46,21 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress'], quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType')
+for row in inputCSV:
   permissionIds = []
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if v != 'user' or row[f'permissions.{permissions_N}.role'] != 'owner' or row.get(f'permissions.{permissions_N}.emailAddress', '') != row['owners.0.emailAddress']:
-        permissionIds.append(row[f'permissions.{permissions_N}.id'])
+  for v, permissionId, role, emailAddress in inputCSV.permissions(row):
+    if v != 'user' or role != 'owner' or (emailAddress or '') != getOwner(row):
+      permissionIds.append(permissionId)
   if permissionIds:
-    outputCSV.writerow({'Owner': row['owners.0.emailAddress'],
-                        'driveFileId': row['id'],
-                        'driveFileTitle': row.get(FILE_NAME, row.get(ALT_FILE_NAME, 'Unknown')),
-                        'mimeType': row['mimeType'],
+    outputCSV.writerow({'Owner': getOwner(row),
+                        'driveFileId': getFileId(row),
+                        'driveFileTitle': getFileTitle(row),
+                        'mimeType': getMimeType(row),
                         'permissionIds': ','.join(permissionIds)})
 
 if inputFile != sys.stdin:
@@ -30,11 +30,15 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader
+
 # Substitute your internal domain(s) in the list below, e.g., DOMAIN_LIST = ['domain.com',] DOMAIN_LIST = ['domain1.com', 'domain2.com',]
 DOMAIN_LIST = ['domain.com',]
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 
 # For GAMADV-XTD3 with drive_v3_native_names = false
 #LINK_FIELD = 'withLink'
@@ -43,6 +47,9 @@ DOMAIN_LIST = ['domain.com',]
 LINK_FIELD = 'allowFileDiscovery'
 LINK_VALUE = 'False'
 
+# Set PARALLEL_READ = True to parse a large input file with multiple processes; the counts are the same, see ShardedCSVReader.py
+PARALLEL_READ = False
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -81,7 +88,8 @@ COUNT_CATEGORIES = {
   'user': {False: 'externalUser', True: 'internalUser'},
   'deleted': {'group': 'deletedGroup', 'user': 'deletedUser'},
   }
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
+
+domainClassifier = DomainClassifier(DOMAIN_LIST, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -96,35 +104,36 @@ else:
   inputFile = sys.stdin
 
 userShareCounts = {}
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  owner = row['owners.0.emailAddress']
+inputCSV = DrivePermissionsReader(inputFile, ['role', 'emailAddress', 'domain', 'deleted', LINK_FIELD], quotechar=QUOTE_CHAR, parallel=PARALLEL_READ, ordered=False)
+if inputCSV.permissionsNs and not inputCSV.hasPermissionField(LINK_FIELD):
+  sys.stderr.write(f'WARNING: no permissions.N.{LINK_FIELD} columns in the input file, the {LINK_FIELD} counts will be 0; check LINK_FIELD\n')
+getOwner = inputCSV.getter('owners.0.emailAddress')
+for row in inputCSV:
+  owner = getOwner(row)
   userShareCounts.setdefault(owner, zeroCounts.copy())
   counterSet = {TOTAL_COUNTER: False, SHARED_COUNTER: False, SHARED_EXTERNAL_COUNTER: False, SHARED_INTERNAL_COUNTER: False}
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      if row[f'permissions.{permissions_N}.role'] == 'owner':
-        incrementCounter(TOTAL_COUNTER)
+  for v, role, emailAddress, domain, deleted, linkValue in inputCSV.permissions(row):
+    if role == 'owner':
+      incrementCounter(TOTAL_COUNTER)
+    else:
+      incrementCounter(SHARED_COUNTER)
+      if v == 'anyone':
+        incrementCounter(SHARED_EXTERNAL_COUNTER)
+        userShareCounts[owner][COUNT_CATEGORIES[v][linkValue == LINK_VALUE]] += 1
       else:
-        incrementCounter(SHARED_COUNTER)
-        if v == 'anyone':
-          incrementCounter(SHARED_EXTERNAL_COUNTER)
-          userShareCounts[owner][COUNT_CATEGORIES[v][row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE]] += 1
-        else:
-          domain = row.get(f'permissions.{permissions_N}.domain', '').lower()
-          if not domain and v in ['user', 'group']:
-            if row.get(f'permissions.{permissions_N}.deleted') == 'True':
-              userShareCounts[owner][COUNT_CATEGORIES['deleted'][v]] += 1
-              continue
-            emailAddress = row[f'permissions.{permissions_N}.emailAddress'].lower()
-            domain = emailAddress[emailAddress.find('@')+1:]
-          internal = domain in DOMAIN_LIST
-          incrementCounter([SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER][internal])
-          if v == 'domain':
-            userShareCounts[owner][COUNT_CATEGORIES[v][internal][row[f'permissions.{permissions_N}.{LINK_FIELD}'] == LINK_VALUE]] += 1
-          else: # group, user
-            userShareCounts[owner][COUNT_CATEGORIES[v][internal]] += 1
+        domain = (domain or '').lower()
+        if not domain and v in ['user', 'group']:
+          if deleted == 'True':
+            userShareCounts[owner][COUNT_CATEGORIES['deleted'][v]] += 1
+            continue
+          emailAddress = emailAddress.lower()
+          domain = emailAddress[emailAddress.find('@')+1:]
+        internal = domainClassifier.inDomains(domain)
+        incrementCounter([SHARED_EXTERNAL_COUNTER, SHARED_INTERNAL_COUNTER][internal])
+        if v == 'domain':
+          userShareCounts[owner][COUNT_CATEGORIES[v][internal][linkValue == LINK_VALUE]] += 1
+        else: # group, user
+          userShareCounts[owner][COUNT_CATEGORIES[v][internal]] += 1
 for owner, counts in sorted(iter(userShareCounts.items())):
   row = {'Owner': owner}
   row.update(counts)
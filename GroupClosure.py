@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared transitive closure of nested group membership used by scripts that show the groups a group or user
+#          is effectively a member of, e.g., ConvertGroupUsersToUserGroupParents.py, ShowNestedGroupTree.py
+#          Group emails are interned to integers; the ancestors (groups that contain a group directly or indirectly)
+#          and descendants (groups contained directly or indirectly) of every group are computed once,
+#          without recursion, by collapsing cycles into strongly connected components and combining the sets of the
+#          components in topological order. A group in a cycle is its own ancestor and descendant.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  groupClosure = GroupClosure()
+#  for row in csv.DictReader(inputFile):
+#    if row['type'] == 'GROUP':
+#      groupClosure.addMember(row['group'], row['email'])
+#  groupClosure.ancestors('child@domain.com')      # The groups child@domain.com is effectively a member of
+#  groupClosure.descendants('parent@domain.com')   # The groups that are effectively members of parent@domain.com
+#  groupClosure.effectiveGroups(['group1@domain.com', 'group2@domain.com'])  # The groups of a user who is a direct member of group1/group2
+#
+#  Emails are used as given; lowercase them first if the input may vary in case.
+"""
+
+class GroupClosure():
+  """Nested group membership with memoized transitive closures."""
+
+  def __init__(self):
+    self.ids = {}
+    self.emails = []
+    self.parents = [] # Per group id, the ids of the groups it is a direct member of
+    self.children = [] # Per group id, the ids of the groups that are direct members of it
+    self._ancestors = None
+    self._descendants = None
+
+  def intern(self, email):
+    """Return the integer id of group email, adding the group if necessary."""
+    groupId = self.ids.get(email)
+    if groupId is None:
+      groupId = self.ids[email] = len(self.emails)
+      self.emails.append(email)
+      self.parents.append([])
+      self.children.append([])
+      self._ancestors = self._descendants = None
+    return groupId
+
+  def addGroup(self, email):
+    """Add group email, which may have no members that are groups."""
+    self.intern(email)
+
+  def addMember(self, groupEmail, memberEmail):
+    """Add group memberEmail as a direct member of group groupEmail."""
+    groupId = self.intern(groupEmail)
+    memberId = self.intern(memberEmail)
+    self.children[groupId].append(memberId)
+    self.parents[memberId].append(groupId)
+    self._ancestors = self._descendants = None
+
+  def __contains__(self, email):
+    return email in self.ids
+
+  def __iter__(self):
+    return iter(self.emails)
+
+  def _components(self):
+    """Return the strongly connected components of the parent graph, each a list of ids, ancestors before descendants.
+
+    This is Tarjan's algorithm with an explicit stack; it emits a component only after every component reachable
+    from it, i.e., the components of a group's ancestors are emitted before the group's component.
+    """
+    index = [None]*len(self.emails)
+    lowLink = [0]*len(self.emails)
+    onStack = [False]*len(self.emails)
+    stack = []
+    components = []
+    counter = 0
+    for root in range(len(self.emails)):
+      if index[root] is not None:
+        continue
+      work = [(root, 0)]
+      while work:
+        node, edge = work.pop()
+        if edge == 0:
+          index[node] = lowLink[node] = counter
+          counter += 1
+          stack.append(node)
+          onStack[node] = True
+        parents = self.parents[node]
+        while edge < len(parents):
+          parent = parents[edge]
+          edge += 1
+          if index[parent] is None:
+            work.append((node, edge))
+            work.append((parent, 0))
+            break
+          if onStack[parent]:
+            lowLink[node] = min(lowLink[node], index[parent])
+        else:
+          if lowLink[node] == index[node]:
+            component = []
+            while True:
+              member = stack.pop()
+              onStack[member] = False
+              component.append(member)
+              if member == node:
+                break
+            components.append(component)
+          if work:
+            caller = work[-1][0]
+            lowLink[caller] = min(lowLink[caller], lowLink[node])
+    return components
+
+  def _closure(self, components, edges):
+    """Return per id the frozenset of ids reachable through edges; components must list the reachable components first."""
+    componentOf = [0]*len(self.emails)
+    for componentNum, component in enumerate(components):
+      for member in component:
+        componentOf[member] = componentNum
+    reachable = [None]*len(components)
+    closure = [None]*len(self.emails)
+    for componentNum, component in enumerate(components):
+      ids = set()
+      cyclic = len(component) > 1
+      for member in component:
+        for other in edges[member]:
+          otherComponent = componentOf[other]
+          if otherComponent == componentNum:
+            cyclic = True
+          elif other not in ids:
+            ids.add(other)
+            ids.update(reachable[otherComponent])
+      if cyclic:
+        ids.update(component)
+      reachable[componentNum] = frozenset(ids)
+      for member in component:
+        closure[member] = reachable[componentNum]
+    return closure
+
+  def _computeAncestors(self):
+    if self._ancestors is None:
+      self._ancestors = self._closure(self._components(), self.parents)
+    return self._ancestors
+
+  def _computeDescendants(self):
+    if self._descendants is None:
+      self._descendants = self._closure(list(reversed(self._components())), self.children)
+    return self._descendants
+
+  def ancestorIds(self, email):
+    """Return the frozenset of ids of the groups that email is directly or indirectly a member of."""
+    groupId = self.ids.get(email)
+    if groupId is None:
+      return frozenset()
+    return self._computeAncestors()[groupId]
+
+  def descendantIds(self, email):
+    """Return the frozenset of ids of the groups that are directly or indirectly members of email."""
+    groupId = self.ids.get(email)
+    if groupId is None:
+      return frozenset()
+    return self._computeDescendants()[groupId]
+
+  def ancestors(self, email):
+    """Return a sorted list of the groups that group email is directly or indirectly a member of."""
+    return sorted(self.emails[groupId] for groupId in self.ancestorIds(email))
+
+  def descendants(self, email):
+    """Return a sorted list of the groups that are directly or indirectly members of group email."""
+    return sorted(self.emails[groupId] for groupId in self.descendantIds(email))
+
+  def effectiveGroups(self, groupEmails):
+    """Return a sorted list of the groups that a direct member of groupEmails is effectively a member of."""
+    ids = set()
+    for email in groupEmails:
+      groupId = self.ids.get(email)
+      if groupId is not None:
+        ids.add(groupId)
+        ids.update(self._computeAncestors()[groupId])
+    return sorted(self.emails[groupId] for groupId in ids)
+
+  def isCyclic(self, email):
+    """Return True if group email is directly or indirectly a member of itself."""
+    groupId = self.ids.get(email)
+    return groupId is not None and groupId in self._computeAncestors()[groupId]
+
+  def parentsOf(self, email):
+    """Return a list of the groups that group email is a direct member of."""
+    groupId = self.ids.get(email)
+    return [self.emails[parentId] for parentId in self.parents[groupId]] if groupId is not None else []
+
+  def childrenOf(self, email):
+    """Return a list of the groups that are direct members of group email."""
+    groupId = self.ids.get(email)
+    return [self.emails[childId] for childId in self.children[groupId]] if groupId is not None else []
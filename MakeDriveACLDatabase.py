@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Load a list of Drive file ACLs into an indexed SQLite database that can be queried repeatedly with QueryDriveACLDatabase.py
+#          rather than reading the CSV file again for each report.
+#          The database has a files table, one row per row of the CSV file keyed by fileRow, and a permissions table,
+#          one row per file permission keyed by (fileRow, N), with indexes on type, role, emailAddress and domain.
+#          emailAddress and domain are lowercased; the domain of a user/group permission is the domain of its emailAddress.
+#          allowFileDiscovery of an anyone/domain permission is derived from withLink if allowFileDiscovery is not present.
+#          A file that appears more than once in the list, e.g., it is shared with several of the users, is stored for each row
+#          in which it appears, as the CSV scripts report it for each row.
+#          The SHA-256 hash of the CSV file is stored in the database; if the same file is loaded again, it is skipped.
+#          Loading a different file replaces the contents of the database.
+# Customize: BATCH_SIZE
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Get ACLs for all files, if you don't want all users, replace all users with your user selection in the command below
+#  $ gam config auto_batch_min 1 redirect csv ./filelistperms.csv multiprocess all users print filelist fields id,name,permissions,owners.emailaddress,mimetype
+# 2: Load the ACLs into a database
+#  $ python3 MakeDriveACLDatabase.py filelistperms.csv DriveACLs.db
+# 3: Query the database, see QueryDriveACLDatabase.py
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db SharedWithAnyone anyoneperms.csv
+"""
+
+import hashlib
+import sqlite3
+import sys
+
+from DrivePermissionsReader import DrivePermissionsReader, getAllowFileDiscovery
+
+FILE_NAME = 'name'
+ALT_FILE_NAME = 'title'
+
+BATCH_SIZE = 10000 # Number of rows inserted by each executemany
+
+QUOTE_CHAR = '"' # Adjust as needed
+
+SNAPSHOT_SCHEMA = 'CREATE TABLE IF NOT EXISTS snapshot (sourceFile TEXT, sha256 TEXT, files INTEGER, permissions INTEGER)'
+# The files and permissions tables are made again by each load; a database with a different SCHEMA_VERSION, PRAGMA user_version,
+# is always loaded again
+SCHEMA_VERSION = 2
+SCHEMA = [
+  'DROP TABLE IF EXISTS files',
+  'DROP TABLE IF EXISTS permissions',
+  'CREATE TABLE files (fileRow INTEGER PRIMARY KEY, fileId TEXT, name TEXT, owner TEXT, mimeType TEXT)',
+  '''CREATE TABLE permissions (fileRow INTEGER, N INTEGER, permissionId TEXT, type TEXT, role TEXT,
+                              emailAddress TEXT, domain TEXT, allowFileDiscovery TEXT, deleted TEXT,
+                              PRIMARY KEY (fileRow, N)) WITHOUT ROWID''',
+  ]
+# Created after the rows are inserted, which is faster than maintaining them during the load
+INDEXED_PERMISSION_COLUMNS = ['type', 'role', 'emailAddress', 'domain']
+
+def fileHash(fileName):
+  sha256 = hashlib.sha256()
+  with open(fileName, 'rb') as f:
+    while True:
+      block = f.read(1024*1024)
+      if not block:
+        break
+      sha256.update(block)
+  return sha256.hexdigest()
+
+inputFileName = sys.argv[1]
+databaseFileName = sys.argv[2]
+
+sha256 = fileHash(inputFileName)
+db = sqlite3.connect(databaseFileName, isolation_level=None)
+db.execute(SNAPSHOT_SCHEMA)
+snapshot = db.execute('SELECT sourceFile, files, permissions FROM snapshot WHERE sha256 = ?', (sha256,)).fetchone()
+if snapshot and db.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION:
+  sys.stdout.write(f'{inputFileName} is unchanged, already loaded from {snapshot[0]}: {snapshot[1]} files, {snapshot[2]} permissions\n')
+  db.close()
+  sys.exit(0)
+
+# The load is one transaction with the default rollback journal, so an interrupted run leaves the previous snapshot
+db.execute('PRAGMA synchronous = NORMAL')
+db.execute('BEGIN')
+db.execute('DELETE FROM snapshot')
+for statement in SCHEMA:
+  db.execute(statement)
+db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+inputFile = open(inputFileName, 'r', encoding='utf-8')
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'domain', 'allowFileDiscovery', 'withLink', 'deleted'],
+                                  quotechar=QUOTE_CHAR)
+getOwner = inputCSV.getter('owners.0.emailAddress', default='')
+getFileId = inputCSV.getter('id')
+getFileTitle = inputCSV.getter(FILE_NAME, ALT_FILE_NAME, default='Unknown')
+getMimeType = inputCSV.getter('mimeType', default='')
+
+fileRows = []
+permissionRows = []
+
+def insertRows():
+  db.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?)', fileRows)
+  db.executemany('INSERT INTO permissions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', permissionRows)
+  fileRows.clear()
+  permissionRows.clear()
+
+for fileRow, row in enumerate(inputCSV, start=1):
+  fileRows.append((fileRow, getFileId(row), getFileTitle(row), getOwner(row), getMimeType(row)))
+  for permissions_N, (v, permissionId, role, emailAddress, domain, allowFileDiscovery, withLink, deleted) in inputCSV.numberedPermissions(row):
+    if v in ['user', 'group']:
+      emailAddress = (emailAddress or '').lower()
+      domain = emailAddress[emailAddress.find('@')+1:]
+      allowFileDiscovery = None
+    else:
+      emailAddress = None
+      domain = (domain or '').lower() if v == 'domain' else None
+      allowFileDiscovery = getAllowFileDiscovery(allowFileDiscovery, withLink)
+    permissionRows.append((fileRow, int(permissions_N), permissionId, v, role, emailAddress, domain, allowFileDiscovery, deleted))
+  if len(permissionRows) >= BATCH_SIZE or len(fileRows) >= BATCH_SIZE:
+    insertRows()
+insertRows()
+inputFile.close()
+
+for column in INDEXED_PERMISSION_COLUMNS:
+  db.execute(f'CREATE INDEX permissions_{column} ON permissions ({column})')
+fileCount = db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+permissionCount = db.execute('SELECT COUNT(*) FROM permissions').fetchone()[0]
+db.execute('INSERT INTO snapshot VALUES (?, ?, ?, ?)', (inputFileName, sha256, fileCount, permissionCount))
+db.execute('COMMIT')
+db.execute('ANALYZE')
+db.close()
+sys.stdout.write(f'Loaded {inputFileName}: {fileCount} files, {permissionCount} permissions\n')
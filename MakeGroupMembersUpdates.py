@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Make a CSV that shows the changes required to update current group memberships to match desired group memberships
-# Customize: Set CURRENT, DESIRED and OUTPUT field names
+# Customize: Set CURRENT, DESIRED and OUTPUT field names, INPUT_ORDER
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -19,7 +19,13 @@
 """
 
 import csv
+import itertools
+import operator
+import os
 import sys
+import tempfile
+
+from ExternalSort import externalSort
 
 CURRENT_INPUT_GROUP = 'group'
 CURRENT_INPUT_ROLE = 'role'
@@ -55,74 +61,101 @@ SEARCH_ROLE_LISTS = {
   ROLE_OWNER: [ROLE_MEMBER, ROLE_MANAGER]
   }
 
+# How the input files are ordered
+# UNSORTED: the files are in any order; both are read into memory
+# SORTED: both files are sorted by group, as gam print group-members outputs them; the groups are processed one at a time
+#   so memory is bounded by the size of the largest group
+# SORT: the files are in any order; both are sorted by group with a bounded-memory external sort and then processed as for SORTED
+# With SORTED and SORT, the updates are written to a temporary file in the directory of GroupUpdates.csv that replaces it
+# only if there are no errors in either file; if there are errors, GroupUpdates.csv is not changed
+UNSORTED = 'unsorted'
+SORTED = 'sorted'
+SORT = 'sort'
+INPUT_ORDER = UNSORTED
+
+MAX_ROWS = 1000000 # With INPUT_ORDER = SORT, rows sorted in memory at a time; reduce to use less memory
+TEMP_DIR = None # With INPUT_ORDER = SORT, directory for temporary files; None = the system temporary directory
+
 DELIMITER = ' '
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-def findDesiredRole(pgroup, pemail, rolesList, items):
+def findDesiredRole(desiredGroup, pemail, rolesList, items):
   for prole in rolesList:
-    if pemail in DesiredGroups[pgroup][prole]:
+    if pemail in desiredGroup[prole]:
       items[prole].append(pemail)
       return
 
-sysRC = 0
-CurrentGroups = {}
-currentFile = open(sys.argv[1], 'r', encoding='utf-8')
-for row in csv.DictReader(currentFile, quotechar=QUOTE_CHAR):
-  group = row[CURRENT_INPUT_GROUP].lower()
-  CurrentGroups.setdefault(group, {ROLE_MEMBER: set(), ROLE_MANAGER: set(), ROLE_OWNER: set(), 'ALL': set()})
-  email = row[CURRENT_INPUT_EMAIL].lower()
-  role = row[CURRENT_INPUT_ROLE].upper()
-  if role not in ROLES_SET:
-    sys.stderr.write(f'ERROR: File: {currentFile}, Group: {group}, Email: {email}, Role: {role} Invalid\n')
-    sysRC = 1
-    continue
-  if DESIRED_INPUT_ROLE:
-    CurrentGroups[group][role].add(email)
-  CurrentGroups[group]['ALL'].add(email)
-currentFile.close()
-if sysRC:
-  sys.exit(sysRC)
+def newGroup():
+  return {ROLE_MEMBER: set(), ROLE_MANAGER: set(), ROLE_OWNER: set(), 'ALL': set()}
 
-DesiredGroups = {}
-desiredFile = open(sys.argv[2], 'r', encoding='utf-8')
-for row in csv.DictReader(desiredFile, quotechar=QUOTE_CHAR):
-  group = row[DESIRED_INPUT_GROUP].lower()
-  DesiredGroups.setdefault(group, {ROLE_MEMBER: set(), ROLE_MANAGER: set(), ROLE_OWNER: set(), 'ALL': set()})
-  email = row[DESIRED_INPUT_EMAIL].lower()
-  if DESIRED_INPUT_ROLE:
-    role = row[DESIRED_INPUT_ROLE].upper()
-    if role not in ROLES_SET:
-      sys.stderr.write(f'ERROR: File: {desiredFile}, Group: {group}, Email: {email}, Role: {role} Invalid\n')
-      sysRC = 2
-      continue
-    DesiredGroups[group][role].add(email)
-  DesiredGroups[group]['ALL'].add(email)
-desiredFile.close()
-if sysRC:
-  sys.exit(sysRC)
+def readMembers(fileName, groupField, emailField, roleField, errorRC):
+  """Yield (group, email, role) for each row of fileName; role is None if roleField is ''.
 
-outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
-outputCSV = csv.DictWriter(outputFile, [OUTPUT_ACTION, OUTPUT_GROUP, OUTPUT_ROLE, OUTPUT_MEMBERS], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+  With INPUT_ORDER = SORT, the rows are sorted by group first; with INPUT_ORDER = SORTED, the rows must already be sorted by group.
+  """
+  global sysRC
+  with open(fileName, 'r', encoding='utf-8') as inputFile:
+    inputCSV = csv.reader(inputFile, quotechar=QUOTE_CHAR)
+    fieldnames = next(inputCSV, [])
+    groupIndex = fieldnames.index(groupField)
+    emailIndex = fieldnames.index(emailField)
+    roleIndex = fieldnames.index(roleField) if roleField else None
+    rows = filter(None, inputCSV)
+    if INPUT_ORDER == SORT:
+      rows = externalSort(rows, key=lambda row: row[groupIndex].lower(), maxRows=MAX_ROWS, tempDir=TEMP_DIR)
+    for row in rows:
+      group = row[groupIndex].lower()
+      email = row[emailIndex].lower()
+      role = row[roleIndex].upper() if roleIndex is not None else None
+      if role is not None and role not in ROLES_SET:
+        sys.stderr.write(f'ERROR: File: {fileName}, Group: {group}, Email: {email}, Role: {role} Invalid\n')
+        sysRC = errorRC
+        continue
+      yield group, email, role
+
+def addMember(groupMembers, email, role, useRole):
+  if useRole:
+    groupMembers[role].add(email)
+  groupMembers['ALL'].add(email)
 
-for group in sorted(CurrentGroups):
-  if group not in DesiredGroups:
-    continue
+def readGroups(fileName, groupField, emailField, roleField, useRole, errorRC):
+  """Return a dictionary of the members of each group in fileName."""
+  groups = {}
+  for group, email, role in readMembers(fileName, groupField, emailField, roleField, errorRC):
+    addMember(groups.setdefault(group, newGroup()), email, role, useRole)
+  return groups
+
+def streamGroups(fileName, groupField, emailField, roleField, useRole, errorRC):
+  """Yield (group, members) for each group in fileName, which is read one group at a time."""
+  global sysRC
+  lastGroup = None
+  for group, members in itertools.groupby(readMembers(fileName, groupField, emailField, roleField, errorRC), key=operator.itemgetter(0)):
+    if lastGroup is not None and group <= lastGroup:
+      sys.stderr.write(f'ERROR: File: {fileName}, Group: {group} follows Group: {lastGroup}, file is not sorted by group; set INPUT_ORDER = SORT\n')
+      sysRC = errorRC
+      return
+    lastGroup = group
+    groupMembers = newGroup()
+    for _, email, role in members:
+      addMember(groupMembers, email, role, useRole)
+    yield group, groupMembers
+
+def writeGroupUpdates(group, currentGroup, desiredGroup):
 # Deletes are independent of role
-  deletes = CurrentGroups[group]['ALL']-DesiredGroups[group]['ALL']
+  deletes = currentGroup['ALL']-desiredGroup['ALL']
   if deletes:
     outputCSV.writerow({OUTPUT_ACTION: ACTION_DELETE,
                         OUTPUT_GROUP: group,
                         OUTPUT_ROLE: ROLE_MEMBER,
                         OUTPUT_MEMBERS: DELIMITER.join(deletes)})
-  adds = DesiredGroups[group]['ALL']-CurrentGroups[group]['ALL']
+  adds = desiredGroup['ALL']-currentGroup['ALL']
   if adds:
     addItems = {ROLE_MEMBER: [], ROLE_MANAGER: [], ROLE_OWNER: []}
     if DESIRED_INPUT_ROLE:
 # There are only role adds if desired role is set
       for email in adds:
-        findDesiredRole(group, email, ROLES_LIST, addItems)
+        findDesiredRole(desiredGroup, email, ROLES_LIST, addItems)
       for role in ROLES_LIST:
         if addItems[role]:
           outputCSV.writerow({OUTPUT_ACTION: ACTION_ADD,
@@ -140,10 +173,10 @@ for group in sorted(CurrentGroups):
   if DESIRED_INPUT_ROLE:
     updateItems = {ROLE_MEMBER: [], ROLE_MANAGER: [], ROLE_OWNER: []}
     for role in ROLES_LIST:
-      updates = CurrentGroups[group][role]-DesiredGroups[group][role]
+      updates = currentGroup[role]-desiredGroup[role]
       for email in updates:
         if email not in deletes:
-          findDesiredRole(group, email, SEARCH_ROLE_LISTS[role], updateItems)
+          findDesiredRole(desiredGroup, email, SEARCH_ROLE_LISTS[role], updateItems)
     for role in ROLES_LIST:
       if updateItems[role]:
         outputCSV.writerow({OUTPUT_ACTION: ACTION_UPDATE,
@@ -151,4 +184,60 @@ for group in sorted(CurrentGroups):
                             OUTPUT_ROLE: role,
                             OUTPUT_MEMBERS: DELIMITER.join(updateItems[role])})
 
-outputFile.close()
+sysRC = 0
+if INPUT_ORDER == UNSORTED:
+  CurrentGroups = readGroups(sys.argv[1], CURRENT_INPUT_GROUP, CURRENT_INPUT_EMAIL, CURRENT_INPUT_ROLE, DESIRED_INPUT_ROLE, 1)
+  if sysRC:
+    sys.exit(sysRC)
+  DesiredGroups = readGroups(sys.argv[2], DESIRED_INPUT_GROUP, DESIRED_INPUT_EMAIL, DESIRED_INPUT_ROLE, DESIRED_INPUT_ROLE, 2)
+  if sysRC:
+    sys.exit(sysRC)
+
+if INPUT_ORDER == UNSORTED:
+  outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
+else:
+  # The files are checked as the updates are written; an invalid role or an unsorted file must not leave
+  # a partial set of updates, e.g., a delete of a member whose row was invalid
+  fd, tempFileName = tempfile.mkstemp(prefix='GroupUpdates', suffix='.csv', dir=os.path.dirname(os.path.abspath(sys.argv[3])))
+  outputFile = open(fd, 'w', encoding='utf-8', newline='')
+outputCSV = csv.DictWriter(outputFile, [OUTPUT_ACTION, OUTPUT_GROUP, OUTPUT_ROLE, OUTPUT_MEMBERS], lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writeheader()
+
+if INPUT_ORDER == UNSORTED:
+  for group in sorted(CurrentGroups):
+    if group not in DesiredGroups:
+      continue
+    writeGroupUpdates(group, CurrentGroups[group], DesiredGroups[group])
+  outputFile.close()
+else:
+# Merge the groups of both files; only groups in both files are updated
+  completed = False
+  try:
+    currentGroups = streamGroups(sys.argv[1], CURRENT_INPUT_GROUP, CURRENT_INPUT_EMAIL, CURRENT_INPUT_ROLE, DESIRED_INPUT_ROLE, 1)
+    desiredGroups = streamGroups(sys.argv[2], DESIRED_INPUT_GROUP, DESIRED_INPUT_EMAIL, DESIRED_INPUT_ROLE, DESIRED_INPUT_ROLE, 2)
+    current = next(currentGroups, None)
+    desired = next(desiredGroups, None)
+    while current is not None and desired is not None:
+      if current[0] < desired[0]:
+        current = next(currentGroups, None)
+      elif desired[0] < current[0]:
+        desired = next(desiredGroups, None)
+      else:
+        writeGroupUpdates(current[0], current[1], desired[1])
+        current = next(currentGroups, None)
+        desired = next(desiredGroups, None)
+# Read the rest of both files to check them for errors
+    for _ in currentGroups:
+      pass
+    for _ in desiredGroups:
+      pass
+    completed = not sysRC
+  finally:
+    outputFile.close()
+    if completed:
+      os.replace(tempFileName, sys.argv[3])
+    else:
+      os.remove(tempFileName)
+
+if sysRC:
+  sys.exit(sysRC)
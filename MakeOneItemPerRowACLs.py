@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Convert output from print filelist to put one ACL per row; you can filter for specific ACLs.
-# Customize: Set USER_LIST, GROUP_LIST. DOMAIN_LIST, ROLE_LIST, TYPE_LIST, DESIRED_ALLOWFILEDISCOVERY,
+# Customize: Set USER_LIST, GROUP_LIST. DOMAIN_LIST, INCLUDE_SUBDOMAINS, ROLE_LIST, TYPE_LIST, DESIRED_ALLOWFILEDISCOVERY,
 #	DROP_GENERAL_COLUMNS, DROP_PERMISSION_COLUMNS.
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
@@ -15,9 +15,11 @@
 """
 
 import csv
-import re
 import sys
 
+from DomainClassifier import DomainClassifier
+from DrivePermissionsReader import DrivePermissionsReader, PERMISSIONS_N_FIELD
+
 # Specify specific user(s), e.g., USER_LIST = ['user1@domain.com'] USER_LIST = ['user1@domain.com', 'user2@domain.com']
 # The list should be empty if you're only specifiying domains in DOMAIN_LIST, e.g. USER_LIST = []
 USER_LIST = []
@@ -29,6 +31,8 @@ GROUP_LIST = []
 # Specify specific domain(s) if you want all groups/users in the domain, e.g., DOMAIN_LIST = ['domain.com'] DOMAIN_LIST = ['domain1.com', 'domain2.com']
 # The list should be empty if you're only specifiying groups in GROUP_LIST or users in USER_LIST, e.g. DOMAIN__LIST = []
 DOMAIN_LIST = []
+# Set INCLUDE_SUBDOMAINS = True to also match subdomains of the domains in DOMAIN_LIST, e.g., sub.domain.com matches domain.com
+INCLUDE_SUBDOMAINS = False
 
 # Specify specific permission role value(s) ('owner', 'organizer', 'fileOrganizer', 'writer', 'commenter', 'reader'), e.g., ROLE_LIST = ['writer', 'commenter', 'reader']
 # The list should be empty if you want all roles, e.g, ROLE_LIST = []
@@ -54,7 +58,7 @@ DROP_PERMISSION_COLUMNS = ['photoLink']
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_FIELD = re.compile(r"permissions.(\d+).(.+)")
+domainClassifier = DomainClassifier(DOMAIN_LIST, includeSubdomains=INCLUDE_SUBDOMAINS)
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
@@ -66,10 +70,11 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
+inputCSV = DrivePermissionsReader(inputFile, quotechar=QUOTE_CHAR)
 permissionFields = set()
 inputFieldnames = []
-for fieldname in inputCSV.fieldnames:
+generalColumns = []
+for i, fieldname in enumerate(inputCSV.fieldnames):
   mg = PERMISSIONS_N_FIELD.match(fieldname)
   if mg:
     field = mg.group(2)
@@ -78,22 +83,22 @@ for fieldname in inputCSV.fieldnames:
       inputFieldnames.append(f'permission.{field}')
   elif not DROP_GENERAL_COLUMNS or fieldname not in DROP_GENERAL_COLUMNS:
     inputFieldnames.append(fieldname)
+    generalColumns.append((fieldname, i))
+# For each permission: all of its columns, for filtering, and the columns to output
+permissionColumns = []
+for fieldIndexes in inputCSV.fieldIndexes.values():
+  permissionColumns.append((list(fieldIndexes.items()),
+                            [(f'permission.{field}', i) for field, i in sorted(fieldIndexes.items())
+                             if not DROP_PERMISSION_COLUMNS or field not in DROP_PERMISSION_COLUMNS]))
+getWithLink = inputCSV.getter('withLink', default='')
 
 outputCSV = csv.DictWriter(outputFile, inputFieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
 
 for row in inputCSV:
-  baseRow = {}
-  permissions = {}
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_FIELD.match(k)
-    if mg:
-      permissions_N = mg.group(1)
-      permissions.setdefault(permissions_N, {})
-      permissions[permissions_N][mg.group(2)] = v
-    elif not DROP_GENERAL_COLUMNS or k not in DROP_GENERAL_COLUMNS:
-      baseRow[k] = v
-  for k, v in iter(permissions.items()):
+  baseRow = {k: row[i] for k, i in generalColumns}
+  for columns, outputColumns in permissionColumns:
+    v = {field: row[i] for field, i in columns}
     newRow = baseRow.copy()
     if ROLE_LIST and v['role'] not in ROLE_LIST:
       continue
@@ -105,33 +110,32 @@ for row in inputCSV:
     if vtype == 'user':
       emailAddress = v['emailAddress'].lower()
       domain = emailAddress[emailAddress.find('@')+1:]
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
+      if DOMAIN_LIST and not domainClassifier.inDomains(domain):
         continue
       if USER_LIST and emailAddress not in USER_LIST:
         continue
     elif vtype == 'group':
       emailAddress = v['emailAddress'].lower()
       domain = emailAddress[emailAddress.find('@')+1:]
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
+      if DOMAIN_LIST and not domainClassifier.inDomains(domain):
         continue
       if GROUP_LIST and emailAddress not in GROUP_LIST:
         continue
     elif vtype == 'domain':
       domain = v['domain'].lower()
-      if DOMAIN_LIST and domain not in DOMAIN_LIST:
+      if DOMAIN_LIST and not domainClassifier.inDomains(domain):
         continue
       if DESIRED_ALLOWFILEDISCOVERY != 'Any':
-        allowFileDiscovery = v.get('allowFileDiscovery', str(row.get('withLink', '') == 'False'))
+        allowFileDiscovery = v.get('allowFileDiscovery', str(getWithLink(row) == 'False'))
         if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
           continue
     else: # vtype == 'anyone'
       if DESIRED_ALLOWFILEDISCOVERY != 'Any':
-        allowFileDiscovery = v.get('allowFileDiscovery', str(row.get('withLink', '') == 'False'))
+        allowFileDiscovery = v.get('allowFileDiscovery', str(getWithLink(row) == 'False'))
         if DESIRED_ALLOWFILEDISCOVERY != allowFileDiscovery:
           continue
-    for kp, kv in sorted(v.items()):
-      if not DROP_PERMISSION_COLUMNS or kp not in DROP_PERMISSION_COLUMNS:
-        newRow[f'permission.{kp}'] = kv
+    for kp, i in outputColumns:
+      newRow[kp] = row[i]
     outputCSV.writerow(newRow)
 
 if inputFile != sys.stdin:
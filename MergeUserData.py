@@ -4,13 +4,14 @@
 # Methodology:
 # A data CSV file is read and each row is stored in a dictionary under the key row[DATA_KEY_FIELD]
 # A merge CSV file is read and row[MERGE_KEY_FIELD] is looked up in the data dictionary
+# If the data CSV file has more than MAX_ROWS rows, both files are sorted by key on disk and matched instead, see CSVJoin.py
 # If the data row is found, the data row and merge row are combined and written to the output CSV file
 # If the data row is not found, an error message is generated if enabled
 # If a merge CSV file column header matches a data CSV file column header, ".merge" is appended to the
 # merge column header in the output CSV file
 #
 # Customize: DATA_KEY_FIELD, MERGE_KEY_FIELD, RETAIN_MERGE_KEY_FIELD, MERGE_RETAIN_FIELDS,
-#	     SHOW_ERROR_ON_NO_DATA_ROW, OUTPUT_UNMERGED_DATA
+#	     SHOW_ERROR_ON_NO_DATA_ROW, OUTPUT_UNMERGED_DATA, MAX_ROWS
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -23,8 +24,11 @@
 """
 
 import csv
+import operator
 import sys
 
+from CSVJoin import CSVJoin
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
@@ -45,31 +49,52 @@ SHOW_ERROR_ON_NO_DATA_ROW = True
 # Should data rows that have not been merged be output
 OUTPUT_UNMERGED_DATA = False
 
-userData = {}
+MAX_ROWS = 1000000 # Data rows held in memory; beyond this, the files are sorted on disk
+TEMP_DIR = None # Directory for temporary files; None = the system temporary directory
+
+def readRows(inputCSV, numFields):
+  # Pad short rows as csv.DictReader does
+  for row in filter(None, inputCSV):
+    if len(row) < numFields:
+      row.extend(['']*(numFields-len(row)))
+    yield row
+
+def readMergeRows(inputCSV, numFields):
+  for row in readRows(inputCSV, numFields):
+    if LOWERCASE_KEY_FIELDS:
+      row[mergeKeyIndex] = row[mergeKeyIndex].lower()
+    yield row
+
+def getDataKey(row):
+  return row[dataKeyIndex].lower() if LOWERCASE_KEY_FIELDS else row[dataKeyIndex]
+
+def getDataRow(row):
+  if LOWERCASE_KEY_FIELDS:
+    row[dataKeyIndex] = row[dataKeyIndex].lower()
+  return row
+
 dataFileName = sys.argv[1]
 dataFile = open(dataFileName, 'r', encoding='utf-8')
-dataCSV = csv.DictReader(dataFile, quotechar=QUOTE_CHAR)
-dataFieldNames = dataCSV.fieldnames[:]
+dataCSV = csv.reader(dataFile, quotechar=QUOTE_CHAR)
+dataFieldNames = next(dataCSV)
 if DATA_KEY_FIELD not in dataFieldNames:
   sys.stderr.write(f'Data key field {DATA_KEY_FIELD} is not in {dataFileName} headers: {",".join(dataFieldNames)}\n')
   sys.exit(1)
-for row in dataCSV:
-  if LOWERCASE_KEY_FIELDS:
-    row[DATA_KEY_FIELD] = row[DATA_KEY_FIELD].lower()
-  userData[row[DATA_KEY_FIELD]] = row
+dataKeyIndex = dataFieldNames.index(DATA_KEY_FIELD)
+userData = CSVJoin(readRows(dataCSV, len(dataFieldNames)), getDataKey, getDataRow, MAX_ROWS, TEMP_DIR)
 dataFile.close()
 
 mergeFileName = sys.argv[2]
 mergeFile = open(mergeFileName, 'r', encoding='utf-8')
-mergeCSV = csv.DictReader(mergeFile, quotechar=QUOTE_CHAR)
-mergeFieldNames = mergeCSV.fieldnames[:]
+mergeCSV = csv.reader(mergeFile, quotechar=QUOTE_CHAR)
+mergeFieldNames = next(mergeCSV)
 if MERGE_KEY_FIELD not in mergeFieldNames:
   sys.stderr.write(f'Merge key field {MERGE_KEY_FIELD} is not in {mergeFileName} headers: {",".join(mergeFieldNames)}\n')
   sys.exit(1)
 
 errors = 0
 if not MERGE_RETAIN_FIELDS:
-  mergeRetainFields = mergeFieldNames
+  mergeRetainFields = mergeFieldNames[:]
 else:
   mergeRetainFields = []
   for fieldName in MERGE_RETAIN_FIELDS:
@@ -96,27 +121,23 @@ for fieldName in mergeRetainFields:
 
 outputFileName = sys.argv[3]
 outputFile = open(outputFileName, 'w', encoding='utf-8', newline='')
-outputCSV = csv.DictWriter(outputFile, outputFieldNames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
-outputCSV.writeheader()
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(outputFieldNames)
 
-outputData = {}
+mergeKeyIndex = mergeFieldNames.index(MERGE_KEY_FIELD)
+mergeRetainIndexes = [mergeFieldNames.index(fieldName) for fieldName in mergeFieldNameMap]
 errors = False
-for row in mergeCSV:
-  if LOWERCASE_KEY_FIELDS:
-    row[MERGE_KEY_FIELD] = row[MERGE_KEY_FIELD].lower()
-  k = row[MERGE_KEY_FIELD]
-  if k in userData:
-    orow = userData.pop(k)
-    for fieldName, mappedFieldName  in mergeFieldNameMap.items():
-      orow[mappedFieldName] = row[fieldName]
-    outputData[k] = orow
-  elif SHOW_ERROR_ON_NO_DATA_ROW:
+# Each data row is merged with the first merge row with its key; the output is sorted by key
+for k, dataRow, mergeRows in userData.sortedGroups(readMergeRows(mergeCSV, len(mergeFieldNames)), operator.itemgetter(mergeKeyIndex)):
+  if dataRow is not None and mergeRows:
+    outputCSV.writerow([*dataRow, *[mergeRows[0][i] for i in mergeRetainIndexes]])
+    mergeRows = mergeRows[1:]
+  elif dataRow is not None and OUTPUT_UNMERGED_DATA:
+    outputCSV.writerow([*dataRow, *['']*len(mergeRetainIndexes)])
+  if mergeRows and SHOW_ERROR_ON_NO_DATA_ROW:
     errors = 1
-    sys.stderr.write(f'Merge key field {row[MERGE_KEY_FIELD]} in {mergeFileName} does not occur in {dataFileName}\n')
-if OUTPUT_UNMERGED_DATA:
-  outputData.update(userData)
-for _, v in sorted(iter(outputData.items())):
-  outputCSV.writerow(v)
+    for _ in mergeRows:
+      sys.stderr.write(f'Merge key field {k} in {mergeFileName} does not occur in {dataFileName}\n')
 
 mergeFile.close()
 outputFile.close()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared Org Unit tree used by PrintOrgUnitTree.py, GetOrgUnitUserCounts.py, GetOrgUnitCrOSCounts.py
+#          and GetOrgUnitUserCrOSCounts.py
+#          The Org Units from gam print ous are read once into a tree of orgUnitPaths; the Org Unit of a user/device
+#          that is not in the file is added, with any missing parents, rather than causing an error.
+#          Counts are added to the Org Unit of each user/device; the counts including sub-OUs of all Org Units
+#          are computed together in one bottom-up pass over the tree.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  orgUnitTree = OrgUnitTree.fromFile('OrgUnits.csv', quotechar=QUOTE_CHAR)
+#  orgUnitTree.addCount(row['orgUnitPath'], 'users')
+#  orgUnitTree.getCounts('/Students')['users']             # Users in /Students
+#  orgUnitTree.getSubOUCounts()['/Students']['users']      # Users in /Students and its sub-OUs
+#  for orgUnitPath, depth in orgUnitTree.walk():           # All Org Units, parents before children, for an indented tree
+#    ...
+#
+#  For CSV files with a column per count, countFieldnames(), countRows() and totalsRow() make the rows:
+#  the Org Units in the Org Units file or with counts sorted by orgUnitPath, or with tree=True, all Org Units in tree order
+#  with the Org Unit name indented in column orgUnit; with subOUCounts=True, columns includeSubOUs.<field> are added.
+"""
+
+import collections
+import csv
+import sys
+
+ROOT_PATH = '/'
+TREE_FIELD = 'orgUnit'
+SUB_OU_PREFIX = 'includeSubOUs.'
+
+def parentPath(orgUnitPath):
+  """Return the orgUnitPath of the parent of orgUnitPath; None for /."""
+  if orgUnitPath == ROOT_PATH:
+    return None
+  separator = orgUnitPath.rfind('/')
+  return orgUnitPath[:separator] if separator > 0 else ROOT_PATH
+
+def orgUnitName(orgUnitPath):
+  """Return the last component of orgUnitPath; / for /."""
+  if orgUnitPath == ROOT_PATH:
+    return ROOT_PATH
+  return orgUnitPath[orgUnitPath.rfind('/')+1:]
+
+class OrgUnitTree():
+  """The Org Unit tree and the counts of each Org Unit."""
+
+  def __init__(self):
+    self.children = {ROOT_PATH: []} # orgUnitPath -> list of child orgUnitPaths
+    self.listed = {} # The orgUnitPaths in the Org Units file or with counts, in the order added
+    self.counts = {} # orgUnitPath -> collections.Counter
+    self._subOUCounts = None
+
+  def addOrgUnit(self, orgUnitPath, listed=True):
+    """Add orgUnitPath and any of its parents that are missing."""
+    if listed:
+      self.listed.setdefault(orgUnitPath, None)
+    child = None
+    while orgUnitPath not in self.children:
+      self.children[orgUnitPath] = [child] if child is not None else []
+      child = orgUnitPath
+      orgUnitPath = parentPath(orgUnitPath)
+    if child is not None:
+      self.children[orgUnitPath].append(child)
+    self._subOUCounts = None
+
+  @classmethod
+  def fromFile(cls, fileName, **kwargs):
+    """Return the tree of the Org Units in the gam print ous CSV file fileName; kwargs are passed to csv.DictReader, e.g., quotechar=QUOTE_CHAR."""
+    orgUnitTree = cls()
+    with open(fileName, 'r', encoding='utf-8') as inputFile:
+      inputCSV = csv.DictReader(inputFile, **kwargs)
+      inputFieldNames = inputCSV.fieldnames or []
+      if 'orgUnitPath' not in inputFieldNames:
+        sys.stderr.write(f'Error: no header orgUnitPath in Org Units file {fileName} field names: {",".join(inputFieldNames)}\n')
+        sys.exit(1)
+      for row in inputCSV:
+        orgUnitTree.addOrgUnit(row['orgUnitPath'])
+    return orgUnitTree
+
+  def addCount(self, orgUnitPath, key, count=1):
+    """Add count to the key count of orgUnitPath."""
+    counts = self.counts.get(orgUnitPath)
+    if counts is None:
+      self.addOrgUnit(orgUnitPath)
+      counts = self.counts[orgUnitPath] = collections.Counter()
+    counts[key] += count
+    self._subOUCounts = None
+
+  def getCounts(self, orgUnitPath):
+    """Return the counts of orgUnitPath, not including its sub-OUs."""
+    return self.counts.get(orgUnitPath, collections.Counter())
+
+  def walk(self):
+    """Yield (orgUnitPath, depth) for all Org Units, each before its sub-OUs, the sub-OUs sorted by orgUnitPath; / has depth 0."""
+    stack = [(ROOT_PATH, 0)]
+    while stack:
+      orgUnitPath, depth = stack.pop()
+      yield orgUnitPath, depth
+      stack.extend((child, depth+1) for child in sorted(self.children[orgUnitPath], reverse=True))
+
+  def getSubOUCounts(self):
+    """Return a dictionary of orgUnitPath -> the counts of the Org Unit including its sub-OUs."""
+    if self._subOUCounts is None:
+      # In reverse tree order, each Org Unit comes after all of its sub-OUs, so its counts are complete
+      # when they are added to its parent
+      subOUCounts = {}
+      for orgUnitPath, _ in reversed(list(self.walk())):
+        counts = subOUCounts.setdefault(orgUnitPath, collections.Counter())
+        counts.update(self.getCounts(orgUnitPath))
+        parent = parentPath(orgUnitPath)
+        if parent is not None:
+          subOUCounts.setdefault(parent, collections.Counter()).update(counts)
+      self._subOUCounts = subOUCounts
+    return self._subOUCounts
+
+  def sortedOrgUnitPaths(self):
+    """Return the orgUnitPaths in the Org Units file or with counts, sorted."""
+    return sorted(self.listed)
+
+  @staticmethod
+  def countFieldnames(countFields, subOUCounts=False, tree=False):
+    """Return the CSV fieldnames for countRows()."""
+    fieldnames = [TREE_FIELD] if tree else []
+    fieldnames.append('orgUnitPath')
+    fieldnames.extend(countFields)
+    if subOUCounts:
+      fieldnames.extend(SUB_OU_PREFIX+field for field in countFields)
+    return fieldnames
+
+  def countRows(self, countFields, subOUCounts=False, tree=False, indent='  '):
+    """Yield a CSV row of the countFields counts of each Org Unit."""
+    if tree:
+      orgUnitPaths = self.walk()
+    else:
+      orgUnitPaths = ((orgUnitPath, 0) for orgUnitPath in self.sortedOrgUnitPaths())
+    allSubOUCounts = self.getSubOUCounts() if subOUCounts else None
+    for orgUnitPath, depth in orgUnitPaths:
+      counts = self.getCounts(orgUnitPath)
+      row = {'orgUnitPath': orgUnitPath}
+      if tree:
+        row[TREE_FIELD] = indent*depth+orgUnitName(orgUnitPath)
+      for field in countFields:
+        row[field] = counts[field]
+      if subOUCounts:
+        orgUnitCounts = allSubOUCounts[orgUnitPath]
+        for field in countFields:
+          row[SUB_OU_PREFIX+field] = orgUnitCounts[field]
+      yield row
+
+  def totalsRow(self, countFields, subOUCounts=False):
+    """Return the CSV row of the countFields counts of all Org Units."""
+    totals = self.getSubOUCounts()[ROOT_PATH]
+    row = {'orgUnitPath': 'Totals'}
+    for field in countFields:
+      row[field] = totals[field]
+      if subOUCounts:
+        row[SUB_OU_PREFIX+field] = totals[field]
+    return row
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: Print an Org Unit tree with Users/CrOS devices fields
-# Customize: Change QUOTE_CHAR, SHOW_EMPTY_OUS, SHOW_LABELS, FIELD_DELIMITER, INDENT_SPACES, LINE_TERMINATOR as required/desired
+# Customize: Change QUOTE_CHAR, SHOW_EMPTY_OUS, SHOW_LABELS, SHOW_TREE, SHOW_SUB_OU_TOTALS, FIELD_DELIMITER, INDENT_SPACES, LINE_TERMINATOR as required/desired
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -19,38 +19,50 @@
 #  $ gam print users fields primaryEmail,orgunitpath,name | python PrintOrgUnitTree.py ./OrgUnits.csv - ./OrgUnitTree.txt
 # 5: You can select subsets of Users/CrOS devices; this requires an additional API call per User/CrOS device to get the specified fields
 #  $ gam group students print users fields primaryEmail,orgunitpath,name | python PrintOrgUnitTree.py ./OrgUnits.csv - ./OrgUnitTree.txt
+#
+# An Org Unit of a User/CrOS device that is not in OrgUnits.csv is added; see OrgUnitTree.py
 """
 
 import csv
 import sys
 
+from OrgUnitTree import OrgUnitTree, orgUnitName, ROOT_PATH
+
 QUOTE_CHAR = '"' # Adjust as needed to properly read CSV files
 
 SHOW_EMPTY_OUS = True # Should empty OUs be displayed
 SHOW_LABELS = True # Should field labels be displayed
 SELECTED_FIELDS = [] # Only display selected fields ['primaryEmail',] ['deviceId', 'notes']
+# True - Display the Org Unit names indented under their parents; an Org Unit is empty if it and its sub-OUs have no Users/CrOS devices
+# False - Display the Org Unit paths in the order of OrgUnits.csv
+SHOW_TREE = True
+SHOW_SUB_OU_TOTALS = False # Should the count of Users/CrOS devices in each Org Unit and its sub-OUs be displayed
 FIELD_DELIMITER = ', '# Delimiter between fields
 INDENT_SPACES = '  ' # How much to indent data
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-orgUnits = ['/',]
-orgUnitsTree = {'/': []}
+orgUnitRows = {}
+
+def writeOrgUnit(orgUnitPath, name, depth):
+  count = orgUnitTree.getCounts(orgUnitPath)['count']
+  subOUCount = subOUCounts[orgUnitPath]['count']
+  if SHOW_EMPTY_OUS or (subOUCount if SHOW_TREE else count) > 0:
+    if SHOW_SUB_OU_TOTALS:
+      outputFile.write(f'{INDENT_SPACES*depth}{name}: {count}, including sub-OUs: {subOUCount}{LINE_TERMINATOR}')
+    else:
+      outputFile.write(f'{INDENT_SPACES*depth}{name}: {count}{LINE_TERMINATOR}')
+    for child in orgUnitRows.get(orgUnitPath, []):
+      if SHOW_LABELS:
+        outputFile.write(INDENT_SPACES*(depth+1)+FIELD_DELIMITER.join([f'{field}: {child[field]}' for field in fieldNames])+LINE_TERMINATOR)
+      else:
+        outputFile.write(INDENT_SPACES*(depth+1)+FIELD_DELIMITER.join([child[field] for field in fieldNames])+LINE_TERMINATOR)
 
 if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
   outputFile = open(sys.argv[3], 'w', newline='')
 else:
   outputFile = sys.stdout
 
-inputFile = open(sys.argv[1], 'r', encoding='utf-8')
-inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
-inputFieldNames = inputCSV.fieldnames
-if 'orgUnitPath' not in inputFieldNames:
-  sys.stderr.write(f'Error: no header orgUnitPath in Org Units file {sys.argv[1]} field names: {",".join(inputFieldNames)}\n')
-  sys.exit(1)
-for row in inputCSV:
-  orgUnits.append(row['orgUnitPath'])
-  orgUnitsTree[row['orgUnitPath']] = []
-inputFile.close()
+orgUnitTree = OrgUnitTree.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
 
 if sys.argv[2] != '-':
   inputFile = open(sys.argv[2], 'r', encoding='utf-8')
@@ -75,20 +87,20 @@ if 'orgUnitPath' not in inputFieldNames:
   sys.stderr.write(f'Error: no header orgUnitPath in Data file {sys.argv[2]} field names: {",".join(inputFieldNames)}\n')
   sys.exit(4)
 for row in inputCSV:
-  if row['orgUnitPath'] is not None:
-    orgUnitsTree[row['orgUnitPath']].append(row)
+  orgUnitPath = row['orgUnitPath']
+  if orgUnitPath is not None:
+    orgUnitTree.addCount(orgUnitPath, 'count')
+    orgUnitRows.setdefault(orgUnitPath, []).append(row)
 if inputFile != sys.stdin:
   inputFile.close()
 
-for orgUnitPath in orgUnits:
-  count = len(orgUnitsTree[orgUnitPath])
-  if SHOW_EMPTY_OUS or count > 0:
-    outputFile.write(f'{orgUnitPath}: {count}\n')
-    if count > 0:
-      for child in orgUnitsTree[orgUnitPath]:
-        if SHOW_LABELS:
-          outputFile.write(INDENT_SPACES+FIELD_DELIMITER.join([f'{field}: {child[field]}' for field in fieldNames])+LINE_TERMINATOR)
-        else:
-          outputFile.write(INDENT_SPACES+FIELD_DELIMITER.join([child[field] for field in fieldNames])+LINE_TERMINATOR)
+subOUCounts = orgUnitTree.getSubOUCounts()
+if SHOW_TREE:
+  for orgUnitPath, depth in orgUnitTree.walk():
+    writeOrgUnit(orgUnitPath, orgUnitName(orgUnitPath), depth)
+else:
+  # / and then the Org Units in the order of OrgUnits.csv, followed by those only in the Data file
+  for orgUnitPath in [ROOT_PATH]+[orgUnitPath for orgUnitPath in orgUnitTree.listed if orgUnitPath != ROOT_PATH]:
+    writeOrgUnit(orgUnitPath, orgUnitPath, 0)
 if outputFile != sys.stdout:
   outputFile.close()
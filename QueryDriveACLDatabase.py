@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Query a database of Drive file ACLs made by MakeDriveACLDatabase.py; output a CSV file with headers
+#          "Owner,driveFileId,driveFileTitle,mimeType,permissionId,role,type,emailAddress,domain,allowFileDiscovery"
+#          Specify the name of one of the queries in QUERIES or an SQL condition on the columns of the files and permissions tables.
+#          files: fileRow, fileId, name, owner, mimeType
+#          permissions: fileRow, N, permissionId, type, role, emailAddress, domain, allowFileDiscovery, deleted
+#          Parameters used by a query are specified as name=value; the values of LIST_PARAMETERS are comma separated lists.
+# Customize: QUERIES
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+# 1: Load the ACLs into a database, see MakeDriveACLDatabase.py
+#  $ python3 MakeDriveACLDatabase.py filelistperms.csv DriveACLs.db
+# 2: Query the database
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db SharedWithAnyone anyoneperms.csv
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db SharedWithDomain domainperms.csv domains=domain1.com,domain2.com
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db NonDomain nondomainperms.csv domains=domain.com
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db TypeWithLink anyonewithlinkperms.csv type=anyone
+#  $ python3 QueryDriveACLDatabase.py DriveACLs.db "type = 'group' AND role = 'writer'" groupwriterperms.csv
+# 3: Inspect the output, verify that it makes sense and then proceed
+# 4: If desired, delete the ACLs
+#  $ gam csv ./deleteperms.csv gam user "~Owner" delete drivefileacl "~driveFileId" "~permissionId"
+"""
+
+import csv
+import json
+import sqlite3
+import sys
+
+QUERIES = {
+  # As GetSharedWithAnyoneDriveACLs.py
+  'SharedWithAnyone': "type = 'anyone'",
+  # As GetSharedWithDomainDriveACLs.py; domains limits the domains, e.g., domains=domain1.com,domain2.com
+  'SharedWithDomain': "type = 'domain' AND (:domains = '[]' OR domain IN (SELECT value FROM json_each(:domains)))",
+  # As GetSharedWithGroupDriveACLs.py; specify emailAddresses and/or domains
+  'SharedWithGroup': ("type = 'group' AND deleted IS NOT 'True' AND "
+                      "(emailAddress IN (SELECT value FROM json_each(:emailAddresses)) OR domain IN (SELECT value FROM json_each(:domains)))"),
+  # As GetSharedWithUserDriveACLs.py; specify emailAddresses and/or domains
+  'SharedWithUser': ("type = 'user' AND deleted IS NOT 'True' AND "
+                     "(emailAddress IN (SELECT value FROM json_each(:emailAddresses)) OR domain IN (SELECT value FROM json_each(:domains)))"),
+  # As GetNonDomainDriveACLs.py; domains are your internal domains, e.g., domains=domain1.com,domain2.com
+  'NonDomain': ("type = 'anyone' OR "
+                "((type = 'domain' OR (type IN ('user', 'group') AND deleted IS NOT 'True')) AND "
+                "domain NOT IN (SELECT value FROM json_each(:domains)))"),
+  # As GetTypeWithLinkDriveACLs.py; type=anyone or type=domain
+  'TypeWithLink': "type = :type AND allowFileDiscovery = 'False'",
+  }
+LIST_PARAMETERS = ['domains', 'emailAddresses']
+
+QUOTE_CHAR = '"' # Adjust as needed
+LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
+
+SELECT = '''SELECT owner, fileId, name, mimeType, 'id:' || permissionId, role, type,
+                   IFNULL(emailAddress, ''), IFNULL(domain, ''), IFNULL(allowFileDiscovery, '')
+            FROM permissions JOIN files USING (fileRow)
+            WHERE {0}
+            ORDER BY fileRow, N'''
+
+db = sqlite3.connect(f'file:{sys.argv[1]}?mode=ro', uri=True)
+query = QUERIES.get(sys.argv[2], sys.argv[2])
+parameters = {name: '[]' for name in LIST_PARAMETERS}
+for arg in sys.argv[4:]:
+  name, _, value = arg.partition('=')
+  if name in LIST_PARAMETERS:
+    parameters[name] = json.dumps([item.strip().lower() for item in value.split(',') if item.strip()])
+  else:
+    parameters[name] = value
+
+if (len(sys.argv) > 3) and (sys.argv[3] != '-'):
+  outputFile = open(sys.argv[3], 'w', encoding='utf-8', newline='')
+else:
+  outputFile = sys.stdout
+outputCSV = csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
+outputCSV.writerow(['Owner', 'driveFileId', 'driveFileTitle', 'mimeType',
+                    'permissionId', 'role', 'type', 'emailAddress', 'domain', 'allowFileDiscovery'])
+
+try:
+  cursor = db.execute(SELECT.format(query), parameters)
+except sqlite3.Error as e:
+  sys.stderr.write(f'Error: query {sys.argv[2]}: {e}\n')
+  sys.exit(1)
+while True:
+  rows = cursor.fetchmany(10000)
+  if not rows:
+    break
+  outputCSV.writerows(rows)
+
+db.close()
+if outputFile != sys.stdout:
+  outputFile.close()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 # Purpose: For a Google Drive User(s), delete all files except those in selected top level folders
-# Customize: Set PATHS_TO_SAVE
+# Customize: Set PATHS_TO_SAVE or PATHS_TO_SAVE_HEADER
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -11,29 +11,80 @@
 #    These fields are required: fields id,name,owners.emailaddress
 #    You can add additional fields that will be preserved in the output.
 #  $ gam config auto_batch_min 1 redirect csv ./UserFiles.csv multiprocess all users print filelist fields id,name,owners.emailaddress fullpath
+#    fullpath makes GAM get the parents of every file, which is slow for many files; instead, the paths can be built
+#    from the parents of the files in the list, see DrivePathResolver.py; the input file can't be stdin.
+#    showownedby any includes the folders owned by others that contain the files of a user
+#  $ gam redirect csv ./UserFiles.csv multiprocess all users print filelist showownedby any fields id,name,owners.emailaddress,parents
+#    A file whose path can't be resolved, e.g., a parent folder is not in the list, is not deleted; a warning is written to stderr
 # 2: From that list of files, output a CSV file with the same headers as the input CSV file
 #    that lists the drive file Ids that are not in the selected top level folders
 #  $ python3 SelectiveDelete.py ./UserFiles.csv ./DeleteFiles.csv
+#    For a long list of paths to save, put them in a CSV file with header PATHS_TO_SAVE_HEADER rather than in PATHS_TO_SAVE
+#  $ python3 SelectiveDelete.py ./UserFiles.csv ./DeleteFiles.csv ./PathsToSave.csv
 # 3: Inspect DeleteFiles.csv, verify that it makes sense and then proceed
 # 4: Delete the  files
 #  $ gam redirect stdout ./DeleteFiles.log multiprocess redirect stderr stdout csv ./DetelteFiles.csv gam user "~owners.0.emailAddress" delete drivefile "~id"
 """
 
+import bisect
 import csv
 import sys
 
+from DrivePathResolver import DrivePathResolver, hasParentColumns
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
 # ['My Drive/xxx'] or ['My Drive/xxx', 'My Drive/yyy']
+# A file is saved if any of its paths starts with one of these; 'My Drive/xxx' also saves 'My Drive/xxx2', use 'My Drive/xxx/' if that is not wanted
 PATHS_TO_SAVE = []
+PATHS_TO_SAVE_HEADER = 'path' # Header of the column of paths to save in the optional PathsToSave CSV file
+
+def makePathTrie(paths):
+  # The paths are split into components; a node is [{component: child node}, sorted final components].
+  # A path starts with a prefix if all but the last component of the prefix match exactly and the last is a prefix of the next component.
+  trie = [{}, []]
+  for prefix in paths:
+    node = trie
+    *components, lastComponent = prefix.split('/')
+    for component in components:
+      node = node[0].setdefault(component, [{}, []])
+    node[1].append(lastComponent)
+  # Drop final components that start with another final component; for the rest, a component starts with
+  # one of them only if it starts with the largest one that is not greater than it
+  nodes = [trie]
+  while nodes:
+    node = nodes.pop()
+    prefixes = []
+    for lastComponent in sorted(set(node[1])):
+      if not prefixes or not lastComponent.startswith(prefixes[-1]):
+        prefixes.append(lastComponent)
+    node[1] = prefixes
+    nodes.extend(node[0].values())
+  return trie
 
-def pathToSave(crow):
-  for i in range(0, int(crow['paths'])):
-    path = crow[f'path.{i}']
-    for p in PATHS_TO_SAVE:
-      if path.startswith(p):
+def startsWithPathToSave(path):
+  node = pathTrie
+  for component in path.split('/'):
+    prefixes = node[1]
+    if prefixes:
+      i = bisect.bisect_right(prefixes, component)
+      if i and component.startswith(prefixes[i-1]):
         return True
+    node = node[0].get(component)
+    if node is None:
+      return False
+  return False
+
+def rowPaths(crow):
+  if pathResolver:
+    return pathResolver.paths(crow['id'])
+  return [crow[f'path.{i}'] for i in range(0, int(crow['paths']))]
+
+def pathToSave(paths):
+  for path in paths:
+    if startsWithPathToSave(path):
+      return True
   return False
 
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
@@ -45,12 +96,29 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
+pathsToSave = list(PATHS_TO_SAVE)
+if len(sys.argv) > 3:
+  with open(sys.argv[3], 'r', encoding='utf-8') as f:
+    pathsToSave.extend(row[PATHS_TO_SAVE_HEADER] for row in csv.DictReader(f, quotechar=QUOTE_CHAR) if row[PATHS_TO_SAVE_HEADER])
+pathTrie = makePathTrie(pathsToSave)
+
 inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
 outputCSV = csv.DictWriter(outputFile, inputCSV.fieldnames, lineterminator=LINE_TERMINATOR, quotechar=QUOTE_CHAR)
 outputCSV.writeheader()
+pathResolver = None
+if 'paths' not in inputCSV.fieldnames and hasParentColumns(inputCSV.fieldnames):
+  if inputFile == sys.stdin:
+    sys.stderr.write('ERROR: Resolving paths from parents reads the input file twice, it can not be stdin\n')
+    sys.exit(1)
+  pathResolver = DrivePathResolver.fromFile(sys.argv[1], quotechar=QUOTE_CHAR)
 
 for row in inputCSV:
-  if not pathToSave(row):
+  paths = rowPaths(row)
+  if pathResolver and not paths:
+    # Without a path, the file can't be checked against PATHS_TO_SAVE
+    sys.stderr.write(f'WARNING: File: {row["id"]}, path can not be resolved from parents, not deleted\n')
+    continue
+  if not pathToSave(paths):
     outputCSV.writerow(row)
 if inputFile != sys.stdin:
   inputFile.close()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Shared CSV reader that parses a large file in parallel, e.g., a multi-GB filelistperms.csv.
+#          The file is split into byte ranges (shards) that are parsed by a pool of processes; the rows are returned
+#          in their original order or, for scripts that only aggregate, in the order the shards are completed.
+#          Shards always start at the beginning of a record: a newline only ends a record if it is preceded
+#          by an even number of quote characters, so fields with embedded newlines, e.g., file titles
+#          and event descriptions, are never split.
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  This file is not run directly; keep it in the same directory as the scripts that import it.
+#
+#  inputCSV = ShardedCSVReader(inputFile, quotechar=QUOTE_CHAR)
+#  for row in inputCSV:
+#    ...
+#
+#  To aggregate in the worker processes rather than returning every row, pass a function of the rows of a shard
+#  that is defined at the top level of the script; its results, one per shard, are returned in no particular order,
+#  or in file order with ordered=True:
+#  for counts in inputCSV.mapShards(countRows):
+#    ...
+#
+#  The rows are lists as returned by csv.reader; inputCSV.fieldnames is the header row. Blank rows are skipped as csv.DictReader does.
+#  If the input is not a regular file, e.g., stdin, or processes can't be forked, e.g., on Windows, the file is read by a single csv.reader.
+#  The file is read twice: once to count quote characters and once to parse the shards.
+#  Quote characters within a field must be doubled and the field quoted, as GAM and csv.writer do.
+"""
+
+import collections
+import csv
+import io
+import multiprocessing
+import os
+import queue
+import re
+
+SHARD_SIZE = 16*1024*1024 # Bytes per shard
+BLOCK_SIZE = 1024*1024 # Bytes per read when counting quotes and finding record starts
+
+def _newlines(text):
+  # The scripts open files with universal newlines; translate \r\n and \r the same way
+  if '\r' in text:
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+  return text
+
+def _countQuotes(fileName, start, end, quote):
+  count = 0
+  with open(fileName, 'rb') as f:
+    f.seek(start)
+    while start < end:
+      block = f.read(min(BLOCK_SIZE, end-start))
+      if not block:
+        break
+      count += block.count(quote)
+      start += len(block)
+  return count
+
+def _findRecordStart(f, offset, inQuotes, quote):
+  """Return the offset following the first newline at or after offset that is not within a quoted field."""
+  separators = re.compile(re.escape(quote)+b'|\n')
+  f.seek(offset)
+  while True:
+    block = f.read(BLOCK_SIZE)
+    if not block:
+      return offset
+    for mg in separators.finditer(block):
+      if mg.group() == quote:
+        inQuotes = not inQuotes
+      elif not inQuotes:
+        return offset+mg.end()
+    offset += len(block)
+
+def _parseShard(fileName, start, end, encoding, kwargs):
+  with open(fileName, 'rb') as f:
+    f.seek(start)
+    data = f.read(end-start)
+  return [row for row in csv.reader(io.StringIO(_newlines(data.decode(encoding))), **kwargs) if row]
+
+def _mapShard(args):
+  func, fileName, start, end, encoding, kwargs = args
+  return func(_parseShard(fileName, start, end, encoding, kwargs))
+
+class ShardedCSVReader():
+  """Iterate over the rows of a CSV file, parsing shards of the file in a pool of processes.
+
+  Args:
+    f: the file to read, opened for reading as the scripts do
+    processes: the number of processes; None = the number of CPUs
+    ordered: True = return the rows in file order; False = return the rows of each shard as it is completed
+    shardSize: the approximate number of bytes in each shard
+    encoding: the encoding of the file
+    kwargs: passed to csv.reader, e.g., quotechar=QUOTE_CHAR
+  """
+
+  def __init__(self, f, processes=None, ordered=True, shardSize=SHARD_SIZE, encoding='utf-8', **kwargs):
+    self.f = f
+    self.processes = processes or os.cpu_count() or 1
+    self.ordered = ordered
+    self.encoding = encoding
+    self.kwargs = kwargs
+    self.fileName = getattr(f, 'name', None)
+    if (self.processes > 1 and 'fork' in multiprocessing.get_all_start_methods() and
+        isinstance(self.fileName, str) and os.path.isfile(self.fileName)):
+      quote = kwargs.get('quotechar', '"').encode(encoding)
+      fileSize = os.path.getsize(self.fileName)
+      with open(self.fileName, 'rb') as bf:
+        headerEnd = _findRecordStart(bf, 0, False, quote)
+        bf.seek(0)
+        header = bf.read(headerEnd).decode(encoding)
+      self.fieldnames = next(csv.reader(io.StringIO(_newlines(header)), **kwargs), [])
+      self.shards = self._makeShards(headerEnd, fileSize, max(shardSize, BLOCK_SIZE), quote)
+    else:
+      self.shards = None
+      self.reader = csv.reader(f, **kwargs)
+      self.fieldnames = next(self.reader, [])
+
+  def _makeShards(self, start, end, shardSize, quote):
+    offsets = list(range(start, end, shardSize))
+    if len(offsets) <= 1:
+      return [(start, end)] if start < end else []
+    ranges = list(zip(offsets, offsets[1:]+[end]))
+    with multiprocessing.get_context('fork').Pool(self.processes) as pool:
+      quoteCounts = pool.starmap(_countQuotes, [(self.fileName, s, e, quote) for s, e in ranges])
+    starts = [start]
+    quotes = 0
+    with open(self.fileName, 'rb') as bf:
+      for (s, _), count in zip(ranges[1:], quoteCounts):
+        quotes += count
+        starts.append(max(_findRecordStart(bf, s, quotes % 2 == 1, quote), starts[-1]))
+    starts.append(end)
+    return [(s, e) for s, e in zip(starts, starts[1:]) if s < e]
+
+  def __iter__(self):
+    if self.shards is None:
+      return filter(None, self.reader)
+    return self._shardedRows()
+
+  def _shardedRows(self):
+    # Limit the number of parsed shards waiting to be consumed
+    window = 2*self.processes
+    with multiprocessing.get_context('fork').Pool(self.processes) as pool:
+      if self.ordered:
+        pending = collections.deque()
+        for start, end in self.shards:
+          pending.append(pool.apply_async(_parseShard, (self.fileName, start, end, self.encoding, self.kwargs)))
+          if len(pending) >= window:
+            yield from pending.popleft().get()
+        while pending:
+          yield from pending.popleft().get()
+      else:
+        completed = queue.Queue()
+        inFlight = 0
+        for start, end in self.shards:
+          pool.apply_async(_parseShard, (self.fileName, start, end, self.encoding, self.kwargs),
+                           callback=completed.put, error_callback=completed.put)
+          inFlight += 1
+          while inFlight >= window or (inFlight and not completed.empty()):
+            rows = completed.get()
+            inFlight -= 1
+            if isinstance(rows, BaseException):
+              raise rows
+            yield from rows
+        while inFlight:
+          rows = completed.get()
+          inFlight -= 1
+          if isinstance(rows, BaseException):
+            raise rows
+          yield from rows
+
+  def mapShards(self, func, ordered=False):
+    """Yield func(rows) for the rows of each shard, calling func in the pool of processes; without shards, func is called once for all of the rows.
+
+    ordered: True = yield the results in file order; False = yield the results as the shards are completed
+    """
+    if self.shards is None:
+      yield func(filter(None, self.reader))
+      return
+    with multiprocessing.get_context('fork').Pool(self.processes) as pool:
+      imap = pool.imap if ordered else pool.imap_unordered
+      yield from imap(_mapShard, [(func, self.fileName, start, end, self.encoding, self.kwargs)
+                                  for start, end in self.shards])
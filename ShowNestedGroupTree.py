@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """
 # Purpose: Produce a file to show hierarchial group membership
-# Customize: INDENTED_INDENTATION, JSON_INDENTATION, LIST_DELIMITER
+#          indented: each group followed by the tree of groups nested within it; a group that is nested within itself is marked
+#          list: one line per group, the group followed by all of the groups nested within it, directly or indirectly
+#          json: a list of {group: [all of the groups nested within it, directly or indirectly]}
+# Customize: INDENTED_INDENTATION, JSON_INDENTATION, LIST_DELIMITER, CYCLE_MARKER
 # Python: Use python or python3 below as appropriate to your system; verify that you have version 3
 #  $ python -V   or   python3 -V
 #  Python 3.x.y
@@ -22,6 +25,8 @@ import csv
 import json
 import sys
 
+from GroupClosure import GroupClosure
+
 QUOTE_CHAR = '"' # Adjust as needed
 
 INDENTED = 'indented'
@@ -34,32 +39,31 @@ mode = INDENTED
 INDENTED_INDENTATION = 2
 JSON_INDENTATION = 1
 LIST_DELIMITER = ','
+CYCLE_MARKER = ' (cycle)' # Appended to a group in indented mode that contains itself
 
-def printIndentedGroupTree(email, depth):
-  outputFile.write(' '*depth+email+'\n')
-  for member in sorted(Groups.get(email, [])):
-    if member[1] == 'GROUP':
-      printIndentedGroupTree(member[0], depth+INDENTED_INDENTATION)
+def printIndentedGroupTree(email):
+  # Walk the tree with an explicit stack; a group that contains itself is shown once more, marked, and not expanded
+  path = [email]
+  outputFile.write(email+'\n')
+  stack = [iter(sorted(Groups.get(email, [])))]
+  while stack:
+    member = next(stack[-1], None)
+    if member is None:
+      stack.pop()
+      path.pop()
+      continue
+    if member[1] != 'GROUP':
+      continue
+    depth = len(path)*INDENTED_INDENTATION
+    if member[0] in path:
+      outputFile.write(' '*depth+member[0]+CYCLE_MARKER+'\n')
+      continue
+    outputFile.write(' '*depth+member[0]+'\n')
+    path.append(member[0])
+    stack.append(iter(sorted(Groups.get(member[0], []))))
 
-def printListGroupTree(email, nestedList):
-  nestedList.append(email)
-  memberList = [member[0] for member in sorted(Groups.get(email, [])) if member[1] == 'GROUP']
-  if memberList:
-    for member in memberList:
-      printListGroupTree(member, nestedList)
-      nestedList.pop()
-  else:
-    outputFile.write(LIST_DELIMITER.join(nestedList)+'\n')
-
-def printJSONGroupTree(email, nestedList):
-  nestedList.append(email)
-  memberList = [member[0] for member in sorted(Groups.get(email, [])) if member[1] == 'GROUP']
-  if memberList:
-    for member in memberList:
-      printJSONGroupTree(member, nestedList)
-      nestedList.pop()
-  else:
-    groupJSONList.append({nestedList[0]: nestedList[1:]})
+def nestedGroups(email):
+  return [nestedEmail for nestedEmail in groupClosure.descendants(email) if nestedEmail != email]
 
 Groups = {}
 
@@ -93,22 +97,29 @@ else:
   inputFile = sys.stdin
 inputCSV = csv.DictReader(inputFile, quotechar=QUOTE_CHAR)
 
+groupClosure = GroupClosure()
+for group in Groups:
+  groupClosure.addGroup(group)
 for row in inputCSV:
   group = row['group']
   Groups.setdefault(group, [])
   Groups[group].append((row['email'], row['type']))
+  if row['type'] == 'GROUP':
+    groupClosure.addMember(group, row['email'])
+  else:
+    groupClosure.addGroup(group)
 if mode == INDENTED:
   for group in sorted(Groups):
-    printIndentedGroupTree(group, 0)
+    printIndentedGroupTree(group)
 elif mode == JSON:
   groupJSONList = []
   for group in sorted(Groups):
-    printJSONGroupTree(group, [])
+    groupJSONList.append({group: nestedGroups(group)})
   json.dump(groupJSONList, outputFile, indent=JSON_INDENTATION, sort_keys=True)
   outputFile.write('\n')
 else: # mode == LIST
   for group in sorted(Groups):
-    printListGroupTree(group, [])
+    outputFile.write(LIST_DELIMITER.join([group]+nestedGroups(group))+'\n')
 
 if inputFile != sys.stdin:
   inputFile.close()
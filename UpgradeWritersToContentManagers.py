@@ -18,14 +18,13 @@
 """
 
 import csv
-import re
 import sys
 
+from DrivePermissionsReader import DrivePermissionsReader
+
 QUOTE_CHAR = '"' # Adjust as needed
 LINE_TERMINATOR = '\n' # On Windows, you probably want '\r\n'
 
-PERMISSIONS_N_TYPE = re.compile(r"permissions.(\d+).type")
-
 if (len(sys.argv) > 2) and (sys.argv[2] != '-'):
   outputFile = open(sys.argv[2], 'w', encoding='utf-8', newline='')
 else:
@@ -38,20 +37,18 @@ if (len(sys.argv) > 1) and (sys.argv[1] != '-'):
 else:
   inputFile = sys.stdin
 
-for row in csv.DictReader(inputFile, quotechar=QUOTE_CHAR):
-  for k, v in iter(row.items()):
-    mg = PERMISSIONS_N_TYPE.match(k)
-    if mg and v:
-      permissions_N = mg.group(1)
-      role = row[f'permissions.permissions_N{}.role']
-      if role != 'writer' or v not in ['user', 'group']:
-        continue
-      if row.get(f'permissions.{permissions_N}.deleted')) == 'True':
-        continue
-      outputCSV.writerow({'teamDriveId': row['id'],
-                          'permissionId': f'id:{row[f"permissions.{permissions_N}.id"]}',
-                          'type': v,
-                          'emailAddress': row[f'permissions.{permissions_N}.emailAddress']})
+inputCSV = DrivePermissionsReader(inputFile, ['id', 'role', 'emailAddress', 'deleted'], quotechar=QUOTE_CHAR)
+getTeamDriveId = inputCSV.getter('id')
+for row in inputCSV:
+  for v, permissionId, role, emailAddress, deleted in inputCSV.permissions(row):
+    if role != 'writer' or v not in ['user', 'group']:
+      continue
+    if deleted == 'True':
+      continue
+    outputCSV.writerow({'teamDriveId': getTeamDriveId(row),
+                        'permissionId': f'id:{permissionId}',
+                        'type': v,
+                        'emailAddress': emailAddress})
 
 if inputFile != sys.stdin:
   inputFile.close()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Generate a synthetic CSV file shaped like the output of one of the GAM commands used by the scripts, for benchmarking.
+#          The data is pseudo-random but reproducible: the same kind, number of rows and seed always produce the same file.
+#          Kinds:
+#            filelistperms - print filelist fields id,name,permissions,owners.emailaddress,mimetype fullpath
+#            filelist - print filelist fields id,title,createddate,mimetype,owners.emailaddress,md5checksum,size fullpath; includes duplicate files
+#            groupmembers - print group-members fields email,type,role; groups are nested without cycles
+#            events - print events fields id,summary,attendees
+#            messages - print messages with csv_output_header_filter From
+#            labels - print messages showlabels showsize headers "" delimiter '|'
+#            browsers - print browsers fields browsers,machinename formatjson quotechar "'"
+# Customize: DOMAIN, EXTERNAL_DOMAINS, USERS, GROUPS, MAX_PERMISSIONS, MAX_ATTENDEES
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  $ python3 GenerateBenchmarkData.py <kind> <rows> <OutputFile> [<seed>]
+#  $ python3 GenerateBenchmarkData.py filelistperms 1000000 ./filelistperms.csv
+#  $ python3 GenerateBenchmarkData.py browsers 10000 ./BrowserInfo.csv 42
+"""
+
+import csv
+import hashlib
+import json
+import random
+import sys
+
+DOMAIN = 'domain.com'
+EXTERNAL_DOMAINS = ['partner.net', 'gmail.com', 'example.org', 'vendor.io']
+USERS = 5000 # Number of users in DOMAIN
+GROUPS = 500 # Number of groups in DOMAIN
+MAX_PERMISSIONS = 20 # Maximum permissions per file; sets the number of permissions.N columns
+MAX_PATHS = 2 # Maximum paths per file; sets the number of path.N columns
+MAX_ATTENDEES = 10 # Maximum attendees per event; sets the number of attendees.N columns
+
+QUOTE_CHAR = '"'
+LINE_TERMINATOR = '\n'
+
+MIME_TYPES = ['application/vnd.google-apps.document', 'application/vnd.google-apps.spreadsheet',
+              'application/vnd.google-apps.presentation', 'application/vnd.google-apps.folder',
+              'application/pdf', 'image/jpeg', 'image/png', 'text/plain', 'video/mp4']
+TITLE_WORDS = ['Budget', 'Notes', 'Report', 'Minutes', 'Plan', 'Draft', 'Final', 'Q1', 'Q2', 'Q3', 'Q4',
+               'Project', 'Team', 'Review', 'Copy of', 'Untitled', 'Roadmap', 'Invoice', 'Photo', 'Agenda']
+FOLDERS = ['My Drive', 'Shared', 'Archive', 'Projects', 'Finance', 'HR', 'Marketing', 'Engineering', 'Personal']
+LABELS = ['INBOX', 'UNREAD', 'IMPORTANT', 'CATEGORY_PERSONAL', 'CATEGORY_UPDATES', 'CATEGORY_PROMOTIONS',
+          'CATEGORY_SOCIAL', 'SENT', 'STARRED', 'Label_1', 'Label_2', 'Label_3', 'Receipts', 'Travel', 'Work/Projects']
+EXTENSION_PERMISSIONS = ['storage', 'tabs', 'activeTab', 'identity', 'cookies', 'webRequest', 'downloads', 'notifications']
+
+class Generator():
+  def __init__(self, seed):
+    self.random = random.Random(seed)
+    self.users = [f'user{i}@{DOMAIN}' for i in range(USERS)]
+    self.groups = [f'group{i}@{DOMAIN}' for i in range(GROUPS)]
+    self.externals = [f'ext{i}@{EXTERNAL_DOMAINS[i % len(EXTERNAL_DOMAINS)]}' for i in range(USERS//5)]
+
+  def user(self):
+    # Skew the choice of user so that some users own much more than others, as in a real domain
+    return self.users[int(len(self.users)*self.random.random()**2)]
+
+  def title(self):
+    return ' '.join(self.random.sample(TITLE_WORDS, self.random.randint(1, 3)))+self.random.choice(['', '', ' (1)', ', final', ' "v2"'])
+
+  def path(self, title):
+    depth = self.random.randint(0, 3)
+    return '/'.join([FOLDERS[0]]+self.random.sample(FOLDERS[1:], depth)+[title])
+
+  def timestamp(self):
+    return (f'{self.random.randint(2015, 2024)}-{self.random.randint(1, 12):02d}-{self.random.randint(1, 28):02d}'
+            f'T{self.random.randint(0, 23):02d}:{self.random.randint(0, 59):02d}:{self.random.randint(0, 59):02d}.000Z')
+
+  def permission(self, fileNum, n):
+    kind = self.random.random()
+    if kind < 0.55:
+      permType, emailAddress = 'user', self.random.choice(self.users)
+    elif kind < 0.70:
+      permType, emailAddress = 'user', self.random.choice(self.externals)
+    elif kind < 0.82:
+      permType, emailAddress = 'group', self.random.choice(self.groups)
+    elif kind < 0.92:
+      permType, emailAddress = 'domain', ''
+    else:
+      permType, emailAddress = 'anyone', ''
+    permission = {'id': f'{fileNum}{n:02d}', 'type': permType, 'role': self.random.choice(['reader', 'reader', 'commenter', 'writer'])}
+    if emailAddress:
+      permission['emailAddress'] = emailAddress
+      permission['domain'] = emailAddress[emailAddress.find('@')+1:]
+      permission['deleted'] = 'True' if self.random.random() < 0.01 else 'False'
+    else:
+      if permType == 'domain':
+        permission['domain'] = DOMAIN if self.random.random() < 0.8 else self.random.choice(EXTERNAL_DOMAINS)
+      permission['allowFileDiscovery'] = 'True' if self.random.random() < 0.2 else 'False'
+    return permission
+
+  def filelistperms(self, outputCSV, rows):
+    permissionFields = ['allowFileDiscovery', 'deleted', 'domain', 'emailAddress', 'id', 'role', 'type']
+    header = (['Owner', 'id', 'name', 'mimeType', 'owners.0.emailAddress', 'paths']+[f'path.{i}' for i in range(MAX_PATHS)]+
+              ['permissions']+[f'permissions.{n}.{field}' for n in range(MAX_PERMISSIONS) for field in permissionFields])
+    outputCSV.writerow(header)
+    for fileNum in range(rows):
+      owner = self.user()
+      title = self.title()
+      paths = [self.path(title) for _ in range(self.random.randint(1, MAX_PATHS))]
+      # Most files are private, a few are widely shared
+      numPermissions = min(1+int(self.random.expovariate(0.5)), MAX_PERMISSIONS)
+      row = [owner, f'1{fileNum:032x}', title, self.random.choice(MIME_TYPES), owner, len(paths)]
+      row.extend(paths+['']*(MAX_PATHS-len(paths)))
+      row.append(numPermissions)
+      row.extend(['', 'False', DOMAIN, owner, f'{fileNum}00', 'owner', 'user'])
+      for n in range(1, numPermissions):
+        permission = self.permission(fileNum, n)
+        row.extend(permission.get(field, '') for field in permissionFields)
+      row.extend(['']*(len(header)-len(row)))
+      outputCSV.writerow(row)
+
+  def filelist(self, outputCSV, rows):
+    header = (['Owner', 'id', 'name', 'createdTime', 'mimeType', 'owners.0.emailAddress', 'paths']+[f'path.{i}' for i in range(MAX_PATHS)]+
+              ['md5Checksum', 'size'])
+    outputCSV.writerow(header)
+    previous = []
+    for fileNum in range(rows):
+      # About 10% of the files are copies of an earlier file of the same owner; copies have the same content
+      if previous and self.random.random() < 0.1:
+        owner, title, mimeType, paths, content = self.random.choice(previous)
+      else:
+        owner = self.user()
+        title = self.title()
+        mimeType = self.random.choice(MIME_TYPES)
+        paths = [self.path(title) for _ in range(self.random.randint(1, MAX_PATHS))]
+        content = fileNum
+        if len(previous) < 1000:
+          previous.append((owner, title, mimeType, paths, content))
+        else:
+          previous[self.random.randrange(1000)] = (owner, title, mimeType, paths, content)
+      # Google Docs, Sheets, etc. have no md5Checksum or size
+      if mimeType.startswith('application/vnd.google-apps.'):
+        md5Checksum = size = ''
+      else:
+        md5Checksum = hashlib.md5(str(content).encode()).hexdigest()
+        size = int(md5Checksum[:4], 16)*100
+      outputCSV.writerow([owner, f'1{fileNum:032x}', title, self.timestamp(), mimeType, owner, len(paths)]+
+                         paths+['']*(MAX_PATHS-len(paths))+[md5Checksum, size])
+
+  def groupmembers(self, outputCSV, rows):
+    outputCSV.writerow(['group', 'id', 'role', 'email', 'type', 'status'])
+    # The groups are nested in a tree: each group after the first tenth is a member of one group with a lower number,
+    # so there are no cycles; the nesting rows are spread through the file
+    roots = max(len(self.groups)//10, 1)
+    nesting = [(self.random.randrange(groupNum//2, groupNum), groupNum)
+               for groupNum in range(roots, len(self.groups))]
+    self.random.shuffle(nesting)
+    nestingRate = min(len(nesting)/max(rows, 1), 1.0)
+    for rowNum in range(rows):
+      if nesting and self.random.random() < nestingRate:
+        groupNum, memberNum = nesting.pop()
+        email, memberType = self.groups[memberNum], 'GROUP'
+      else:
+        groupNum = self.random.randrange(len(self.groups))
+        if self.random.random() < 0.1:
+          email, memberType = self.random.choice(self.externals), 'USER'
+        else:
+          email, memberType = self.user(), 'USER'
+      outputCSV.writerow([self.groups[groupNum], f'{rowNum:021d}', self.random.choice(['MEMBER']*18+['MANAGER', 'OWNER']),
+                          email, memberType, 'ACTIVE'])
+
+  def events(self, outputCSV, rows):
+    attendeeFields = ['email', 'displayName', 'responseStatus', 'organizer', 'optional']
+    outputCSV.writerow(['primaryEmail', 'calendarId', 'id', 'summary', 'attendees']+
+                       [f'attendees.{n}.{field}' for n in range(MAX_ATTENDEES) for field in attendeeFields])
+    for eventNum in range(rows):
+      organizer = self.user()
+      attendees = [organizer]+[self.random.choice(self.users if self.random.random() < 0.8 else self.externals)
+                               for _ in range(self.random.randint(0, MAX_ATTENDEES-1))]
+      row = [organizer, organizer, f'{eventNum:026x}', self.title(), len(attendees)]
+      for n, attendee in enumerate(attendees):
+        row.extend([attendee, attendee.split('@')[0].capitalize(), self.random.choice(['accepted', 'declined', 'tentative', 'needsAction']),
+                    'True' if n == 0 else '', 'True' if self.random.random() < 0.1 else ''])
+      row.extend(['']*(len(attendeeFields)*(MAX_ATTENDEES-len(attendees))))
+      outputCSV.writerow(row)
+
+  def messages(self, outputCSV, rows):
+    outputCSV.writerow(['From'])
+    senders = self.users[:200]+self.externals+[f'noreply@{domain}' for domain in EXTERNAL_DOMAINS]
+    for _ in range(rows):
+      sender = senders[int(len(senders)*self.random.random()**3)]
+      if self.random.random() < 0.7:
+        outputCSV.writerow([f'{sender.split("@")[0].capitalize()} <{sender}>'])
+      else:
+        outputCSV.writerow([sender])
+
+  def labels(self, outputCSV, rows):
+    outputCSV.writerow(['User', 'id', 'threadId', 'Labels', 'SizeEstimate'])
+    for messageNum in range(rows):
+      labels = self.random.sample(LABELS, self.random.randint(1, 4))
+      outputCSV.writerow([self.user(), f'{messageNum:016x}', f'{messageNum-messageNum % 3:016x}', '|'.join(labels),
+                          int(self.random.lognormvariate(9, 1.5))])
+
+  def browsers(self, outputCSV, rows):
+    outputCSV.writerow(['deviceId', 'JSON'])
+    extensions = [(f'{i:032x}'.translate(str.maketrans('0123456789', 'abcdefghij')), f'Extension {i}') for i in range(500)]
+    for browserNum in range(rows):
+      deviceId = f'{browserNum:08x}-0000-4000-8000-{browserNum:012x}'
+      profiles = []
+      for profileNum in range(self.random.randint(1, 3)):
+        profileExtensions = []
+        for extensionNum in set(int(len(extensions)*self.random.random()**2) for _ in range(self.random.randint(0, 15))):
+          extensionId, name = extensions[extensionNum]
+          profileExtensions.append({'extensionId': extensionId, 'version': f'{extensionNum % 7}.{extensionNum % 3}', 'name': name,
+                                    'permissions': self.random.sample(EXTENSION_PERMISSIONS, self.random.randint(0, 3)),
+                                    'installType': 'ADMIN' if self.random.random() < 0.2 else 'NORMAL',
+                                    'disabled': self.random.random() < 0.05})
+        profiles.append({'name': f'Profile {profileNum}', 'id': f'/home/user/.config/chrome/Profile {profileNum}',
+                         'extensions': profileExtensions})
+      data = {'deviceId': deviceId, 'machineName': f'MACHINE-{browserNum:06d}',
+              'browsers': [{'browserVersion': f'120.0.{self.random.randint(1000, 9999)}.0', 'profiles': profiles}]}
+      outputCSV.writerow([deviceId, json.dumps(data, ensure_ascii=False, sort_keys=True)])
+
+KINDS = {
+  'filelistperms': (Generator.filelistperms, QUOTE_CHAR),
+  'filelist': (Generator.filelist, QUOTE_CHAR),
+  'groupmembers': (Generator.groupmembers, QUOTE_CHAR),
+  'events': (Generator.events, QUOTE_CHAR),
+  'messages': (Generator.messages, QUOTE_CHAR),
+  'labels': (Generator.labels, QUOTE_CHAR),
+  'browsers': (Generator.browsers, "'"),
+  }
+
+def generate(kind, rows, outputFileName, seed=1):
+  """Write rows rows of kind to outputFileName."""
+  function, quoteChar = KINDS[kind]
+  with open(outputFileName, 'w', encoding='utf-8', newline='') as outputFile:
+    function(Generator(seed), csv.writer(outputFile, lineterminator=LINE_TERMINATOR, quotechar=quoteChar), rows)
+
+if __name__ == '__main__':
+  if len(sys.argv) < 4 or sys.argv[1] not in KINDS:
+    sys.stderr.write(f'Usage: {sys.argv[0]} {"|".join(KINDS)} <rows> <OutputFile> [<seed>]\n')
+    sys.exit(1)
+  generate(sys.argv[1], int(sys.argv[2]), sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+# Purpose: Run scripts on synthetic inputs of several sizes and record wall time, rows/s and peak RSS in a JSON file
+#          so that runs before and after a change can be compared.
+#          The inputs are made by GenerateBenchmarkData.py and kept in DATA_DIR so that later runs reuse them.
+#          Each script is run in a new process in a scratch directory; its output is discarded.
+#          The peak RSS is that of the script's process, measured by the process itself when it exits;
+#          the memory of worker processes that a script starts is not included.
+# Customize: BENCHMARKS, DATA_DIR, SEED
+# Python: Use python or python3 below as appropriate to your system; verify that you have version 3
+#  $ python -V   or   python3 -V
+#  Python 3.x.y
+# Usage:
+#  $ python3 RunBenchmarks.py <ResultsFile> [sizes=<Number>,...] [scripts=<Script>,...] [compare=<ResultsFile>]
+# 1: Run all of the benchmarks on 10k row inputs
+#  $ python3 RunBenchmarks.py ./before.json
+# 2: Make a change, then run the affected benchmarks on 10k and 1M row inputs and compare with the earlier run
+#  $ python3 RunBenchmarks.py ./after.json sizes=10000,1000000 scripts=DeleteDuplicateFiles.py,MakeOneItemPerRowACLs.py compare=./before.json
+# Peak RSS is only available on Linux, from VmHWM in /proc/self/status, and on macOS, from getrusage.
+"""
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from GenerateBenchmarkData import generate
+
+# Each benchmark is a script in the parent directory, the kind of input it reads and its arguments;
+# {input} is replaced by the input file, {output} by an output file in the scratch directory
+BENCHMARKS = [
+  {'script': 'MakeOneItemPerRowACLs.py', 'kind': 'filelistperms', 'args': ['{input}', '{output}']},
+  {'script': 'GetSharedFilePermissions.py', 'kind': 'filelistperms', 'args': ['{input}', '{output}']},
+  {'script': 'GetNonDomainDriveACLs.py', 'kind': 'filelistperms', 'args': ['{input}', '{output}']},
+  {'script': 'GetDriveACLReports.py', 'kind': 'filelistperms',
+   'args': ['{input}', 'NonDomainDriveACLs={output}.1', 'SharedWithAnyoneDriveACLs={output}.2', 'UserShareCounts={output}.3']},
+  {'script': 'DeleteDuplicateFiles.py', 'kind': 'filelist', 'args': ['{input}', '{output}']},
+  {'script': 'GetDailyMimeTypeCreations.py', 'kind': 'filelist', 'args': ['{input}', '{output}']},
+  {'script': 'ShowNestedGroupTree.py', 'kind': 'groupmembers', 'args': ['{input}', 'indented', '{output}']},
+  {'script': 'ConvertGroupUsersToUserGroupParents.py', 'kind': 'groupmembers', 'args': ['{input}', '{output}']},
+  {'script': 'MakeOneAttendeePerRowEvents.py', 'kind': 'events', 'args': ['{input}', '{output}']},
+  {'script': 'CountFroms.py', 'kind': 'messages', 'args': ['{input}', '{output}']},
+  {'script': 'GetLabelsCountSize.py', 'kind': 'labels', 'args': ['{input}', '{output}']},
+  {'script': 'BrowserExtensions.py', 'kind': 'browsers', 'args': ['{input}', '{output}']},
+  ]
+DEFAULT_SIZES = [10000]
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'GAM-Scripts3-benchmarks') # Where generated inputs are kept
+SEED = 1
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs a script and writes its peak RSS in KB to a file at exit: python -c LAUNCHER <PeakRSSFile> <Script> <Arguments>...
+# ru_maxrss from os.wait4 can't be used: on Linux it includes the RSS the process had before exec, i.e., that of this script.
+# VmHWM is the peak of the memory map made by exec, so it only measures the script
+LAUNCHER = '''
+import atexit, os, runpy, sys
+
+def writePeakRSS(fileName):
+  peakRSS = ''
+  try:
+    with open('/proc/self/status', 'r', encoding='utf-8') as f:
+      for line in f:
+        if line.startswith('VmHWM:'):
+          peakRSS = line.split()[1]
+  except OSError:
+    if sys.platform == 'darwin':
+      import resource
+      peakRSS = str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss//1024)
+  with open(fileName, 'w', encoding='utf-8') as f:
+    f.write(peakRSS)
+
+peakRSSFileName = sys.argv[1]
+atexit.register(writePeakRSS, peakRSSFileName)
+sys.argv = sys.argv[2:]
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+def getInput(kind, rows):
+  """Return the name of the input file for kind and rows, generating it if necessary."""
+  os.makedirs(DATA_DIR, exist_ok=True)
+  fileName = os.path.join(DATA_DIR, f'{kind}-{rows}-{SEED}.csv')
+  if not os.path.isfile(fileName):
+    sys.stderr.write(f'Generating {fileName}\n')
+    generate(kind, rows, fileName+'.tmp', SEED)
+    os.replace(fileName+'.tmp', fileName)
+  return fileName
+
+def runScript(script, args, scratchDir):
+  """Run script and return its exit status, wall time in seconds, peak RSS in KB or None, and the tail of stderr."""
+  peakRSSFileName = os.path.join(scratchDir, 'peakrss.txt')
+  with open(os.path.join(scratchDir, 'stderr.txt'), 'w+', encoding='utf-8') as errorFile:
+    start = time.perf_counter()
+    returncode = subprocess.call([sys.executable, '-c', LAUNCHER, peakRSSFileName, os.path.join(SCRIPTS_DIR, script)]+args,
+                                 cwd=scratchDir, stdout=subprocess.DEVNULL, stderr=errorFile)
+    seconds = time.perf_counter()-start
+    errorFile.seek(0)
+    errors = errorFile.read()[-500:]
+  try:
+    with open(peakRSSFileName, 'r', encoding='utf-8') as f:
+      peakRSS = int(f.read())
+  except (OSError, ValueError):
+    peakRSS = None
+  return returncode, seconds, peakRSS, errors
+
+def compareResults(results, previousFileName):
+  with open(previousFileName, 'r', encoding='utf-8') as f:
+    previous = {(result['script'], result['rows']): result for result in json.load(f)['results']}
+  sys.stdout.write(f'{"script":<45} {"rows":>10} {"seconds":>10} {"previous":>10} {"change":>8} {"peakRSS MB":>11} {"previous":>9}\n')
+  for result in results:
+    before = previous.get((result['script'], result['rows']))
+    if not before or not before['seconds']:
+      continue
+    change = (result['seconds']-before['seconds'])/before['seconds']*100
+    rss = f'{result["peakRSSKB"]/1024:.1f}' if result['peakRSSKB'] else '-'
+    beforeRSS = f'{before["peakRSSKB"]/1024:.1f}' if before.get('peakRSSKB') else '-'
+    sys.stdout.write(f'{result["script"]:<45} {result["rows"]:>10} {result["seconds"]:>10.2f} {before["seconds"]:>10.2f} '
+                     f'{change:>+7.1f}% {rss:>11} {beforeRSS:>9}\n')
+
+resultsFileName = sys.argv[1]
+sizes = DEFAULT_SIZES
+scripts = None
+previousFileName = None
+for arg in sys.argv[2:]:
+  name, _, value = arg.partition('=')
+  if name == 'sizes':
+    sizes = [int(size) for size in value.split(',')]
+  elif name == 'scripts':
+    scripts = value.split(',')
+  elif name == 'compare':
+    previousFileName = value
+  else:
+    sys.stderr.write(f'Unknown argument: {arg}\n')
+    sys.exit(1)
+
+results = []
+for rows in sizes:
+  for benchmark in BENCHMARKS:
+    if scripts and benchmark['script'] not in scripts:
+      continue
+    inputFileName = getInput(benchmark['kind'], rows)
+    scratchDir = tempfile.mkdtemp(prefix='bench')
+    try:
+      args = [arg.format(input=inputFileName, output=os.path.join(scratchDir, 'output.csv')) for arg in benchmark['args']]
+      returncode, seconds, peakRSS, errors = runScript(benchmark['script'], args, scratchDir)
+    finally:
+      shutil.rmtree(scratchDir, ignore_errors=True)
+    result = {'script': benchmark['script'], 'kind': benchmark['kind'], 'rows': rows,
+              'seconds': round(seconds, 3), 'rowsPerSecond': round(rows/seconds) if seconds else None,
+              'peakRSSKB': peakRSS, 'returncode': returncode}
+    if returncode:
+      result['stderr'] = errors
+    results.append(result)
+    sys.stderr.write(f'{benchmark["script"]}: {rows} rows, {seconds:.2f}s, {result["rowsPerSecond"]} rows/s, '
+                     f'peak RSS {peakRSS} KB{"" if not returncode else f", failed: {returncode}"}\n')
+
+with open(resultsFileName, 'w', encoding='utf-8') as f:
+  json.dump({'date': datetime.datetime.now().isoformat(timespec='seconds'),
+             'python': platform.python_version(), 'platform': platform.platform(),
+             'seed': SEED, 'results': results}, f, indent=1)
+  f.write('\n')
+if previousFileName:
+  compareResults(results, previousFileName)